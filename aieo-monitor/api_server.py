@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+AI Citation Monitor - Read API
+Lightweight JSON service over the monitor schema for internal tools
+(stdlib HTTP server, pooled storage connections, ETag + in-process cache)
+
+Endpoints (all GET, filters optional):
+    /api/health
+    /api/summary     ?model=ID&query=ID
+    /api/models      ?query=ID
+    /api/queries     ?model=ID
+    /api/timeseries  ?model=ID&query=ID&days=90
+    /api/citations   ?model=ID&query=ID&limit=50&before=CURSOR
+
+Responses carry an ETag derived from the data version (latest completed
+run, newest stored response and citation backfill progress), so clients
+can revalidate with If-None-Match and get 304 until the data changes.
+
+Usage:
+    python api_server.py [--host 127.0.0.1] [--port 8080] [--pool-size 4]
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backfill_citations import WATERMARK_KEY
+from database.pool import StoragePool
+from database.storage import BACKENDS, create_storage
+
+# Citation feed page size (default and hard cap)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class BadRequest(ValueError):
+    """Invalid request parameters (answered with 400)"""
+
+
+def _int_param(params: Dict[str, str], name: str, default: Optional[int],
+               minimum: int = 1, maximum: Optional[int] = None) -> Optional[int]:
+    """Parse an optional integer query parameter"""
+    if name not in params:
+        return default
+    try:
+        value = int(params[name])
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    if value < minimum:
+        raise BadRequest(f"{name} must be at least {minimum}")
+    if maximum is not None and value > maximum:
+        raise BadRequest(f"{name} must be at most {maximum}")
+    return value
+
+
+def _filters(params: Dict[str, str], alias: str = 'r') -> Tuple[str, List]:
+    """AND conditions for the model/query filters"""
+    sql, values = "", []
+    for name, column in (('model', 'model_id'), ('query', 'query_id')):
+        if params.get(name):
+            sql += f" AND {alias}.{column} = %s"
+            values.append(params[name])
+    return sql, values
+
+
+def _rate(cited, tested) -> float:
+    """Citation rate in percent, rounded like the dashboard"""
+    return round(float(cited or 0) / tested * 100, 1) if tested else 0.0
+
+
+def _json_default(value):
+    """JSON encoding for MySQL decimals and dates"""
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+class MonitorAPI:
+    """Endpoint logic, ETags and response cache (independent of HTTP plumbing)"""
+    
+    def __init__(self, pool: StoragePool, cache_size: int = 512, freshness_seconds: float = 5):
+        """
+        Args:
+            pool: Storage connection pool
+            cache_size: Responses kept in the in-process cache (LRU)
+            freshness_seconds: How long the data version is trusted
+                before checking the database again
+        """
+        self.pool = pool
+        self.cache_size = cache_size
+        self.freshness_seconds = freshness_seconds
+        self.routes = {
+            '/api/summary': self.summary,
+            '/api/models': self.models,
+            '/api/queries': self.queries,
+            '/api/timeseries': self.timeseries,
+            '/api/citations': self.citations,
+        }
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._version = None
+        self._version_checked = 0.0
+        self._latest_run = None
+    
+    # ------------------------------------------------------------------
+    # Versioning and cache
+    # ------------------------------------------------------------------
+    
+    def data_version(self) -> str:
+        """
+        Data version, re-read at most every freshness_seconds; the cache is
+        cleared when it changes
+        
+        Covers the latest completed run, the newest stored response (rows
+        written by runs still in progress) and the citation backfill
+        watermark, which backfill_citations.py rewrites with every batch.
+        """
+        now = time.monotonic()
+        if self._version is not None and now - self._version_checked < self.freshness_seconds:
+            return self._version
+        
+        with self.pool.connection() as db:
+            rows = db.fetch_all("""
+                SELECT run_id FROM runs
+                WHERE status = 'completed'
+                ORDER BY completed_at DESC
+                LIMIT 1
+            """)
+            newest = db.fetch_all("SELECT MAX(id) AS id FROM responses")[0]['id']
+            backfill = db.get_state(WATERMARK_KEY)
+        latest_run = rows[0]['run_id'] if rows else 'none'
+        source = json.dumps([latest_run, newest, backfill])
+        version = hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]
+        
+        with self._cache_lock:
+            if version != self._version:
+                self._cache.clear()
+            self._version = version
+            self._version_checked = now
+            self._latest_run = latest_run
+        return version
+    
+    @staticmethod
+    def etag(version: str, key: str) -> str:
+        """ETag for one resource (path + parameters) at one data version"""
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+        return f'"{version}-{digest}"'
+    
+    def handle(self, path: str, params: Dict[str, str],
+               if_none_match: Optional[str] = None) -> Tuple[int, Optional[bytes], Dict[str, str]]:
+        """
+        Answer a GET request
+        
+        Returns:
+            Tuple of (status, body or None, extra headers)
+        """
+        if path == '/api/health':
+            version = self.data_version()
+            return 200, self._encode({'status': 'ok', 'data_version': version,
+                                      'latest_completed_run': self._latest_run}), {}
+        
+        endpoint = self.routes.get(path)
+        if endpoint is None:
+            return 404, self._encode({'error': f"Unknown endpoint {path}"}), {}
+        
+        key = path + '?' + '&'.join(f"{name}={params[name]}" for name in sorted(params))
+        version = self.data_version()
+        etag = self.etag(version, key)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(',')]:
+            return 304, None, headers
+        
+        with self._cache_lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+        
+        if body is None:
+            try:
+                payload = endpoint(params)
+            except BadRequest as e:
+                return 400, self._encode({'error': str(e)}), {}
+            payload['data_version'] = version
+            body = self._encode(payload)
+            
+            with self._cache_lock:
+                # Don't cache results computed against a version that has
+                # since been replaced
+                if version == self._version:
+                    self._cache[key] = body
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        
+        return 200, body, headers
+    
+    @staticmethod
+    def _encode(payload: Dict) -> bytes:
+        return json.dumps(payload, default=_json_default).encode('utf-8')
+    
+    # ------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------
+    
+    def summary(self, params: Dict[str, str]) -> Dict:
+        """Overall totals and the latest run"""
+        filters, values = _filters(params)
+        with self.pool.connection() as db:
+            totals = db.fetch_all(f"""
+                SELECT
+                    COUNT(*) AS times_tested,
+                    COALESCE(SUM(r.paintballevents_referenced), 0) AS times_cited,
+                    COUNT(DISTINCT r.model_id) AS models,
+                    COUNT(DISTINCT r.query_id) AS queries
+                FROM responses r
+                WHERE 1 = 1{filters}
+            """, values)[0]
+            latest = db.fetch_all("""
+                SELECT run_id, started_at, completed_at, status, queries_executed, errors_count
+                FROM runs
+                ORDER BY started_at DESC
+                LIMIT 1
+            """)
+        
+        totals['times_cited'] = int(totals['times_cited'])
+        totals['citation_rate'] = _rate(totals['times_cited'], totals['times_tested'])
+        return {'summary': totals, 'latest_run': latest[0] if latest else None}
+    
+    def models(self, params: Dict[str, str]) -> Dict:
+        """Per-model performance, optionally for one query"""
+        join_filter, values = ("AND r.query_id = %s", [params['query']]) if params.get('query') else ("", [])
+        with self.pool.connection() as db:
+            rows = db.fetch_all(f"""
+                SELECT
+                    m.id AS model_id,
+                    m.name AS model_name,
+                    m.provider,
+                    COUNT(r.id) AS times_tested,
+                    COALESCE(SUM(r.paintballevents_referenced), 0) AS times_cited,
+                    ROUND(AVG(r.response_time_ms)) AS avg_response_time_ms,
+                    MAX(r.timestamp) AS last_tested
+                FROM models m
+                LEFT JOIN responses r ON r.model_id = m.id {join_filter}
+                WHERE m.active = 1
+                GROUP BY m.id, m.name, m.provider
+                ORDER BY m.name
+            """, values)
+        
+        for row in rows:
+            row['times_cited'] = int(row['times_cited'])
+            row['citation_rate'] = _rate(row['times_cited'], row['times_tested'])
+        return {'models': rows}
+    
+    def queries(self, params: Dict[str, str]) -> Dict:
+        """Per-query performance, optionally for one model"""
+        join_filter, values = ("AND r.model_id = %s", [params['model']]) if params.get('model') else ("", [])
+        with self.pool.connection() as db:
+            rows = db.fetch_all(f"""
+                SELECT
+                    q.id AS query_id,
+                    q.query_text,
+                    q.category,
+                    COUNT(r.id) AS times_tested,
+                    COALESCE(SUM(r.paintballevents_referenced), 0) AS times_cited,
+                    MAX(r.timestamp) AS last_tested
+                FROM queries q
+                LEFT JOIN responses r ON r.query_id = q.id {join_filter}
+                WHERE q.active = 1
+                GROUP BY q.id, q.query_text, q.category
+                ORDER BY q.id
+            """, values)
+        
+        for row in rows:
+            row['times_cited'] = int(row['times_cited'])
+            row['citation_rate'] = _rate(row['times_cited'], row['times_tested'])
+        return {'queries': rows}
+    
+    def timeseries(self, params: Dict[str, str]) -> Dict:
+        """Daily citations per model over the last N days"""
+        days = _int_param(params, 'days', 90, maximum=3650)
+        since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+        filters, values = _filters(params)
+        with self.pool.connection() as db:
+            rows = db.fetch_all(f"""
+                SELECT
+                    DATE(r.timestamp) AS date,
+                    r.model_id,
+                    COUNT(*) AS times_tested,
+                    SUM(r.paintballevents_referenced) AS times_cited
+                FROM responses r
+                WHERE r.timestamp >= %s{filters}
+                GROUP BY DATE(r.timestamp), r.model_id
+                ORDER BY date, r.model_id
+            """, [since] + values)
+        
+        for row in rows:
+            row['times_cited'] = int(row['times_cited'])
+            row['citation_rate'] = _rate(row['times_cited'], row['times_tested'])
+        return {'days': days, 'series': rows}
+    
+    def citations(self, params: Dict[str, str]) -> Dict:
+        """
+        Citation feed, newest first, with keyset pagination on responses.id
+        
+        Pass next_cursor back as ?before= for the next page; unlike OFFSET,
+        every page is an index range scan no matter how deep.
+        """
+        limit = _int_param(params, 'limit', DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE)
+        before = _int_param(params, 'before', None)
+        filters, values = _filters(params)
+        if before is not None:
+            filters += " AND r.id < %s"
+            values.append(before)
+        
+        with self.pool.connection() as db:
+            rows = db.fetch_all(f"""
+                SELECT
+                    r.id,
+                    r.timestamp,
+                    r.run_id,
+                    r.model_id,
+                    m.name AS model_name,
+                    r.query_id,
+                    r.query_text,
+                    r.search_query,
+                    r.cited_urls
+                FROM responses r
+                JOIN models m ON m.id = r.model_id
+                WHERE r.paintballevents_referenced = 1{filters}
+                ORDER BY r.id DESC
+                LIMIT %s
+            """, values + [limit + 1])
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        for row in rows:
+            row['cited_urls'] = json.loads(row['cited_urls']) if row['cited_urls'] else []
+        return {
+            'citations': rows,
+            'next_cursor': rows[-1]['id'] if has_more else None
+        }
+
+
+class APIRequestHandler(BaseHTTPRequestHandler):
+    """HTTP plumbing around MonitorAPI (server.api)"""
+    
+    server_version = 'AICitationMonitorAPI/1.0'
+    
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        
+        try:
+            status, body, headers = self.server.api.handle(
+                url.path.rstrip('/') or '/', params, self.headers.get('If-None-Match')
+            )
+        except Exception as e:
+            print(f"✗ {url.path}: {e}")
+            status, body, headers = 500, MonitorAPI._encode({'error': 'Internal error'}), {}
+        
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="AI Citation Monitor read API")
+    parser.add_argument('--host', default='127.0.0.1', help="Bind address (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8080, help="Port (default: 8080)")
+    parser.add_argument('--storage', choices=BACKENDS, help="Storage backend (default: MONITOR_STORAGE or mysql)")
+    parser.add_argument('--sqlite-path', metavar='PATH', help="SQLite database file")
+    parser.add_argument('--pool-size', type=int, default=4, help="Open storage connections (default: 4)")
+    parser.add_argument('--cache-size', type=int, default=512, help="Cached responses (default: 512)")
+    parser.add_argument(
+        '--freshness', type=float, default=5,
+        help="Seconds between checks for changed data (default: 5)"
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main entry point"""
+    load_dotenv()
+    args = parse_args()
+    
+    pool = StoragePool(lambda: create_storage(args.storage, args.sqlite_path), size=args.pool_size)
+    server = ThreadingHTTPServer((args.host, args.port), APIRequestHandler)
+    server.daemon_threads = True
+    server.api = MonitorAPI(pool, cache_size=args.cache_size, freshness_seconds=args.freshness)
+    
+    print(f"✓ Serving monitor API on http://{args.host}:{args.port}/api/summary")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✓ Shutting down")
+    finally:
+        server.server_close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+AI Citation Monitor - Citation Backfill
+Re-derives cited URLs (and their indexed domains), the paintballevents.net
+flag and per-tenant citations from stored responses after a tracked domain
+is added or the URL rules change, instead of paying to ask the models
+again. Responses are streamed in id order, re-evaluated in a process pool
+and written back in batched transactions; progress is saved with each
+batch, so an interrupted backfill resumes where it stopped.
+
+Usage:
+    python backfill_citations.py                    # resume (or start) the backfill
+    python backfill_citations.py --restart          # start over from the first response
+    python backfill_citations.py --dry-run          # count changes without writing
+    python backfill_citations.py --workers 8 --batch-size 2000
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.base_storage import tenant_rows
+from database.storage import BACKENDS, create_storage
+from utils.query_templates import expand_queries
+from utils.tenants import DEFAULT_TENANTS, prompt_key, resolve_tenants, tenant_references
+from utils.urls import PUBLIC_SUFFIX_PATH, RULES_VERSION, canonicalize_url, cites_domain
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config')
+
+# monitor_state key holding the last backfilled response id
+WATERMARK_KEY = 'citation_backfill'
+
+# Domain behind responses.paintballevents_referenced (MonitorOrchestrator._check_reference)
+REFERENCE_DOMAIN = 'paintballevents.net'
+
+# Tenants to evaluate per prompt key and per query id, set in each worker process
+_tenants_by_prompt: Dict[str, List[Dict]] = {}
+_tenants_by_query: Dict[str, List[Dict]] = {}
+
+
+def load_config() -> Tuple[List[Dict], List[Dict]]:
+    """Queries and resolved tenants from config/ (the original single site without tenants.json)"""
+    with open(os.path.join(CONFIG_DIR, 'queries.json'), 'r') as f:
+        queries = expand_queries(json.load(f))
+    try:
+        with open(os.path.join(CONFIG_DIR, 'tenants.json'), 'r') as f:
+            tenants = json.load(f)['tenants']
+    except FileNotFoundError:
+        tenants = DEFAULT_TENANTS
+    return queries, resolve_tenants(tenants, queries)
+
+
+def tenant_index(queries: List[Dict], tenants: List[Dict]) -> Tuple[Dict[str, List[Dict]], Dict[str, List[Dict]]]:
+    """
+    Tenants tracking each prompt (by prompt_key) and each query id
+    
+    A stored response was shared by every tenant tracking any query with
+    the same prompt, like share_prompts() does for a run.
+    """
+    text_of = {query['id']: query['text'] for query in queries}
+    by_prompt, by_query = {}, {}
+    for tenant in tenants:
+        for query_id in tenant['query_ids']:
+            by_query.setdefault(query_id, []).append(tenant)
+            members = by_prompt.setdefault(prompt_key(text_of[query_id]), [])
+            if tenant not in members:
+                members.append(tenant)
+    return by_prompt, by_query
+
+
+def _init_worker(by_prompt: Dict[str, List[Dict]], by_query: Dict[str, List[Dict]]):
+    """Process pool initializer: install the tenant index once per worker"""
+    global _tenants_by_prompt, _tenants_by_query
+    _tenants_by_prompt, _tenants_by_query = by_prompt, by_query
+
+
+def rederive(rows: List[Dict]) -> Tuple[List[Dict], int]:
+    """
+    Recompute citation results for a batch of stored responses
+    
+    Raw provider payloads are not stored, so the stored URL list is
+    re-canonicalized (duplicates that now coincide are merged) and matched
+    again together with the response text.
+    
+    Rows carry their stored per-tenant citations in tenant_refs; a tenant
+    without a stored row counts as not referenced.
+    
+    Returns:
+        (update rows for update_citations(), number of responses whose URLs,
+        flag or tenant citations changed)
+    """
+    updates = []
+    changed = 0
+    for row in rows:
+        stored = json.loads(row['cited_urls'] or '[]')
+        cited_urls = []
+        for url in stored:
+            clean_url = canonicalize_url(url)
+            if clean_url and clean_url not in cited_urls:
+                cited_urls.append(clean_url)
+        
+        referenced = cites_domain(REFERENCE_DOMAIN, cited_urls, row['response'])
+        
+        tenants = list(_tenants_by_prompt.get(prompt_key(row['query_text']), []))
+        tenants += [t for t in _tenants_by_query.get(row['query_id'], []) if t not in tenants]
+        tenant_refs = tenant_references(tenants, cited_urls, row['response'])
+        stored_refs = row['tenant_refs']
+        
+        if (cited_urls != stored or referenced != bool(row['paintballevents_referenced'])
+                or any(stored_refs.get(tenant_id, False) != value for tenant_id, value in tenant_refs.items())):
+            changed += 1
+        updates.append({
+            'id': row['id'],
+            'run_id': row['run_id'],
+            'cited_urls': cited_urls,
+            'paintballevents_ref': referenced,
+            'tenant_refs': tenant_refs
+        })
+    return updates, changed
+
+
+def rules_fingerprint(tenants: List[Dict]) -> str:
+    """Hash of the tenant domains, query lists and URL rules a backfill evaluated against"""
+    rows, memberships = tenant_rows(tenants)
+    with open(PUBLIC_SUFFIX_PATH, 'rb') as f:
+        suffix_list = hashlib.sha256(f.read()).hexdigest()
+    payload = json.dumps({
+        'tenants': sorted(rows),
+        'tenant_queries': sorted(memberships),
+        'url_rules': RULES_VERSION,
+        'suffix_list': suffix_list
+    })
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def resume_point(db, fingerprint: str, restart: bool) -> int:
+    """Response id to continue after (0 to start over)"""
+    if restart:
+        return 0
+    
+    saved = db.get_state(WATERMARK_KEY)
+    if not saved:
+        return 0
+    saved = json.loads(saved)
+    if saved.get('rules') != fingerprint:
+        print("⚠️  Tenant config or URL rules changed since the last backfill, starting over")
+        return 0
+    return int(saved['last_id'])
+
+
+def backfill(db, by_prompt: Dict, by_query: Dict, fingerprint: str, after_id: int,
+             workers: int, batch_size: int, dry_run: bool = False) -> Dict:
+    """
+    Stream responses after after_id through the pool and write results back in order
+    
+    Batches are written in id order, each with the watermark in the same
+    transaction, so a crash never skips or half-applies a batch. At most
+    two batches per worker are in flight, bounding memory. Each batch is
+    sent with its stored tenant citations so changes to them are counted.
+    
+    Returns:
+        Dict with processed, changed, last_id and seconds
+    """
+    stats = {'processed': 0, 'changed': 0, 'last_id': after_id}
+    start = time.perf_counter()
+    
+    def write(batch_last_id: int, result: Tuple[List[Dict], int]):
+        updates, changed = result
+        if not dry_run:
+            # written_at changes the value on every batch, even when a
+            # restarted backfill reaches the same id again (the read API's
+            # data version includes it)
+            watermark = {'last_id': batch_last_id, 'rules': fingerprint, 'written_at': time.time()}
+            db.update_citations(updates, (WATERMARK_KEY, json.dumps(watermark)))
+        stats['processed'] += len(updates)
+        stats['changed'] += changed
+        stats['last_id'] = batch_last_id
+        rate = stats['processed'] / max(time.perf_counter() - start, 1e-9)
+        print(f"  ✓ {stats['processed']:,} responses ({stats['changed']:,} changed) | "
+              f"last id {batch_last_id} | {rate:,.0f}/s")
+    
+    def batches():
+        for batch in db.iter_responses(after_id, batch_size):
+            stored_refs = db.get_tenant_refs(batch[0]['id'], batch[-1]['id'])
+            yield [dict(row, tenant_refs=stored_refs.get(row['id'], {})) for row in batch]
+    
+    if workers <= 1:
+        _init_worker(by_prompt, by_query)
+        for batch in batches():
+            write(batch[-1]['id'], rederive(batch))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(by_prompt, by_query)) as pool:
+            pending = deque()
+            for batch in batches():
+                pending.append((batch[-1]['id'], pool.submit(rederive, batch)))
+                while len(pending) >= workers * 2:
+                    batch_last_id, future = pending.popleft()
+                    write(batch_last_id, future.result())
+            while pending:
+                batch_last_id, future = pending.popleft()
+                write(batch_last_id, future.result())
+    
+    stats['seconds'] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Re-derive citations from stored responses")
+    parser.add_argument('--storage', choices=BACKENDS, help="Storage backend (default: MONITOR_STORAGE or mysql)")
+    parser.add_argument('--sqlite-path', metavar='PATH', help="SQLite database file")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes; 1 runs in-process (default: CPU count)")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Responses per batch and transaction (default: 1000)")
+    parser.add_argument('--restart', action='store_true', help="Ignore saved progress and start from the first response")
+    parser.add_argument('--dry-run', action='store_true', help="Count changed responses without writing")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main entry point"""
+    load_dotenv()
+    args = parse_args()
+    
+    try:
+        queries, tenants = load_config()
+    except (OSError, ValueError, KeyError) as e:
+        print(f"✗ ERROR: Invalid config: {e}")
+        sys.exit(1)
+    by_prompt, by_query = tenant_index(queries, tenants)
+    fingerprint = rules_fingerprint(tenants)
+    
+    with create_storage(args.storage, args.sqlite_path) as db:
+        if not args.dry_run:
+            # Register new tenants and domains first (tenant_citations references them)
+            db.sync_config(queries, [], tenants)
+        
+        after_id = resume_point(db, fingerprint, args.restart)
+        remaining = db.fetch_all("SELECT COUNT(*) AS n FROM responses WHERE id > %s", (after_id,))[0]['n']
+        print(f"Backfilling {remaining:,} responses after id {after_id} "
+              f"({args.workers} workers, batches of {args.batch_size:,})"
+              + (" [dry run]" if args.dry_run else ""))
+        
+        try:
+            stats = backfill(db, by_prompt, by_query, fingerprint, after_id,
+                             args.workers, args.batch_size, args.dry_run)
+        except KeyboardInterrupt:
+            print("\n✗ Interrupted; run again to resume from the last written batch")
+            sys.exit(1)
+    
+    print(f"\n✓ Backfilled {stats['processed']:,} responses in {stats['seconds']}s: "
+          f"{stats['changed']:,} changed")
+
+
+if __name__ == "__main__":
+    main()
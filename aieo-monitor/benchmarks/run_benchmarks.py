@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+AI Citation Monitor - Benchmark Suite
+Measures our own overhead (not provider latency) so regressions are visible
+before we scale up
+
+Groups:
+    extraction  extract_metadata() for every implemented adapter on large responses
+    matching    _check_reference() scaling with response text size
+    database    Storage write throughput: SQLite always, MySQL when MYSQL_* points
+                at a scratch DB
+    e2e         Full MonitorOrchestrator runs against replay models at 10x/100x/1000x
+                today's model x query matrix, stored in a temporary SQLite database
+
+Results are appended to benchmarks/history.jsonl and compared with the
+previous entry.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--only extraction,matching] [--quick] [--no-save]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from run_monitor import MonitorOrchestrator
+from models.gpt5_model import GPT5Model
+from models.gpt5_mini_model import GPT5MiniModel
+from models.gpt5_nano_model import GPT5NanoModel
+from models.openai_model import OpenAIModel
+from models.claude_model import ClaudeModel
+from models.claude_sonnet_45_model import ClaudeSonnet45Model
+from models.claude_haiku_45_model import ClaudeHaiku45Model
+from models.claude_opus_41_model import ClaudeOpus41Model
+from models.perplexity_model import PerplexityModel
+from models.replay_model import ReplayModel, ReplayProfile, synthetic_queries
+
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.jsonl')
+
+# Today's production matrix (README: 5 active models x 9 queries)
+BASE_MODELS = 5
+BASE_QUERIES = 9
+
+# Flag results that got this much slower than the previous entry
+REGRESSION_THRESHOLD = 0.20
+
+
+def measure(func: Callable, min_time: float = 0.2, repeat: int = 3) -> float:
+    """Best-of-repeat seconds per call, looping until each sample takes min_time"""
+    start = time.perf_counter()
+    func()
+    single = time.perf_counter() - start
+    number = max(1, min(1_000_000, int(min_time / max(single, 1e-7))))
+    
+    best = single
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+# ---------------------------------------------------------------------------
+# Synthetic provider payloads
+# ---------------------------------------------------------------------------
+
+def synthetic_text(paragraphs: int, urls_per_paragraph: int = 2) -> str:
+    """Markdown-ish answer text with inline URLs and bare domains"""
+    parts = []
+    for index in range(paragraphs):
+        links = ' '.join(
+            f"https://example{index}-{link}.com/events/texas?utm_source=openai"
+            for link in range(urls_per_paragraph)
+        )
+        parts.append(
+            f"{index}. **Texas Scenario Game {index}** - a two-day big game at "
+            f"field{index}.net with magfed and pump classes. Details: {links}. "
+            f"Also listed on paintballevents.net and scenariopaintball.org."
+        )
+    return '\n\n'.join(parts)
+
+
+class _Dumpable:
+    """Stands in for an OpenAI SDK response object (only model_dump() is used)"""
+    
+    def __init__(self, payload: Dict):
+        self._payload = payload
+    
+    def model_dump(self) -> Dict:
+        return self._payload
+
+
+def openai_payload(paragraphs: int) -> Dict:
+    text = synthetic_text(paragraphs)
+    annotations = [
+        {'type': 'url_citation', 'url': f"https://site{index}.com/page?utm_source=openai",
+         'start_index': index, 'end_index': index + 10, 'title': f"Site {index}"}
+        for index in range(paragraphs * 2)
+    ]
+    raw = _Dumpable({'output': [
+        {'type': 'web_search_call', 'action': {'query': 'paintball scenario games texas 2025'}},
+        {'type': 'message', 'content': [
+            {'type': 'output_text', 'text': text, 'annotations': annotations}
+        ]},
+    ]})
+    return {'response_text': text, 'response_time_ms': 1000, 'raw_response': raw}
+
+
+def claude_payload(paragraphs: int) -> Dict:
+    blocks = [SimpleNamespace(type='tool_use', name='web_search',
+                              input={'query': 'paintball scenario games texas 2025'})]
+    for index in range(paragraphs):
+        blocks.append(SimpleNamespace(type='text', text=synthetic_text(1).replace('0', str(index))))
+    raw = SimpleNamespace(content=blocks)
+    text = ''.join(block.text for block in blocks if block.type == 'text')
+    return {'response_text': text, 'response_time_ms': 1000, 'raw_response': raw}
+
+
+def perplexity_payload(paragraphs: int) -> Dict:
+    text = synthetic_text(paragraphs)
+    raw = SimpleNamespace(citations=[f"https://site{index}.com/page" for index in range(paragraphs)])
+    return {'response_text': text, 'response_time_ms': 1000, 'raw_response': raw}
+
+
+ADAPTERS = [
+    (GPT5Model, openai_payload),
+    (GPT5MiniModel, openai_payload),
+    (GPT5NanoModel, openai_payload),
+    (OpenAIModel, openai_payload),
+    (ClaudeModel, claude_payload),
+    (ClaudeSonnet45Model, claude_payload),
+    (ClaudeHaiku45Model, claude_payload),
+    (ClaudeOpus41Model, claude_payload),
+    (PerplexityModel, perplexity_payload),
+]
+
+
+# ---------------------------------------------------------------------------
+# Benchmark groups
+# ---------------------------------------------------------------------------
+
+def bench_extraction(quick: bool) -> Dict[str, float]:
+    """Seconds per extract_metadata() call on a large (~200 paragraph) response"""
+    paragraphs = 50 if quick else 200
+    results = {}
+    for model_class, make_payload in ADAPTERS:
+        model = model_class('benchmark-key')
+        payload = make_payload(paragraphs)
+        seconds = measure(lambda: model.extract_metadata(payload))
+        results[f"extraction.{model.model_id}"] = seconds
+        print(f"  {model.model_id:<22} {seconds * 1000:9.3f} ms/call")
+    return results
+
+
+def bench_matching(quick: bool) -> Dict[str, float]:
+    """Seconds per _check_reference() call as response text grows (no match, worst case)"""
+    sizes = [1_000, 10_000, 100_000] if quick else [1_000, 10_000, 100_000, 1_000_000]
+    cited_urls = [f"https://site{index}.com/page" for index in range(50)]
+    results = {}
+    for size in sizes:
+        text = ('Scenario paintball in Texas at example.com. ' * (size // 44 + 1))[:size]
+        seconds = measure(lambda: MonitorOrchestrator._check_reference(None, cited_urls, text))
+        results[f"matching.{size}_chars"] = seconds
+        print(f"  {size:>9,} chars        {seconds * 1_000_000:9.1f} us/call")
+    return results
+
+
+def _bench_writes(db, rows: int) -> float:
+    """Rows per second through store_response() on an open storage backend"""
+    run_id = MonitorOrchestrator._new_run_id('bench')
+    text = synthetic_text(20)
+    cited_urls = [f"https://site{index}.com/page" for index in range(20)]
+    
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        query = synthetic_queries(1)[0]
+        model = ReplayModel('bench-model', 'Benchmark Model', [{
+            'query_text': query['text'], 'response_text': text, 'provider': 'Benchmark'
+        }])
+        db.sync_config([query], [model])
+        db.start_run(run_id)
+        
+        start = time.perf_counter()
+        for index in range(rows):
+            db.store_response(
+                run_id=run_id, query_id=query['id'], query_text=query['text'],
+                model_id=model.model_id, response_text=text, paintballevents_ref=index % 2 == 0,
+                search_query='benchmark', cited_urls=cited_urls, response_time_ms=1000,
+                replicate_index=index
+            )
+        elapsed = time.perf_counter() - start
+        
+        # Clean up (responses cascade with the run)
+        placeholder = '%s' if db.backend == 'mysql' else '?'
+        cursor = db.connection.cursor()
+        cursor.execute(f"DELETE FROM runs WHERE run_id = {placeholder}", (run_id,))
+        cursor.close()
+        db.connection.commit()
+    
+    return rows / elapsed
+
+
+def bench_database(quick: bool) -> Dict[str, float]:
+    """Rows per second through store_response() for each storage backend"""
+    from database.sqlite_storage import SQLiteStorage
+    
+    rows = 50 if quick else 500
+    results = {}
+    
+    with tempfile.TemporaryDirectory() as tmp, SQLiteStorage(os.path.join(tmp, 'bench.db')) as db:
+        rate = _bench_writes(db, rows)
+    results['database.sqlite_store_response_rows_per_s'] = rate
+    print(f"  sqlite store_response {rate:9.1f} rows/s")
+    
+    if not os.getenv('MYSQL_HOST'):
+        print("  (mysql skipped: set MYSQL_* to a scratch database to benchmark it)")
+        return results
+    
+    from database.operations import DatabaseManager
+    
+    with DatabaseManager() as db:
+        rate = _bench_writes(db, rows)
+    results['database.store_response_rows_per_s'] = rate
+    print(f"  mysql  store_response {rate:9.1f} rows/s")
+    return results
+
+
+def bench_e2e(quick: bool) -> Dict[str, float]:
+    """Pairs per second for full runs against zero-latency replay models into SQLite"""
+    from database.sqlite_storage import SQLiteStorage
+    
+    scales = [10, 100] if quick else [10, 100, 1000]
+    profile = ReplayProfile(latency='fixed:0')
+    results = {}
+    for scale in scales:
+        # Grow both axes, with model_factor * query_factor == scale
+        model_factor = max(d for d in range(1, int(scale ** 0.5) + 1) if scale % d == 0)
+        query_factor = scale // model_factor
+        queries = synthetic_queries(BASE_QUERIES * query_factor)
+        entries = [{'query_text': q['text'], 'response_text': synthetic_text(10),
+                    'search_query': 'benchmark', 'cited_urls': [f"https://site{i}.com" for i in range(10)],
+                    'response_time_ms': 0, 'provider': 'Benchmark'} for q in queries[:BASE_QUERIES]]
+        models = [
+            ReplayModel(f"bench-{index}", f"Benchmark {index}", entries, profile)
+            for index in range(BASE_MODELS * model_factor)
+        ]
+        pairs = len(models) * len(queries)
+        
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(open(os.devnull, 'w')):
+            db = SQLiteStorage(os.path.join(tmp, 'bench.db'))
+            orchestrator = MonitorOrchestrator(models=models, queries=queries, db=db)
+            start = time.perf_counter()
+            orchestrator.run()
+            elapsed = time.perf_counter() - start
+        
+        rate = pairs / elapsed
+        results[f"e2e.{scale}x_pairs_per_s"] = rate
+        print(f"  {scale:>5}x ({pairs:>6,} pairs) {rate:9.1f} pairs/s  ({elapsed:.2f}s)")
+    return results
+
+
+GROUPS = {
+    'extraction': bench_extraction,
+    'matching': bench_matching,
+    'database': bench_database,
+    'e2e': bench_e2e,
+}
+
+# Results measured as throughput (higher is better); everything else is seconds
+THROUGHPUT_SUFFIXES = ('_per_s',)
+
+
+# ---------------------------------------------------------------------------
+# History
+# ---------------------------------------------------------------------------
+
+def load_previous() -> Dict:
+    """Return the last history entry, or {}"""
+    if not os.path.exists(HISTORY_PATH):
+        return {}
+    last = {}
+    with open(HISTORY_PATH, 'r') as f:
+        for line in f:
+            if line.strip():
+                last = json.loads(line)
+    return last
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return 'unknown'
+
+
+def compare(results: Dict[str, float], previous: Dict) -> List[str]:
+    """Return regression messages against the previous entry"""
+    regressions = []
+    before = previous.get('results', {})
+    for name, value in results.items():
+        old = before.get(name)
+        if not old or not value:
+            continue
+        if name.endswith(THROUGHPUT_SUFFIXES):
+            change = old / value - 1
+        else:
+            change = value / old - 1
+        if change > REGRESSION_THRESHOLD:
+            regressions.append(f"{name}: {change:+.0%} slower than {previous.get('commit')}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Citation Monitor benchmarks")
+    parser.add_argument('--only', help=f"Comma-separated groups ({', '.join(GROUPS)})")
+    parser.add_argument('--quick', action='store_true', help="Smaller inputs for a fast smoke run")
+    parser.add_argument('--no-save', action='store_true', help="Don't append to history.jsonl")
+    args = parser.parse_args()
+    
+    groups = args.only.split(',') if args.only else list(GROUPS)
+    unknown = [group for group in groups if group not in GROUPS]
+    if unknown:
+        parser.error(f"Unknown group(s): {', '.join(unknown)}")
+    
+    results = {}
+    for group in groups:
+        print(f"\n{group}")
+        print('-' * 60)
+        results.update(GROUPS[group](args.quick))
+    
+    entry = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'quick': args.quick,
+        'results': results,
+    }
+    
+    regressions = compare(results, load_previous())
+    print()
+    if regressions:
+        print("⚠️  Possible regressions:")
+        for message in regressions:
+            print(f"  - {message}")
+    else:
+        print("✓ No regressions against previous entry")
+    
+    if not args.no_save:
+        with open(HISTORY_PATH, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+        print(f"✓ Results appended to {os.path.relpath(HISTORY_PATH, ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
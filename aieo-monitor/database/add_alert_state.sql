@@ -0,0 +1,20 @@
+-- Migration: Add alert state table
+-- Date: 2026-10-19
+-- Description: Running citation-rate statistics (EWMA baseline and two-sided
+-- CUSUM) per (model, query) and per model, updated from each completed run
+-- so rate changes raise alerts without rescanning history.
+
+CREATE TABLE IF NOT EXISTS alert_state (
+    model_id VARCHAR(50) NOT NULL,
+    query_id VARCHAR(50) NOT NULL,
+    observations INT NOT NULL DEFAULT 0,
+    ewma_rate DOUBLE NOT NULL DEFAULT 0,
+    cusum_low DOUBLE NOT NULL DEFAULT 0,
+    cusum_high DOUBLE NOT NULL DEFAULT 0,
+    last_run_id VARCHAR(50),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (model_id, query_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Verify the table was created
+SHOW TABLES LIKE 'alert_state';
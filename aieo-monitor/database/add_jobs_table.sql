@@ -0,0 +1,24 @@
+-- Migration: Add distributed work queue
+-- Date: 2026-10-19
+-- Description: Lets several worker processes share one run
+-- (run_monitor.py --enqueue / --worker). Requires MySQL 8.0+ for SKIP LOCKED.
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    run_id VARCHAR(50) NOT NULL,
+    query_id VARCHAR(50) NOT NULL,
+    model_id VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    worker_id VARCHAR(100),
+    attempts INT NOT NULL DEFAULT 0,
+    heartbeat_at TIMESTAMP NULL,
+    lease_expires_at TIMESTAMP NULL,
+    completed_at TIMESTAMP NULL,
+    last_error TEXT,
+    UNIQUE KEY uq_job_pair (run_id, query_id, model_id),
+    INDEX idx_claim (run_id, status, lease_expires_at),
+    FOREIGN KEY (run_id) REFERENCES runs(run_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Verify the table was created
+SHOW TABLES LIKE 'jobs';
@@ -0,0 +1,14 @@
+-- Migration: Add monitor state table
+-- Date: 2026-10-19
+-- Description: Key-value store for run_monitor.py bookkeeping. Holds the
+-- fingerprint of the last query/model sync so unchanged config is not
+-- re-synced on every run.
+
+CREATE TABLE IF NOT EXISTS monitor_state (
+    state_key VARCHAR(100) PRIMARY KEY,
+    state_value TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Verify the table was created
+SHOW TABLES LIKE 'monitor_state';
@@ -0,0 +1,13 @@
+-- Migration: Add replicate index to responses
+-- Date: 2026-10-19
+-- Description: Supports replicate sampling (run_monitor.py --replicates), where
+-- each (model, query) pair is asked several times within one run
+
+ALTER TABLE responses
+    ADD COLUMN replicate_index INT NOT NULL DEFAULT 0 AFTER model_id;
+
+ALTER TABLE responses
+    ADD INDEX idx_run_pair (run_id, model_id, query_id, replicate_index);
+
+-- Verify the new column was added
+SHOW COLUMNS FROM responses LIKE 'replicate_index';
@@ -0,0 +1,18 @@
+-- Migration: Add response domains table
+-- Date: 2026-10-19
+-- Description: One row per (response, registrable domain) cited, with the
+-- run id denormalized so run_diff.py finds new and dropped domains with
+-- index lookups instead of parsing cited_urls JSON. After running this,
+-- index existing responses with: python run_diff.py --backfill-domains
+
+CREATE TABLE IF NOT EXISTS response_domains (
+    response_id INT NOT NULL,
+    run_id VARCHAR(50) NOT NULL,
+    domain VARCHAR(255) NOT NULL,
+    PRIMARY KEY (response_id, domain),
+    INDEX idx_run_domain (run_id, domain),
+    FOREIGN KEY (response_id) REFERENCES responses(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Verify the table was created
+SHOW TABLES LIKE 'response_domains';
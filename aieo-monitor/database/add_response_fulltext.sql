@@ -0,0 +1,11 @@
+-- Migration: Add full-text index on response text
+-- Date: 2026-10-19
+-- Description: Lets search_responses.py find competitor names and event
+-- titles with MATCH ... AGAINST instead of LIKE '%...%' table scans.
+-- Building the index rewrites the table; run it outside the monitor's schedule.
+
+ALTER TABLE responses
+    ADD FULLTEXT INDEX ft_response (response);
+
+-- Verify the index was added
+SHOW INDEX FROM responses WHERE Key_name = 'ft_response';
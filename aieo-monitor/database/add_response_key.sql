@@ -0,0 +1,13 @@
+-- Migration: Add response keys
+-- Date: 2026-10-19
+-- Description: Unique key assigned to each result when it is written to the
+-- local spool (database/spool.py), so a spool segment flushed twice (e.g.
+-- the process died between the commit and deleting the segment) stores
+-- each response once. Older rows stay NULL.
+
+ALTER TABLE responses
+    ADD COLUMN response_key CHAR(32) NULL AFTER error,
+    ADD UNIQUE INDEX idx_response_key (response_key);
+
+-- Verify the new column was added
+SHOW COLUMNS FROM responses LIKE 'response_key';
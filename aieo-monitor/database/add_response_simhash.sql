@@ -0,0 +1,22 @@
+-- Migration: Add response fingerprints
+-- Date: 2026-10-19
+-- Description: 64-bit SimHash of each response plus four 16-bit LSH bands
+-- (utils/simhash.py), so drift_report.py can find changed and near-identical
+-- answers without diffing full texts. Older rows stay NULL until
+-- drift_report.py --backfill fills them in.
+
+ALTER TABLE responses
+    ADD COLUMN simhash BIGINT NULL AFTER error,
+    ADD COLUMN simhash_band0 SMALLINT UNSIGNED NULL AFTER simhash,
+    ADD COLUMN simhash_band1 SMALLINT UNSIGNED NULL AFTER simhash_band0,
+    ADD COLUMN simhash_band2 SMALLINT UNSIGNED NULL AFTER simhash_band1,
+    ADD COLUMN simhash_band3 SMALLINT UNSIGNED NULL AFTER simhash_band2;
+
+ALTER TABLE responses
+    ADD INDEX idx_simhash_band0 (simhash_band0),
+    ADD INDEX idx_simhash_band1 (simhash_band1),
+    ADD INDEX idx_simhash_band2 (simhash_band2),
+    ADD INDEX idx_simhash_band3 (simhash_band3);
+
+-- Verify the new columns were added
+SHOW COLUMNS FROM responses LIKE 'simhash%';
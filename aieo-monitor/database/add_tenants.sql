@@ -0,0 +1,58 @@
+-- Migration: Add tenants
+-- Date: 2026-10-19
+-- Description: Lets several sites share one monitor. Each tenant tracks its
+-- own domains over a subset of queries; one response per (model, prompt) is
+-- evaluated against every interested tenant in tenant_citations. Existing
+-- responses are attributed to the original PaintballEvents.net tenant.
+
+CREATE TABLE IF NOT EXISTS tenants (
+    id VARCHAR(50) PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    domains JSON NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS tenant_queries (
+    tenant_id VARCHAR(50) NOT NULL,
+    query_id VARCHAR(50) NOT NULL,
+    PRIMARY KEY (tenant_id, query_id),
+    FOREIGN KEY (tenant_id) REFERENCES tenants(id) ON DELETE CASCADE,
+    FOREIGN KEY (query_id) REFERENCES queries(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS tenant_citations (
+    response_id INT NOT NULL,
+    tenant_id VARCHAR(50) NOT NULL,
+    referenced BOOLEAN NOT NULL,
+    PRIMARY KEY (response_id, tenant_id),
+    INDEX idx_tenant_referenced (tenant_id, referenced),
+    FOREIGN KEY (response_id) REFERENCES responses(id) ON DELETE CASCADE,
+    FOREIGN KEY (tenant_id) REFERENCES tenants(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Attribute existing responses to the original site
+INSERT IGNORE INTO tenants (id, name, domains)
+VALUES ('paintballevents', 'PaintballEvents.net', JSON_ARRAY('paintballevents.net'));
+
+INSERT IGNORE INTO tenant_queries (tenant_id, query_id)
+SELECT 'paintballevents', id FROM queries;
+
+INSERT IGNORE INTO tenant_citations (response_id, tenant_id, referenced)
+SELECT id, 'paintballevents', paintballevents_referenced FROM responses;
+
+CREATE OR REPLACE VIEW tenant_performance AS
+SELECT 
+    t.id as tenant_id,
+    t.name as tenant_name,
+    r.model_id,
+    COUNT(tc.response_id) as total_queries,
+    SUM(tc.referenced) as times_cited,
+    ROUND(SUM(tc.referenced) / COUNT(tc.response_id) * 100, 1) as citation_rate,
+    MAX(r.timestamp) as last_tested
+FROM tenants t
+JOIN tenant_citations tc ON tc.tenant_id = t.id
+JOIN responses r ON r.id = tc.response_id
+GROUP BY t.id, t.name, r.model_id;
+
+-- Verify
+SELECT tenant_id, COUNT(*) AS responses FROM tenant_citations GROUP BY tenant_id;
@@ -0,0 +1,458 @@
+"""
+Base storage interface for AI Citation Monitor
+All storage backends (MySQL, SQLite) should inherit from this class
+"""
+import json
+import hashlib
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.simhash import BANDS
+from utils.urls import url_domain
+
+# monitor_state key holding the fingerprint of the last synced queries/models
+CONFIG_FINGERPRINT_KEY = 'config_fingerprint'
+
+
+def query_row(query: Dict) -> Tuple:
+    """Normalized (id, query_text, category, priority, active) for a config query or queries row"""
+    return (
+        query['id'],
+        query.get('text', query.get('query_text')),
+        query.get('category'),
+        int(query.get('priority') or 1),
+        bool(query.get('active', True))
+    )
+
+
+def model_row(model) -> Tuple:
+    """Normalized (id, name, provider) for a model instance or models row"""
+    if isinstance(model, dict):
+        return model['id'], model['name'], model['provider']
+    return model.model_id, model.model_name, model.provider
+
+
+def tenant_rows(tenants: List[Dict]) -> Tuple[List[Tuple], List[Tuple]]:
+    """Normalized (id, name, domains_json) tenant rows and (tenant_id, query_id) memberships"""
+    rows = [(tenant['id'], tenant['name'], json.dumps(sorted(tenant['domains']))) for tenant in tenants]
+    memberships = [(tenant['id'], query_id) for tenant in tenants for query_id in tenant['query_ids']]
+    return rows, memberships
+
+
+def cited_domains(cited_urls: List[str]) -> List[str]:
+    """Registrable domains of a response's cited URLs (unique, sorted) for response_domains"""
+    return sorted({domain for domain in map(url_domain, cited_urls or []) if domain})
+
+
+def response_row(
+    run_id: str,
+    query_id: str,
+    query_text: str,
+    model_id: str,
+    response_text: str,
+    paintballevents_ref: bool,
+    search_query: Optional[str],
+    cited_urls: List[str],
+    response_time_ms: Optional[int] = None,
+    error: Optional[str] = None,
+    replicate_index: int = 0,
+    tenant_refs: Optional[Dict[str, bool]] = None,
+    response_key: Optional[str] = None
+) -> Dict:
+    """store_responses() row for store_response() arguments"""
+    return {
+        'run_id': run_id,
+        'query_id': query_id,
+        'query_text': query_text,
+        'model_id': model_id,
+        'response_text': response_text,
+        'paintballevents_ref': paintballevents_ref,
+        'search_query': search_query,
+        'cited_urls': cited_urls,
+        'response_time_ms': response_time_ms,
+        'error': error,
+        'replicate_index': replicate_index,
+        'tenant_refs': tenant_refs,
+        'response_key': response_key
+    }
+
+
+def print_stored(row: Dict):
+    """Print the citation status of a stored (or spooled) response row"""
+    citation_status = '✓ CITED' if row['paintballevents_ref'] else '✗ Not cited'
+    replicate = f" #{row['replicate_index']}" if row.get('replicate_index') else ""
+    print(f"  {citation_status} | {row['model_id']} | {row['query_id'][:20]}{replicate}")
+    if row.get('cited_urls'):
+        print(f"    URLs: {len(row['cited_urls'])} found")
+    tenant_refs = row.get('tenant_refs')
+    if tenant_refs and len(tenant_refs) > 1:
+        print("    Tenants: " + ', '.join(
+            f"{tenant_id} {'✓' if referenced else '✗'}" for tenant_id, referenced in tenant_refs.items()
+        ))
+
+
+def config_fingerprint(query_rows: List[Tuple], model_rows: List[Tuple],
+                       tenant_rows: List[Tuple] = (), memberships: List[Tuple] = ()) -> str:
+    """Stable hash of query, model and tenant definitions (independent of order)"""
+    payload = json.dumps({
+        'queries': sorted(query_rows),
+        'models': sorted(model_rows),
+        'tenants': sorted(tenant_rows),
+        'tenant_queries': sorted(memberships)
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class BaseStorage(ABC):
+    """Abstract base class for monitor storage backends"""
+    
+    # Short backend name used in messages and by create_storage()
+    backend = None
+    # Whether the tenant tables exist (False on MySQL until add_tenants.sql has run)
+    supports_tenants = True
+    # Whether the alert_state table exists (False on MySQL until add_alert_state.sql has run)
+    supports_alerts = True
+    
+    @abstractmethod
+    def start_run(self, run_id: str):
+        """Start a new monitoring run"""
+        pass
+    
+    @abstractmethod
+    def ensure_run(self, run_id: str):
+        """Create a run if it does not exist yet (shared by concurrent shards)"""
+        pass
+    
+    @abstractmethod
+    def finalize_run(self, run_id: str, notes: Optional[str] = None):
+        """Recount stored responses for a run and mark it completed"""
+        pass
+    
+    @abstractmethod
+    def complete_run(self, run_id: str, notes: Optional[str] = None):
+        """Mark a run as completed"""
+        pass
+    
+    @abstractmethod
+    def fail_run(self, run_id: str, error: str):
+        """Mark a run as failed"""
+        pass
+    
+    def sync_config(self, queries: List[Dict], models: List, tenants: Optional[List[Dict]] = None) -> bool:
+        """
+        Bring the queries, models and tenants tables in line with config, if it changed
+        
+        The definitions are fingerprinted; when the fingerprint matches the
+        one stored by the last sync, nothing is read or written. Otherwise
+        the current rows are read once and only new or changed queries and
+        models are upserted, together with every tenant (there are few) and
+        the new fingerprint, in one transaction. Rows missing from config
+        are left alone (old responses reference them), and models' active
+        flags are never touched.
+        
+        A sync without models (backfill_citations.py registering tenants)
+        always diffs and leaves the stored fingerprint alone: a fingerprint
+        without models would never match the monitor's, and each would keep
+        overwriting the other's.
+        
+        Args:
+            queries: Query config dicts
+            models: Model instances (empty: sync queries and tenants only)
+            tenants: Resolved tenants (see utils/tenants.py); None leaves tenants alone
+        
+        Returns:
+            True if the tables were diffed, False if the sync was skipped
+        """
+        query_rows = {row[0]: row for row in map(query_row, queries)}
+        model_rows = {row[0]: row for row in map(model_row, models)}
+        tenant_defs, memberships = tenant_rows(tenants) if tenants and self.supports_tenants else ([], [])
+        fingerprint = config_fingerprint(
+            list(query_rows.values()), list(model_rows.values()), tenant_defs, memberships
+        )
+        
+        if models and self.get_state(CONFIG_FINGERPRINT_KEY) == fingerprint:
+            print(f"✓ Queries, models and tenants unchanged ({fingerprint[:12]}), skipping sync")
+            return False
+        
+        stored_queries, stored_models = self._load_config()
+        stored_queries = {row[0]: row for row in map(query_row, stored_queries)}
+        stored_models = {row[0]: row for row in map(model_row, stored_models)}
+        
+        changed_queries = [row for key, row in query_rows.items() if stored_queries.get(key) != row]
+        changed_models = [row for key, row in model_rows.items() if stored_models.get(key) != row]
+        self._apply_config(changed_queries, changed_models, fingerprint if models else None,
+                           tenant_defs, memberships)
+        
+        print(f"✓ Synced config: {len(changed_queries)}/{len(query_rows)} queries and "
+              f"{len(changed_models)}/{len(model_rows)} models changed, {len(tenant_defs)} tenants")
+        return True
+    
+    @abstractmethod
+    def _load_config(self) -> Tuple[List[Dict], List[Dict]]:
+        """All rows of the queries and models tables, as (queries, models)"""
+        pass
+    
+    @abstractmethod
+    def _apply_config(self, query_rows: List[Tuple], model_rows: List[Tuple], fingerprint: Optional[str],
+                      tenant_rows: List[Tuple] = (), memberships: List[Tuple] = ()):
+        """
+        Upsert normalized query, model and tenant rows and store the fingerprint in one transaction
+        
+        Args:
+            query_rows: (id, query_text, category, priority, active) tuples
+            model_rows: (id, name, provider) tuples; new models are inserted active
+            fingerprint: Value for the config fingerprint state key (None leaves it alone)
+            tenant_rows: (id, name, domains_json) tuples
+            memberships: (tenant_id, query_id) tuples replacing those tenants' query lists
+        """
+        pass
+    
+    @abstractmethod
+    def get_state(self, key: str) -> Optional[str]:
+        """Read a value from the monitor_state key-value table (None if unset)"""
+        pass
+    
+    @abstractmethod
+    def set_state(self, key: str, value: str):
+        """Write a value to the monitor_state key-value table"""
+        pass
+    
+    def store_response(
+        self,
+        run_id: str,
+        query_id: str,
+        query_text: str,
+        model_id: str,
+        response_text: str,
+        paintballevents_ref: bool,
+        search_query: Optional[str],
+        cited_urls: List[str],
+        response_time_ms: Optional[int] = None,
+        error: Optional[str] = None,
+        replicate_index: int = 0,
+        tenant_refs: Optional[Dict[str, bool]] = None,
+        response_key: Optional[str] = None
+    ):
+        """Store a single query response and print its citation status"""
+        # Don't store empty responses
+        if not response_text or not response_text.strip():
+            print(f"  ⚠️  Skipping empty response | {model_id} | {query_id}")
+            return
+        
+        row = response_row(
+            run_id, query_id, query_text, model_id, response_text, paintballevents_ref,
+            search_query, cited_urls, response_time_ms, error, replicate_index, tenant_refs, response_key
+        )
+        self.store_responses([row])
+        print_stored(row)
+    
+    @abstractmethod
+    def store_responses(self, rows: List[Dict]) -> int:
+        """
+        Store many responses in one transaction
+        
+        Args:
+            rows: Dictionaries with the same keys as store_response() arguments;
+                tenant_refs, if present, is stored in tenant_citations, and
+                response_key, if present, makes the insert idempotent
+        
+        Returns:
+            Number of rows stored (empty and already stored responses are skipped)
+        """
+        pass
+    
+    @abstractmethod
+    def store_error(self, run_id: str, query_id: str, model_id: str, query_text: str, error: str):
+        """Log an error that occurred during a query"""
+        pass
+    
+    @abstractmethod
+    def get_last_run_times(self) -> Dict[Tuple[str, str], datetime]:
+        """Get the most recent response time for each (model_id, query_id) pair"""
+        pass
+    
+    @abstractmethod
+    def get_pair_latencies(self, before_run_id: str, days: int = 90) -> Dict[Tuple[str, str], float]:
+        """Average response time per (model_id, query_id) from runs before before_run_id"""
+        pass
+    
+    @abstractmethod
+    def get_response_fingerprints(self, days: Optional[int] = None,
+                                  run_id: Optional[str] = None) -> List[Dict]:
+        """
+        Response fingerprints for drift analysis, oldest first
+        
+        Args:
+            days: Only responses from the last N days
+            run_id: Only responses from this run
+        
+        Returns:
+            Dicts with id, run_id, timestamp, model_id, query_id, replicate_index,
+            simhash (signed, None if not computed yet) and response (text, only
+            where simhash is None)
+        """
+        pass
+    
+    @abstractmethod
+    def store_fingerprints(self, rows: List[Tuple]):
+        """Set (simhash, band0, band1, band2, band3, id) on existing responses"""
+        pass
+    
+    def get_band_pairs(self, run_id: str) -> List[Tuple[int, int]]:
+        """
+        Pairs of a run's answers sharing an LSH band, found through the band indexes
+        
+        Only first replicates with a stored fingerprint take part. A shared
+        band makes a pair a candidate; the caller checks the Hamming distance.
+        
+        Returns:
+            (id_a, id_b) tuples with id_a < id_b
+        """
+        selects = [f"""
+            SELECT a.id AS id_a, b.id AS id_b
+            FROM responses a
+            JOIN responses b ON b.simhash_band{band} = a.simhash_band{band}
+            WHERE a.run_id = %s AND b.run_id = %s AND b.id > a.id
+              AND a.replicate_index = 0 AND b.replicate_index = 0
+        """ for band in range(BANDS)]
+        rows = self.fetch_all(' UNION '.join(selects), (run_id, run_id) * BANDS)
+        return [(row['id_a'], row['id_b']) for row in rows]
+    
+    def get_tenant_refs(self, first_id: int, last_id: int) -> Dict[int, Dict[str, bool]]:
+        """Stored per-tenant citations of responses first_id..last_id as {response_id: {tenant_id: referenced}}"""
+        if not self.supports_tenants:
+            return {}
+        rows = self.fetch_all("""
+            SELECT response_id, tenant_id, referenced
+            FROM tenant_citations
+            WHERE response_id BETWEEN %s AND %s
+        """, (first_id, last_id))
+        refs = {}
+        for row in rows:
+            refs.setdefault(row['response_id'], {})[row['tenant_id']] = bool(row['referenced'])
+        return refs
+    
+    @abstractmethod
+    def iter_responses(self, after_id: int = 0, batch_size: int = 1000) -> Iterator[List[Dict]]:
+        """
+        Stream stored responses in id order, a batch at a time
+        
+        Args:
+            after_id: Only responses with a larger id (resume point)
+            batch_size: Rows per batch
+        
+        Yields:
+            Lists of dicts with id, run_id, query_id, model_id, query_text,
+            response, paintballevents_referenced and cited_urls (JSON text)
+        """
+        pass
+    
+    @abstractmethod
+    def update_citations(self, rows: List[Dict], state: Optional[Tuple[str, str]] = None):
+        """
+        Overwrite re-derived citation results in one transaction
+        
+        Args:
+            rows: Dicts with id, run_id, cited_urls and paintballevents_ref (the
+                response's domains are re-indexed too); tenant_refs, if present,
+                is upserted into tenant_citations
+            state: (key, value) written to monitor_state in the same transaction
+        """
+        pass
+    
+    @abstractmethod
+    def store_response_domains(self, rows: List[Tuple[int, str, List[str]]]):
+        """Replace the indexed cited domains of existing (response_id, run_id, cited_urls) in one transaction"""
+        pass
+    
+    @abstractmethod
+    def get_alert_states(self) -> Dict[Tuple[str, str], Dict]:
+        """
+        Citation-rate alert state per (model_id, query_id) (see utils/alerts.py)
+        
+        Returns:
+            {(model_id, query_id): dict with observations, ewma_rate, cusum_low,
+            cusum_high and last_run_id}
+        """
+        pass
+    
+    @abstractmethod
+    def save_alert_states(self, rows: List[Dict]):
+        """Upsert alert state rows (dicts with model_id, query_id and the state fields) in one transaction"""
+        pass
+    
+    @abstractmethod
+    def search_responses(
+        self,
+        text: str,
+        model_id: Optional[str] = None,
+        query_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 20
+    ) -> List[Dict]:
+        """
+        Full-text search over response text, best matches first
+        
+        Args:
+            text: Search terms, all required; "quoted text" matches as a phrase
+            model_id: Only responses from this model
+            query_id: Only responses to this query
+            since: Only responses stored at or after this time
+            until: Only responses stored before this time
+            limit: Maximum number of results
+        
+        Returns:
+            Dicts with id, run_id, timestamp, model_id, query_id,
+            paintballevents_referenced, score (higher is better) and snippet
+            (matches wrapped in [brackets])
+        """
+        pass
+    
+    @abstractmethod
+    def fetch_all(self, sql: str, params: Tuple = ()) -> List[Dict]:
+        """
+        Run a read-only query and return all rows as dicts
+        
+        Queries use %s placeholders on every backend and must stick to SQL
+        both MySQL and SQLite understand (used by the read API).
+        """
+        pass
+    
+    @abstractmethod
+    def get_run_summary(self, run_id: str) -> Dict:
+        """Get summary statistics for a run"""
+        pass
+    
+    @abstractmethod
+    def close(self):
+        """Close the storage connection"""
+        pass
+    
+    def __enter__(self):
+        """Context manager entry"""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.close()
+    
+    @staticmethod
+    def _non_empty(rows: List[Dict]) -> List[Dict]:
+        """Drop rows whose response text is empty (never stored)"""
+        return [
+            row for row in rows
+            if row.get('response_text') and row['response_text'].strip()
+        ]
+    
+    def _unstored(self, rows: List[Dict]) -> List[Dict]:
+        """Drop rows whose response_key is already stored (a spool segment flushed twice)"""
+        keys = [row['response_key'] for row in rows if row.get('response_key')]
+        if not keys:
+            return rows
+        stored = {row['response_key'] for row in self.fetch_all(
+            f"SELECT response_key FROM responses WHERE response_key IN ({', '.join(['%s'] * len(keys))})",
+            tuple(keys)
+        )}
+        return [row for row in rows if row.get('response_key') not in stored]
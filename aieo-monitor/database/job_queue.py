@@ -0,0 +1,243 @@
+"""
+Distributed work queue for AI Citation Monitor
+Lets several worker processes (on any machine) share one run
+"""
+import threading
+from typing import Dict, List, Optional
+
+from .operations import DatabaseManager
+
+
+class JobQueue:
+    """
+    MySQL-backed queue with one job per (run_id, query_id, model_id)
+    
+    Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+    claims never block on or hand out the same row. A claim is a lease:
+    workers must heartbeat, and jobs whose lease expires (crashed worker)
+    become claimable again until max_attempts is reached.
+    """
+    
+    def __init__(self, db: DatabaseManager, lease_seconds: int = 300, max_attempts: int = 3):
+        """
+        Args:
+            db: Database manager whose connection the queue uses
+            lease_seconds: How long a claim is valid without a heartbeat
+            max_attempts: Claims allowed per job before it is marked failed
+        """
+        self.db = db
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+    
+    @property
+    def connection(self):
+        return self.db.connection
+    
+    def enqueue(self, run_id: str, model_ids: List[str], query_ids: List[str]) -> int:
+        """Create one pending job per (query, model) pair; returns jobs added"""
+        rows = [(run_id, query_id, model_id) for model_id in model_ids for query_id in query_ids]
+        
+        self.db._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            added = cursor.executemany("""
+                INSERT IGNORE INTO jobs (run_id, query_id, model_id, status)
+                VALUES (%s, %s, %s, 'pending')
+            """, rows)
+        self.connection.commit()
+        print(f"✓ Enqueued {added} jobs for run: {run_id}")
+        return added
+    
+    def claim(self, run_id: str, worker_id: str, model_ids: List[str]) -> Optional[Dict]:
+        """
+        Claim the next available job for one of the given models
+        
+        Returns:
+            Job dictionary (id, query_id, model_id, attempts) or None
+        """
+        if not model_ids:
+            return None
+        
+        self.db._reconnect_if_needed()
+        self._expire_abandoned(run_id)
+        
+        placeholders = ', '.join(['%s'] * len(model_ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT id, query_id, model_id, attempts
+                FROM jobs
+                WHERE run_id = %s
+                  AND model_id IN ({placeholders})
+                  AND attempts < %s
+                  AND (status = 'pending'
+                       OR (status = 'claimed' AND lease_expires_at < NOW()))
+                ORDER BY id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            """, (run_id, *model_ids, self.max_attempts))
+            job = cursor.fetchone()
+            
+            if job:
+                cursor.execute("""
+                    UPDATE jobs
+                    SET status = 'claimed',
+                        worker_id = %s,
+                        attempts = attempts + 1,
+                        heartbeat_at = NOW(),
+                        lease_expires_at = NOW() + INTERVAL %s SECOND
+                    WHERE id = %s
+                """, (worker_id, self.lease_seconds, job['id']))
+                job['attempts'] += 1
+        
+        self.connection.commit()
+        return job
+    
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """Extend a lease; returns False if the job is no longer ours"""
+        self.db._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            renewed = cursor.execute("""
+                UPDATE jobs
+                SET heartbeat_at = NOW(),
+                    lease_expires_at = NOW() + INTERVAL %s SECOND
+                WHERE id = %s AND worker_id = %s AND status = 'claimed'
+            """, (self.lease_seconds, job_id, worker_id))
+        self.connection.commit()
+        return renewed > 0
+    
+    def complete(self, job_id: int, worker_id: str):
+        """Mark a claimed job as done"""
+        self.db._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE jobs
+                SET status = 'done', completed_at = NOW(), lease_expires_at = NULL
+                WHERE id = %s AND worker_id = %s
+            """, (job_id, worker_id))
+        self.connection.commit()
+    
+    def fail(self, job_id: int, worker_id: str, error: str):
+        """Release a job after an error; it is retried until max_attempts"""
+        self.db._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE jobs
+                SET status = IF(attempts >= %s, 'failed', 'pending'),
+                    last_error = %s,
+                    lease_expires_at = NULL
+                WHERE id = %s AND worker_id = %s
+            """, (self.max_attempts, error, job_id, worker_id))
+        self.connection.commit()
+    
+    def remaining(self, run_id: str, model_ids: Optional[List[str]] = None) -> int:
+        """Count jobs that are still pending or claimed"""
+        sql = """
+            SELECT COUNT(*) AS remaining
+            FROM jobs
+            WHERE run_id = %s AND status IN ('pending', 'claimed')
+        """
+        params = [run_id]
+        if model_ids is not None:
+            if not model_ids:
+                return 0
+            sql += f" AND model_id IN ({', '.join(['%s'] * len(model_ids))})"
+            params.extend(model_ids)
+        
+        self.db._reconnect_if_needed()
+        self._expire_abandoned(run_id)
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        self.connection.commit()
+        return row['remaining']
+    
+    def finish_run_if_drained(self, run_id: str) -> bool:
+        """
+        Mark the run completed once no jobs are left
+        
+        Safe to call from every worker: only the first caller to see an
+        empty queue flips the run from 'running' to 'completed'.
+        
+        Returns:
+            True if this call completed the run
+        """
+        if self.remaining(run_id) > 0:
+            return False
+        
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT
+                    SUM(status = 'done') AS done,
+                    SUM(status = 'failed') AS failed
+                FROM jobs
+                WHERE run_id = %s
+            """, (run_id,))
+            counts = cursor.fetchone()
+            
+            finished = cursor.execute("""
+                UPDATE runs
+                SET completed_at = NOW(), status = 'completed', notes = %s
+                WHERE run_id = %s AND status = 'running'
+            """, (
+                f"Queue drained: {int(counts['done'] or 0)} jobs done, "
+                f"{int(counts['failed'] or 0)} failed",
+                run_id
+            ))
+        self.connection.commit()
+        
+        if finished:
+            print(f"✓ Completed run: {run_id}")
+        return finished > 0
+    
+    def _expire_abandoned(self, run_id: str):
+        """Fail jobs whose lease expired after their last allowed attempt"""
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE jobs
+                SET status = 'failed', last_error = 'Lease expired', lease_expires_at = NULL
+                WHERE run_id = %s
+                  AND status = 'claimed'
+                  AND lease_expires_at < NOW()
+                  AND attempts >= %s
+            """, (run_id, self.max_attempts))
+        self.connection.commit()
+
+
+class LeaseHeartbeat:
+    """
+    Background thread that keeps the current job's lease alive
+    
+    Uses its own database connection because PyMySQL connections must not
+    be shared between threads.
+    """
+    
+    def __init__(self, worker_id: str, lease_seconds: int = 300):
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.interval = max(1, lease_seconds // 3)
+        self._job_id = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='lease-heartbeat', daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def track(self, job_id: Optional[int]):
+        """Set the job whose lease should be renewed (None to pause)"""
+        self._job_id = job_id
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+    
+    def _loop(self):
+        with DatabaseManager() as db:
+            queue = JobQueue(db, lease_seconds=self.lease_seconds)
+            while not self._stop.wait(self.interval):
+                job_id = self._job_id
+                if job_id is None:
+                    continue
+                try:
+                    if not queue.heartbeat(job_id, self.worker_id):
+                        print(f"  ⚠️  Lost lease on job {job_id}")
+                except Exception as e:
+                    print(f"  ⚠️  Heartbeat failed: {e}")
@@ -5,13 +5,27 @@ Handles MySQL connection and CRUD operations
 import os
 import json
 import pymysql
+from collections import Counter
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
+from .base_storage import BaseStorage, CONFIG_FINGERPRINT_KEY, cited_domains
+from utils.simhash import fingerprint_columns
+from utils.search import boolean_query, make_snippet, search_terms
 
+RESPONSE_COLUMNS = (
+    'run_id', 'timestamp', 'query_id', 'model_id', 'replicate_index', 'query_text',
+    'response', 'paintballevents_referenced', 'search_query', 'cited_urls',
+    'response_time_ms', 'error'
+)
+# Added by add_response_simhash.sql; left out of inserts until it has run
+FINGERPRINT_COLUMNS = ('simhash', 'simhash_band0', 'simhash_band1', 'simhash_band2', 'simhash_band3')
 
-class DatabaseManager:
+
+class DatabaseManager(BaseStorage):
     """Manages MySQL database operations for the monitor"""
     
+    backend = 'mysql'
+    
     def __init__(self):
         """Initialize database connection"""
         self._connect()
@@ -19,13 +33,18 @@ class DatabaseManager:
     
     def _connect(self):
         """Establish database connection"""
-        self.connection = pymysql.connect(
+        self.connection = self._open()
+    
+    @staticmethod
+    def _open(cursorclass=pymysql.cursors.DictCursor):
+        """Open a new connection with the configured credentials"""
+        return pymysql.connect(
             host=os.getenv('MYSQL_HOST'),
             user=os.getenv('MYSQL_USER'),
             password=os.getenv('MYSQL_PASSWORD'),
             database=os.getenv('MYSQL_DATABASE'),
             charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor,
+            cursorclass=cursorclass,
             autocommit=False,
             connect_timeout=60,
             read_timeout=60,
@@ -47,9 +66,47 @@ class DatabaseManager:
             cursor.execute("SHOW TABLES LIKE 'responses'")
             if not cursor.fetchone():
                 print("⚠️  Warning: Database schema not found. Run schema.sql first!")
+            
+            cursor.execute("SHOW TABLES LIKE 'monitor_state'")
+            self._has_state = cursor.fetchone() is not None
+            if not self._has_state:
+                print("⚠️  Warning: monitor_state table not found, config is re-synced every run. "
+                      "Run add_monitor_state.sql")
+            
+            cursor.execute("SHOW COLUMNS FROM responses LIKE 'simhash'")
+            self._has_simhash = cursor.fetchone() is not None
+            if not self._has_simhash:
+                print("⚠️  Warning: responses.simhash not found, fingerprints are not stored. "
+                      "Run add_response_simhash.sql")
+            
+            cursor.execute("SHOW COLUMNS FROM responses LIKE 'response_key'")
+            self._has_response_key = cursor.fetchone() is not None
+            if not self._has_response_key:
+                print("⚠️  Warning: responses.response_key not found, spooled results flushed twice may be "
+                      "stored twice and archived raw payloads can't be found by response id. "
+                      "Run add_response_key.sql")
+            
+            cursor.execute("SHOW TABLES LIKE 'tenant_citations'")
+            self.supports_tenants = cursor.fetchone() is not None
+            if not self.supports_tenants:
+                print("⚠️  Warning: tenant tables not found, per-tenant citations are not stored. "
+                      "Run add_tenants.sql")
+            
+            cursor.execute("SHOW TABLES LIKE 'response_domains'")
+            self._has_domains = cursor.fetchone() is not None
+            if not self._has_domains:
+                print("⚠️  Warning: response_domains table not found, cited domains are not indexed. "
+                      "Run add_response_domains.sql")
+            
+            cursor.execute("SHOW TABLES LIKE 'alert_state'")
+            self.supports_alerts = cursor.fetchone() is not None
+            if not self.supports_alerts:
+                print("⚠️  Warning: alert_state table not found, citation rate alerts are off. "
+                      "Run add_alert_state.sql")
     
     def start_run(self, run_id: str):
         """Start a new monitoring run"""
+        self._reconnect_if_needed()
         with self.connection.cursor() as cursor:
             sql = """
                 INSERT INTO runs (run_id, started_at, status, queries_executed, errors_count)
@@ -65,8 +122,42 @@ class DatabaseManager:
         self.connection.commit()
         print(f"✓ Started run: {run_id}")
     
+    def ensure_run(self, run_id: str):
+        """Create a run if it does not exist yet (shared by concurrent shards)"""
+        self._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            created = cursor.execute("""
+                INSERT IGNORE INTO runs (run_id, started_at, status, queries_executed, errors_count)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (run_id, datetime.now(), 'running', 0, 0))
+        self.connection.commit()
+        if created:
+            print(f"✓ Started run: {run_id}")
+    
+    def finalize_run(self, run_id: str, notes: Optional[str] = None):
+        """Recount stored responses for a run and mark it completed"""
+        self._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE runs
+                SET queries_executed = (
+                        SELECT COUNT(*) FROM responses WHERE run_id = %s
+                    ),
+                    completed_at = %s,
+                    status = %s,
+                    notes = COALESCE(%s, notes)
+                WHERE run_id = %s
+            """, (run_id, datetime.now(), 'completed', notes, run_id))
+            found = cursor.rowcount
+        self.connection.commit()
+        
+        if not found:
+            raise ValueError(f"Run not found: {run_id}")
+        print(f"✓ Finalized run: {run_id}")
+    
     def complete_run(self, run_id: str, notes: Optional[str] = None):
         """Mark a run as completed"""
+        self._reconnect_if_needed()
         with self.connection.cursor() as cursor:
             sql = """
                 UPDATE runs 
@@ -90,88 +181,176 @@ class DatabaseManager:
         self.connection.commit()
         print(f"✗ Failed run: {run_id}")
     
-    def sync_queries(self, queries: List[Dict]):
-        """Sync queries from config to database"""
-        with self.connection.cursor() as cursor:
-            for query in queries:
-                sql = """
-                    INSERT INTO queries (id, query_text, category, priority, active)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE
-                        query_text = VALUES(query_text),
-                        category = VALUES(category),
-                        priority = VALUES(priority),
-                        active = VALUES(active)
-                """
-                cursor.execute(sql, (
-                    query['id'],
-                    query['text'],
-                    query.get('category'),
-                    query.get('priority', 1),
-                    query.get('active', True)
-                ))
+    def _load_config(self) -> Tuple[List[Dict], List[Dict]]:
+        """All rows of the queries and models tables, as (queries, models)"""
+        self._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT id, query_text, category, priority, active FROM queries")
+            queries = cursor.fetchall()
+            cursor.execute("SELECT id, name, provider FROM models")
+            models = cursor.fetchall()
+        return queries, models
+    
+    def _apply_config(self, query_rows: List[Tuple], model_rows: List[Tuple], fingerprint: Optional[str],
+                      tenant_rows: List[Tuple] = (), memberships: List[Tuple] = ()):
+        """Upsert changed query, model and tenant rows and store the fingerprint in one transaction"""
+        self._reconnect_if_needed()
+        try:
+            with self.connection.cursor() as cursor:
+                if query_rows:
+                    cursor.executemany("""
+                        INSERT INTO queries (id, query_text, category, priority, active)
+                        VALUES (%s, %s, %s, %s, %s)
+                        ON DUPLICATE KEY UPDATE
+                            query_text = VALUES(query_text),
+                            category = VALUES(category),
+                            priority = VALUES(priority),
+                            active = VALUES(active)
+                    """, query_rows)
+                if model_rows:
+                    cursor.executemany("""
+                        INSERT INTO models (id, name, provider, active)
+                        VALUES (%s, %s, %s, %s)
+                        ON DUPLICATE KEY UPDATE
+                            name = VALUES(name),
+                            provider = VALUES(provider)
+                    """, [row + (True,) for row in model_rows])
+                if tenant_rows:
+                    cursor.executemany("""
+                        INSERT INTO tenants (id, name, domains)
+                        VALUES (%s, %s, %s)
+                        ON DUPLICATE KEY UPDATE
+                            name = VALUES(name),
+                            domains = VALUES(domains)
+                    """, tenant_rows)
+                    cursor.execute(
+                        f"DELETE FROM tenant_queries WHERE tenant_id IN ({', '.join(['%s'] * len(tenant_rows))})",
+                        [row[0] for row in tenant_rows]
+                    )
+                if memberships:
+                    cursor.executemany(
+                        "INSERT INTO tenant_queries (tenant_id, query_id) VALUES (%s, %s)", memberships
+                    )
+                if fingerprint is not None:
+                    self._write_state(cursor, CONFIG_FINGERPRINT_KEY, fingerprint)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+    
+    def get_state(self, key: str) -> Optional[str]:
+        """Read a value from the monitor_state key-value table (None if unset)"""
+        if not self._has_state:
+            return None
+        
+        self._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT state_value FROM monitor_state WHERE state_key = %s", (key,))
+            row = cursor.fetchone()
+        return row['state_value'] if row else None
+    
+    def set_state(self, key: str, value: str):
+        """Write a value to the monitor_state key-value table"""
+        self._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            self._write_state(cursor, key, value)
         self.connection.commit()
-        print(f"✓ Synced {len(queries)} queries to database")
     
-    def store_response(
-        self,
-        run_id: str,
-        query_id: str,
-        query_text: str,
-        model_id: str,
-        response_text: str,
-        paintballevents_ref: bool,
-        search_query: Optional[str],
-        cited_urls: List[str],
-        response_time_ms: Optional[int] = None,
-        error: Optional[str] = None
-    ):
-        """Store a query response in the database"""
-        # Don't store empty responses
-        if not response_text or not response_text.strip():
-            print(f"  ⚠️  Skipping empty response | {model_id} | {query_id}")
+    def _write_state(self, cursor, key: str, value: str):
+        """Upsert a state value without committing (no-op before the migration)"""
+        if not self._has_state:
             return
+        cursor.execute("""
+            INSERT INTO monitor_state (state_key, state_value)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE state_value = VALUES(state_value)
+        """, (key, value))
+    
+    def store_responses(self, rows: List[Dict]) -> int:
+        """Store many responses with one multi-row INSERT and one commit"""
+        rows = self._non_empty(rows)
+        if rows and self._has_response_key:
+            rows = self._unstored(rows)
+        if not rows:
+            return 0
         
+        timestamp = datetime.now()
         self._reconnect_if_needed()
+        columns = (
+            RESPONSE_COLUMNS
+            + (('response_key',) if self._has_response_key else ())
+            + (FINGERPRINT_COLUMNS if self._has_simhash else ())
+        )
+        sql = f"""
+            INSERT INTO responses ({', '.join(columns)})
+            VALUES ({', '.join(['%s'] * len(columns))})
+        """
+        
+        def values(row):
+            return (
+                row['run_id'],
+                timestamp,
+                row['query_id'],
+                row['model_id'],
+                row.get('replicate_index', 0),
+                row['query_text'],
+                row['response_text'],
+                row['paintballevents_ref'],
+                row.get('search_query'),
+                # Convert cited_urls list to JSON
+                json.dumps(row.get('cited_urls') or []),
+                row.get('response_time_ms'),
+                row.get('error')
+            ) + (
+                (row.get('response_key'),) if self._has_response_key else ()
+            ) + (fingerprint_columns(row['response_text']) if self._has_simhash else ())
+        
+        plain, linked = [], []
+        for row in rows:
+            has_links = (
+                (self.supports_tenants and row.get('tenant_refs'))
+                or (self._has_domains and row.get('cited_urls'))
+            )
+            (linked if has_links else plain).append(row)
+        
         with self.connection.cursor() as cursor:
-            # Convert cited_urls list to JSON
-            cited_urls_json = json.dumps(cited_urls)
+            if plain:
+                cursor.executemany(sql, [values(row) for row in plain])
             
-            sql = """
-                INSERT INTO responses 
-                (run_id, timestamp, query_id, model_id, query_text, response, 
-                 paintballevents_referenced, search_query, cited_urls, 
-                 response_time_ms, error)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(sql, (
-                run_id,
-                datetime.now(),
-                query_id,
-                model_id,
-                query_text,
-                response_text,
-                paintballevents_ref,
-                search_query,
-                cited_urls_json,
-                response_time_ms,
-                error
-            ))
+            # Rows with tenant results or cited domains are inserted one by one for their ids
+            citations = []
+            domains = []
+            for row in linked:
+                cursor.execute(sql, values(row))
+                if self.supports_tenants:
+                    citations.extend(
+                        (cursor.lastrowid, tenant_id, bool(referenced))
+                        for tenant_id, referenced in (row.get('tenant_refs') or {}).items()
+                    )
+                if self._has_domains:
+                    domains.extend(
+                        (cursor.lastrowid, row['run_id'], domain) for domain in cited_domains(row.get('cited_urls'))
+                    )
+            if citations:
+                cursor.executemany("""
+                    INSERT INTO tenant_citations (response_id, tenant_id, referenced)
+                    VALUES (%s, %s, %s)
+                """, citations)
+            if domains:
+                cursor.executemany(
+                    "INSERT INTO response_domains (response_id, run_id, domain) VALUES (%s, %s, %s)", domains
+                )
             
             # Update run statistics
-            cursor.execute("""
-                UPDATE runs 
-                SET queries_executed = queries_executed + 1
-                WHERE run_id = %s
-            """, (run_id,))
-            
-        self.connection.commit()
+            for run_id, count in Counter(row['run_id'] for row in rows).items():
+                cursor.execute("""
+                    UPDATE runs 
+                    SET queries_executed = queries_executed + %s
+                    WHERE run_id = %s
+                """, (count, run_id))
         
-        # Print result
-        citation_status = '✓ CITED' if paintballevents_ref else '✗ Not cited'
-        print(f"  {citation_status} | {model_id} | {query_id[:20]}")
-        if cited_urls:
-            print(f"    URLs: {len(cited_urls)} found")
+        self.connection.commit()
+        return len(rows)
     
     def store_error(self, run_id: str, query_id: str, model_id: str, query_text: str, error: str):
         """
@@ -190,8 +369,265 @@ class DatabaseManager:
         self.connection.commit()
         print(f"  ✗ Error | {model_id} | {query_id}: {error}")
     
+    def get_last_run_times(self) -> Dict[Tuple[str, str], datetime]:
+        """Get the most recent response time for each (model_id, query_id) pair"""
+        self._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT model_id, query_id, MAX(timestamp) AS last_run
+                FROM responses
+                GROUP BY model_id, query_id
+            """)
+            rows = cursor.fetchall()
+        
+        return {(row['model_id'], row['query_id']): row['last_run'] for row in rows}
+    
+    def get_pair_latencies(self, before_run_id: str, days: int = 90) -> Dict[Tuple[str, str], float]:
+        """
+        Average response time per (model_id, query_id) from earlier runs
+        
+        Only responses stored before before_run_id started are used, so
+        every process attached to that run sees identical history.
+        """
+        self._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT r.model_id, r.query_id, AVG(r.response_time_ms) AS avg_ms
+                FROM responses r
+                JOIN runs cur ON cur.run_id = %s
+                WHERE r.run_id <> cur.run_id
+                  AND r.timestamp < cur.started_at
+                  AND r.timestamp >= cur.started_at - INTERVAL %s DAY
+                  AND r.response_time_ms IS NOT NULL
+                GROUP BY r.model_id, r.query_id
+            """, (before_run_id, days))
+            rows = cursor.fetchall()
+        
+        return {(row['model_id'], row['query_id']): float(row['avg_ms']) for row in rows}
+    
+    def get_response_fingerprints(self, days: Optional[int] = None,
+                                  run_id: Optional[str] = None) -> List[Dict]:
+        """Fingerprint rows (text only where the fingerprint is missing), oldest first"""
+        if not self._has_simhash:
+            raise RuntimeError("responses.simhash not found. Run add_response_simhash.sql")
+        
+        conditions, params = [], []
+        if days is not None:
+            conditions.append("timestamp >= NOW() - INTERVAL %s DAY")
+            params.append(int(days))
+        if run_id is not None:
+            conditions.append("run_id = %s")
+            params.append(run_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        self._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT id, run_id, timestamp, model_id, query_id, replicate_index, simhash,
+                       CASE WHEN simhash IS NULL THEN response END AS response
+                FROM responses
+                {where}
+                ORDER BY timestamp, id
+            """, params)
+            return cursor.fetchall()
+    
+    def store_fingerprints(self, rows: List[Tuple]):
+        """Set (simhash, band0, band1, band2, band3, id) on existing responses"""
+        self._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            cursor.executemany("""
+                UPDATE responses
+                SET simhash = %s, simhash_band0 = %s, simhash_band1 = %s,
+                    simhash_band2 = %s, simhash_band3 = %s
+                WHERE id = %s
+            """, rows)
+        self.connection.commit()
+    
+    def iter_responses(self, after_id: int = 0, batch_size: int = 1000) -> Iterator[List[Dict]]:
+        """
+        Stream responses in id order through a server-side (unbuffered) cursor
+        
+        The cursor gets its own connection: an unbuffered result blocks its
+        connection until it is read to the end, and callers write between
+        batches. Consume batches promptly, the server drops a reader that
+        stalls past net_write_timeout.
+        """
+        stream = self._open(pymysql.cursors.SSDictCursor)
+        try:
+            with stream.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, run_id, query_id, model_id, query_text, response,
+                           paintballevents_referenced, cited_urls
+                    FROM responses
+                    WHERE id > %s
+                    ORDER BY id
+                """, (after_id,))
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        return
+                    yield list(rows)
+        finally:
+            stream.close()
+    
+    def update_citations(self, rows: List[Dict], state: Optional[Tuple[str, str]] = None):
+        """Overwrite re-derived citation results (and optionally a state value) in one transaction"""
+        self._reconnect_if_needed()
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.executemany("""
+                    UPDATE responses
+                    SET cited_urls = %s, paintballevents_referenced = %s
+                    WHERE id = %s
+                """, [(json.dumps(row['cited_urls']), bool(row['paintballevents_ref']), row['id']) for row in rows])
+                
+                citations = [
+                    (row['id'], tenant_id, bool(referenced))
+                    for row in rows
+                    for tenant_id, referenced in (row.get('tenant_refs') or {}).items()
+                ]
+                if citations and self.supports_tenants:
+                    cursor.executemany("""
+                        INSERT INTO tenant_citations (response_id, tenant_id, referenced)
+                        VALUES (%s, %s, %s)
+                        ON DUPLICATE KEY UPDATE referenced = VALUES(referenced)
+                    """, citations)
+                self._replace_domains(cursor, [(row['id'], row['run_id'], row['cited_urls']) for row in rows])
+                if state:
+                    self._write_state(cursor, *state)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+    
+    def store_response_domains(self, rows: List[Tuple[int, str, List[str]]]):
+        """Replace the indexed cited domains of existing (response_id, run_id, cited_urls) in one transaction"""
+        if not self._has_domains:
+            raise RuntimeError("response_domains not found. Run add_response_domains.sql")
+        
+        self._reconnect_if_needed()
+        try:
+            with self.connection.cursor() as cursor:
+                self._replace_domains(cursor, rows)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+    
+    def _replace_domains(self, cursor, rows: List[Tuple[int, str, List[str]]]):
+        """Rewrite response_domains rows for (response_id, run_id, cited_urls) without committing (no-op before the migration)"""
+        if not self._has_domains or not rows:
+            return
+        cursor.execute(
+            f"DELETE FROM response_domains WHERE response_id IN ({', '.join(['%s'] * len(rows))})",
+            [row[0] for row in rows]
+        )
+        domains = [
+            (response_id, run_id, domain)
+            for response_id, run_id, urls in rows
+            for domain in cited_domains(urls)
+        ]
+        if domains:
+            cursor.executemany(
+                "INSERT INTO response_domains (response_id, run_id, domain) VALUES (%s, %s, %s)", domains
+            )
+    
+    def get_alert_states(self) -> Dict[Tuple[str, str], Dict]:
+        """Citation-rate alert state per (model_id, query_id)"""
+        self._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT model_id, query_id, observations, ewma_rate, cusum_low, cusum_high, last_run_id
+                FROM alert_state
+            """)
+            rows = cursor.fetchall()
+        self.connection.commit()
+        return {(row.pop('model_id'), row.pop('query_id')): row for row in rows}
+    
+    def save_alert_states(self, rows: List[Dict]):
+        """Upsert alert state rows in one transaction"""
+        self._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            cursor.executemany("""
+                INSERT INTO alert_state
+                (model_id, query_id, observations, ewma_rate, cusum_low, cusum_high, last_run_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    observations = VALUES(observations),
+                    ewma_rate = VALUES(ewma_rate),
+                    cusum_low = VALUES(cusum_low),
+                    cusum_high = VALUES(cusum_high),
+                    last_run_id = VALUES(last_run_id)
+            """, [
+                (row['model_id'], row['query_id'], row['observations'], row['ewma_rate'],
+                 row['cusum_low'], row['cusum_high'], row['last_run_id'])
+                for row in rows
+            ])
+        self.connection.commit()
+    
+    def search_responses(
+        self,
+        text: str,
+        model_id: Optional[str] = None,
+        query_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 20
+    ) -> List[Dict]:
+        """Full-text search over response text, best matches first (FULLTEXT index)"""
+        terms = search_terms(text)
+        if not terms:
+            return []
+        
+        expression = boolean_query(terms)
+        conditions, params = ["MATCH (response) AGAINST (%s IN BOOLEAN MODE)"], [expression]
+        for column, value in (('model_id', model_id), ('query_id', query_id)):
+            if value is not None:
+                conditions.append(f"{column} = %s")
+                params.append(value)
+        if since is not None:
+            conditions.append("timestamp >= %s")
+            params.append(since)
+        if until is not None:
+            conditions.append("timestamp < %s")
+            params.append(until)
+        
+        self._reconnect_if_needed()
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT id, run_id, timestamp, model_id, query_id,
+                           paintballevents_referenced, response,
+                           MATCH (response) AGAINST (%s IN BOOLEAN MODE) AS score
+                    FROM responses
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY score DESC
+                    LIMIT %s
+                """, [expression] + params + [int(limit)])
+                rows = cursor.fetchall()
+        except pymysql.MySQLError as e:
+            # 1191: Can't find FULLTEXT index matching the column list
+            if e.args and e.args[0] == 1191:
+                raise RuntimeError("Full-text index not found. Run add_response_fulltext.sql")
+            raise
+        
+        for row in rows:
+            row['snippet'] = make_snippet(row.pop('response'), terms)
+        return rows
+    
+    def fetch_all(self, sql: str, params: Tuple = ()) -> List[Dict]:
+        """Run a read-only query and return all rows as dicts"""
+        self._reconnect_if_needed()
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        # End the transaction so a long-lived connection sees later runs
+        self.connection.commit()
+        return list(rows)
+    
     def get_run_summary(self, run_id: str) -> Dict:
         """Get summary statistics for a run"""
+        self._reconnect_if_needed()
         with self.connection.cursor() as cursor:
             cursor.execute("""
                 SELECT 
@@ -212,12 +648,4 @@ class DatabaseManager:
         """Close database connection"""
         if self.connection:
             self.connection.close()
-    
-    def __enter__(self):
-        """Context manager entry"""
-        return self
-    
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit"""
-        self.close()
 
@@ -0,0 +1,68 @@
+"""
+Storage connection pool for AI Citation Monitor
+Lets threaded services (api_server.py) reuse open storage connections
+instead of connecting per request
+"""
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable
+
+from .base_storage import BaseStorage
+
+
+class StoragePool:
+    """Fixed-size pool of storage backends, each used by one thread at a time"""
+    
+    def __init__(self, factory: Callable[[], BaseStorage], size: int = 4):
+        """
+        Args:
+            factory: Creates a connected storage backend (e.g. create_storage)
+            size: Maximum number of connections in use or idle
+        """
+        self.factory = factory
+        self.size = size
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+    
+    @contextmanager
+    def connection(self, timeout: float = 30):
+        """
+        Borrow a storage backend for the duration of a with block
+        
+        Idle connections are reused (most recently returned first) and new
+        ones are opened on demand up to size. A connection whose block
+        raised is closed rather than returned to the pool.
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No storage connection free after {timeout}s (pool size {self.size})")
+        
+        try:
+            db = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                db = self.factory()
+            except Exception:
+                self._slots.release()
+                raise
+        
+        try:
+            yield db
+        except Exception:
+            try:
+                db.close()
+            except Exception:
+                pass
+            raise
+        else:
+            self._idle.put(db)
+        finally:
+            self._slots.release()
+    
+    def close(self):
+        """Close all idle connections"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
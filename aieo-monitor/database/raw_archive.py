@@ -0,0 +1,295 @@
+"""
+Raw payload archive for AI Citation Monitor
+Keeps every provider's raw response (Anthropic web_search_tool_result
+blocks, OpenAI annotation offsets, ...) on local disk so history can be
+re-parsed with better extractors without re-paying for calls or storing
+bulky JSON in the database. Payloads are compressed (zstd, or zlib without
+the zstandard package) into append-only segment files and stored once per
+content hash; a SQLite index maps each response's response_key to its blob
+and each blob to (segment, offset, length). Reads memory-map the segment.
+Each process appends to segments of its own, so workers and shards on one
+host can share an archive directory.
+"""
+import os
+import json
+import mmap
+import sqlite3
+import hashlib
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # zlib is used instead
+    zstandard = None
+
+DEFAULT_ARCHIVE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'archive'
+)
+
+INDEX_FILE = 'index.db'
+SEGMENT_SUFFIX = '.seg'
+# A new segment is started once the current one reaches this size
+SEGMENT_MAX_BYTES = 256 * 1024 * 1024
+
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+# Segment files kept memory-mapped for reads
+MAX_OPEN_MAPS = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    codec TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS payloads (
+    response_key TEXT PRIMARY KEY,
+    digest TEXT NOT NULL REFERENCES blobs(digest),
+    run_id TEXT,
+    model_id TEXT,
+    query_id TEXT,
+    archived_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_payloads_run ON payloads (run_id, model_id);
+"""
+
+
+def payload_bytes(raw) -> bytes:
+    """
+    Canonical JSON of a raw provider response
+    
+    SDK responses (pydantic models) are dumped to plain JSON; keys are
+    sorted so identical payloads hash (and deduplicate) identically.
+    """
+    if hasattr(raw, 'model_dump'):
+        raw = raw.model_dump(mode='json')
+    return json.dumps(raw, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    """Inverse of RawArchive._compress"""
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Payload is zstd-compressed: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown archive codec: {codec}")
+
+
+class RawArchive:
+    """
+    Content-addressed, compressed archive of raw payloads (thread-safe)
+    
+    Blobs are appended to this process's current segment (created on the
+    first write, never shared with another process) and never rewritten.
+    The segment is flushed before its index row is committed, so the index
+    never points at data the operating system has not been given; a power
+    loss can still drop the last few payloads, which are a convenience
+    copy and not part of a run's results.
+    """
+    
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Args:
+            directory: Archive location (ARCHIVE_DIR or data/archive; created if missing)
+        """
+        self.directory = directory or os.getenv('ARCHIVE_DIR') or DEFAULT_ARCHIVE_DIR
+        self.codec = 'zstd' if zstandard is not None else 'zlib'
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._files: Dict[int, object] = {}
+        os.makedirs(self.directory, exist_ok=True)
+        
+        # Other processes sharing the archive may hold the index's write lock briefly
+        self._index = sqlite3.connect(
+            os.path.join(self.directory, INDEX_FILE), timeout=30, check_same_thread=False
+        )
+        self._index.row_factory = sqlite3.Row
+        self._index.execute("PRAGMA journal_mode=WAL")
+        self._index.execute("PRAGMA synchronous=NORMAL")
+        self._index.executescript(SCHEMA)
+        
+        self._segment = None
+        self._writer = None
+    
+    def _segment_path(self, segment: int) -> str:
+        """Path of a segment file by number"""
+        return os.path.join(self.directory, f"{segment:06d}{SEGMENT_SUFFIX}")
+    
+    def _last_segment(self) -> int:
+        """Number of the newest segment file (0 for an empty archive)"""
+        numbers = [
+            int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.directory)
+            if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit()
+        ]
+        return max(numbers, default=0)
+    
+    def _open_segment(self):
+        """
+        Start a new segment owned by this process (lock held)
+        
+        Offsets are only valid for bytes this process appended, so it never
+        writes to a segment another process may be writing to: the file is
+        created exclusively, under the next free number.
+        """
+        if self._writer is not None:
+            self._writer.flush()
+            os.fsync(self._writer.fileno())
+            self._writer.close()
+        segment = self._last_segment() + 1
+        while True:
+            try:
+                self._writer = open(self._segment_path(segment), 'xb')
+                break
+            except FileExistsError:
+                segment += 1
+        self._segment = segment
+    
+    def _compress(self, data: bytes) -> bytes:
+        """Compress with this archive's codec (compressors are per thread)"""
+        if self.codec == 'zlib':
+            return zlib.compress(data, ZLIB_LEVEL)
+        compressor = getattr(self._local, 'compressor', None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        return compressor.compress(data)
+    
+    def put(self, raw, response_key: str, run_id: Optional[str] = None,
+            model_id: Optional[str] = None, query_id: Optional[str] = None) -> str:
+        """
+        Archive a raw payload under a response's response_key
+        
+        Serializing and compressing run in the calling thread; only the
+        append and index update are serialized.
+        
+        Returns:
+            SHA-256 digest of the payload (a payload seen before is not written again)
+        """
+        data = payload_bytes(raw)
+        digest = hashlib.sha256(data).hexdigest()
+        compressed = self._compress(data)
+        
+        with self._lock:
+            known = self._index.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            # Another process may archive the same payload meanwhile; the first index row wins
+            if not known:
+                self._append_blob(digest, compressed, len(data))
+            self._index.execute(
+                "INSERT OR REPLACE INTO payloads (response_key, digest, run_id, model_id, query_id, archived_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (response_key, digest, run_id, model_id, query_id, datetime.now().isoformat(timespec='seconds'))
+            )
+            self._index.commit()
+        return digest
+    
+    def _append_blob(self, digest: str, compressed: bytes, size: int):
+        """Append a compressed blob to this process's segment and index it (lock held)"""
+        if self._writer is None:
+            self._open_segment()
+        offset = self._writer.tell()
+        if offset and offset + len(compressed) > SEGMENT_MAX_BYTES:
+            self._open_segment()
+            offset = 0
+        self._writer.write(compressed)
+        self._writer.flush()
+        self._index.execute(
+            "INSERT OR IGNORE INTO blobs (digest, segment, offset, length, size, codec) VALUES (?, ?, ?, ?, ?, ?)",
+            (digest, self._segment, offset, len(compressed), size, self.codec)
+        )
+    
+    def locate(self, response_key: str) -> Optional[Dict]:
+        """Blob location of a response: digest, segment, offset, length, size and codec"""
+        with self._lock:
+            row = self._index.execute("""
+                SELECT b.digest, b.segment, b.offset, b.length, b.size, b.codec
+                FROM payloads p JOIN blobs b ON b.digest = p.digest
+                WHERE p.response_key = ?
+            """, (response_key,)).fetchone()
+        return dict(row) if row else None
+    
+    def _slice(self, segment: int, offset: int, length: int) -> bytes:
+        """Bytes of a segment, read through its (cached) read-only map"""
+        end = offset + length
+        with self._lock:
+            mapped = self._maps.get(segment)
+            if mapped is None or len(mapped) < end:
+                # The current segment grows; map it again past its new end
+                if mapped is not None:
+                    mapped.close()
+                    self._files.pop(segment).close()
+                elif len(self._maps) >= MAX_OPEN_MAPS:
+                    oldest = next(iter(self._maps))
+                    self._maps.pop(oldest).close()
+                    self._files.pop(oldest).close()
+                f = open(self._segment_path(segment), 'rb')
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[segment] = mapped
+                self._files[segment] = f
+            return mapped[offset:end]
+    
+    def read(self, location: Dict) -> Dict:
+        """Decompressed payload at a locate() location"""
+        data = self._slice(location['segment'], location['offset'], location['length'])
+        return json.loads(_decompress(data, location['codec']))
+    
+    def get(self, response_key: str) -> Optional[Dict]:
+        """Raw payload archived for a response_key, or None"""
+        location = self.locate(response_key)
+        return self.read(location) if location else None
+    
+    def get_response(self, db, response_id: int) -> Optional[Dict]:
+        """Raw payload of a stored response by its responses.id, or None"""
+        rows = db.fetch_all("SELECT response_key FROM responses WHERE id = %s", (response_id,))
+        if not rows or not rows[0]['response_key']:
+            return None
+        return self.get(rows[0]['response_key'])
+    
+    def iter_run(self, run_id: str) -> Iterator[Dict]:
+        """(response_key, model_id, query_id, payload) dicts of one run, in segment order"""
+        with self._lock:
+            rows = self._index.execute("""
+                SELECT p.response_key, p.model_id, p.query_id, b.segment, b.offset, b.length, b.codec
+                FROM payloads p JOIN blobs b ON b.digest = p.digest
+                WHERE p.run_id = ?
+                ORDER BY b.segment, b.offset
+            """, (run_id,)).fetchall()
+        for row in rows:
+            yield {
+                'response_key': row['response_key'],
+                'model_id': row['model_id'],
+                'query_id': row['query_id'],
+                'payload': self.read(dict(row))
+            }
+    
+    def stats(self) -> Dict:
+        """Payload and blob counts, raw and compressed bytes"""
+        with self._lock:
+            row = self._index.execute("""
+                SELECT (SELECT COUNT(*) FROM payloads) AS payloads,
+                       COUNT(*) AS blobs,
+                       COALESCE(SUM(size), 0) AS raw_bytes,
+                       COALESCE(SUM(length), 0) AS stored_bytes
+                FROM blobs
+            """).fetchone()
+        return dict(row)
+    
+    def close(self):
+        """Sync the current segment and release maps and the index"""
+        with self._lock:
+            if self._writer is not None and not self._writer.closed:
+                self._writer.flush()
+                os.fsync(self._writer.fileno())
+                self._writer.close()
+            for segment in list(self._maps):
+                self._maps.pop(segment).close()
+                self._files.pop(segment).close()
+            self._index.close()
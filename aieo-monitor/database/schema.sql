@@ -38,6 +38,7 @@ CREATE TABLE IF NOT EXISTS responses (
     timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     query_id VARCHAR(50) NOT NULL,
     model_id VARCHAR(50) NOT NULL,
+    replicate_index INT NOT NULL DEFAULT 0,
     query_text TEXT NOT NULL,
     response TEXT NOT NULL,
     paintballevents_referenced BOOLEAN NOT NULL DEFAULT FALSE,
@@ -45,16 +46,106 @@ CREATE TABLE IF NOT EXISTS responses (
     cited_urls JSON,
     response_time_ms INT,
     error TEXT,
+    response_key CHAR(32) NULL,
+    simhash BIGINT NULL,
+    simhash_band0 SMALLINT UNSIGNED NULL,
+    simhash_band1 SMALLINT UNSIGNED NULL,
+    simhash_band2 SMALLINT UNSIGNED NULL,
+    simhash_band3 SMALLINT UNSIGNED NULL,
     INDEX idx_run_id (run_id),
     INDEX idx_query_id (query_id),
     INDEX idx_model_id (model_id),
     INDEX idx_timestamp (timestamp),
     INDEX idx_paintballevents (paintballevents_referenced),
+    INDEX idx_run_pair (run_id, model_id, query_id, replicate_index),
+    INDEX idx_simhash_band0 (simhash_band0),
+    INDEX idx_simhash_band1 (simhash_band1),
+    INDEX idx_simhash_band2 (simhash_band2),
+    INDEX idx_simhash_band3 (simhash_band3),
+    UNIQUE INDEX idx_response_key (response_key),
+    FULLTEXT INDEX ft_response (response),
     FOREIGN KEY (run_id) REFERENCES runs(run_id) ON DELETE CASCADE,
     FOREIGN KEY (query_id) REFERENCES queries(id) ON DELETE CASCADE,
     FOREIGN KEY (model_id) REFERENCES models(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Jobs table: Distributed work queue, one row per (run, query, model) pair
+-- Workers claim rows with SELECT ... FOR UPDATE SKIP LOCKED (MySQL 8.0+)
+CREATE TABLE IF NOT EXISTS jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    run_id VARCHAR(50) NOT NULL,
+    query_id VARCHAR(50) NOT NULL,
+    model_id VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    worker_id VARCHAR(100),
+    attempts INT NOT NULL DEFAULT 0,
+    heartbeat_at TIMESTAMP NULL,
+    lease_expires_at TIMESTAMP NULL,
+    completed_at TIMESTAMP NULL,
+    last_error TEXT,
+    UNIQUE KEY uq_job_pair (run_id, query_id, model_id),
+    INDEX idx_claim (run_id, status, lease_expires_at),
+    FOREIGN KEY (run_id) REFERENCES runs(run_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Monitor state: Small key-value store (e.g. config fingerprint of the last sync)
+CREATE TABLE IF NOT EXISTS monitor_state (
+    state_key VARCHAR(100) PRIMARY KEY,
+    state_value TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Tenants: Sites sharing this monitor, each tracking its own domains
+CREATE TABLE IF NOT EXISTS tenants (
+    id VARCHAR(50) PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    domains JSON NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Tenant queries: Which queries each tenant tracks
+CREATE TABLE IF NOT EXISTS tenant_queries (
+    tenant_id VARCHAR(50) NOT NULL,
+    query_id VARCHAR(50) NOT NULL,
+    PRIMARY KEY (tenant_id, query_id),
+    FOREIGN KEY (tenant_id) REFERENCES tenants(id) ON DELETE CASCADE,
+    FOREIGN KEY (query_id) REFERENCES queries(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Tenant citations: One shared response evaluated against each tenant's domains
+CREATE TABLE IF NOT EXISTS tenant_citations (
+    response_id INT NOT NULL,
+    tenant_id VARCHAR(50) NOT NULL,
+    referenced BOOLEAN NOT NULL,
+    PRIMARY KEY (response_id, tenant_id),
+    INDEX idx_tenant_referenced (tenant_id, referenced),
+    FOREIGN KEY (response_id) REFERENCES responses(id) ON DELETE CASCADE,
+    FOREIGN KEY (tenant_id) REFERENCES tenants(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Response domains: Registrable domain of each cited URL (indexed for run-to-run diffs)
+CREATE TABLE IF NOT EXISTS response_domains (
+    response_id INT NOT NULL,
+    run_id VARCHAR(50) NOT NULL,
+    domain VARCHAR(255) NOT NULL,
+    PRIMARY KEY (response_id, domain),
+    INDEX idx_run_domain (run_id, domain),
+    FOREIGN KEY (response_id) REFERENCES responses(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Alert state: Running citation-rate baseline and CUSUM per (model, query); query_id '*' is model-wide
+CREATE TABLE IF NOT EXISTS alert_state (
+    model_id VARCHAR(50) NOT NULL,
+    query_id VARCHAR(50) NOT NULL,
+    observations INT NOT NULL DEFAULT 0,
+    ewma_rate DOUBLE NOT NULL DEFAULT 0,
+    cusum_low DOUBLE NOT NULL DEFAULT 0,
+    cusum_high DOUBLE NOT NULL DEFAULT 0,
+    last_run_id VARCHAR(50),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (model_id, query_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Insert default models
 INSERT INTO models (id, name, provider, active) VALUES
 ('gpt-5', 'GPT-5', 'OpenAI', TRUE),
@@ -101,6 +192,21 @@ LEFT JOIN responses r ON q.id = r.query_id
 WHERE q.active = TRUE
 GROUP BY q.id, q.query_text, q.category;
 
+-- View for easy querying: Citation rate per tenant and model
+CREATE OR REPLACE VIEW tenant_performance AS
+SELECT 
+    t.id as tenant_id,
+    t.name as tenant_name,
+    r.model_id,
+    COUNT(tc.response_id) as total_queries,
+    SUM(tc.referenced) as times_cited,
+    ROUND(SUM(tc.referenced) / COUNT(tc.response_id) * 100, 1) as citation_rate,
+    MAX(r.timestamp) as last_tested
+FROM tenants t
+JOIN tenant_citations tc ON tc.tenant_id = t.id
+JOIN responses r ON r.id = tc.response_id
+GROUP BY t.id, t.name, r.model_id;
+
 -- View for dashboard: Recent citations
 CREATE OR REPLACE VIEW recent_citations AS
 SELECT 
@@ -0,0 +1,221 @@
+-- AI Citation Monitor - SQLite Schema
+-- Embedded equivalent of schema.sql for local runs, CI and load tests
+-- Applied automatically by database/sqlite_storage.py
+
+-- Queries table: Store all test queries
+CREATE TABLE IF NOT EXISTS queries (
+    id TEXT PRIMARY KEY,
+    query_text TEXT NOT NULL,
+    category TEXT,
+    priority INTEGER DEFAULT 1,
+    active INTEGER DEFAULT 1,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Models table: Track which AI models we're testing
+CREATE TABLE IF NOT EXISTS models (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    active INTEGER DEFAULT 1,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Runs table: Track each execution of the monitor
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    completed_at TEXT,
+    status TEXT NOT NULL,
+    queries_executed INTEGER DEFAULT 0,
+    errors_count INTEGER DEFAULT 0,
+    notes TEXT
+);
+
+-- Responses table: Store all query results
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    timestamp TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    query_id TEXT NOT NULL REFERENCES queries(id) ON DELETE CASCADE,
+    model_id TEXT NOT NULL REFERENCES models(id) ON DELETE CASCADE,
+    replicate_index INTEGER NOT NULL DEFAULT 0,
+    query_text TEXT NOT NULL,
+    response TEXT NOT NULL,
+    paintballevents_referenced INTEGER NOT NULL DEFAULT 0,
+    search_query TEXT,
+    cited_urls TEXT,
+    response_time_ms INTEGER,
+    error TEXT,
+    response_key TEXT,
+    simhash INTEGER,
+    simhash_band0 INTEGER,
+    simhash_band1 INTEGER,
+    simhash_band2 INTEGER,
+    simhash_band3 INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_run_id ON responses (run_id);
+CREATE INDEX IF NOT EXISTS idx_query_id ON responses (query_id);
+CREATE INDEX IF NOT EXISTS idx_model_id ON responses (model_id);
+CREATE INDEX IF NOT EXISTS idx_timestamp ON responses (timestamp);
+CREATE INDEX IF NOT EXISTS idx_paintballevents ON responses (paintballevents_referenced);
+CREATE INDEX IF NOT EXISTS idx_run_pair ON responses (run_id, model_id, query_id, replicate_index);
+CREATE INDEX IF NOT EXISTS idx_simhash_band0 ON responses (simhash_band0);
+CREATE INDEX IF NOT EXISTS idx_simhash_band1 ON responses (simhash_band1);
+CREATE INDEX IF NOT EXISTS idx_simhash_band2 ON responses (simhash_band2);
+CREATE INDEX IF NOT EXISTS idx_simhash_band3 ON responses (simhash_band3);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_response_key ON responses (response_key);
+
+-- Full-text index over response text (FTS5, kept in sync by triggers)
+CREATE VIRTUAL TABLE IF NOT EXISTS responses_fts USING fts5(
+    response,
+    content = 'responses',
+    content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS responses_fts_insert AFTER INSERT ON responses BEGIN
+    INSERT INTO responses_fts (rowid, response) VALUES (new.id, new.response);
+END;
+
+CREATE TRIGGER IF NOT EXISTS responses_fts_delete AFTER DELETE ON responses BEGIN
+    INSERT INTO responses_fts (responses_fts, rowid, response) VALUES ('delete', old.id, old.response);
+END;
+
+CREATE TRIGGER IF NOT EXISTS responses_fts_update AFTER UPDATE OF response ON responses BEGIN
+    INSERT INTO responses_fts (responses_fts, rowid, response) VALUES ('delete', old.id, old.response);
+    INSERT INTO responses_fts (rowid, response) VALUES (new.id, new.response);
+END;
+
+-- Monitor state: Small key-value store (e.g. config fingerprint of the last sync)
+CREATE TABLE IF NOT EXISTS monitor_state (
+    state_key TEXT PRIMARY KEY,
+    state_value TEXT,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Tenants: Sites sharing this monitor, each tracking its own domains
+CREATE TABLE IF NOT EXISTS tenants (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    domains TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Tenant queries: Which queries each tenant tracks
+CREATE TABLE IF NOT EXISTS tenant_queries (
+    tenant_id TEXT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    query_id TEXT NOT NULL REFERENCES queries(id) ON DELETE CASCADE,
+    PRIMARY KEY (tenant_id, query_id)
+);
+
+-- Tenant citations: One shared response evaluated against each tenant's domains
+CREATE TABLE IF NOT EXISTS tenant_citations (
+    response_id INTEGER NOT NULL REFERENCES responses(id) ON DELETE CASCADE,
+    tenant_id TEXT NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    referenced INTEGER NOT NULL,
+    PRIMARY KEY (response_id, tenant_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tenant_referenced ON tenant_citations (tenant_id, referenced);
+
+-- Response domains: Registrable domain of each cited URL (indexed for run-to-run diffs)
+CREATE TABLE IF NOT EXISTS response_domains (
+    response_id INTEGER NOT NULL REFERENCES responses(id) ON DELETE CASCADE,
+    run_id TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    PRIMARY KEY (response_id, domain)
+);
+
+CREATE INDEX IF NOT EXISTS idx_run_domain ON response_domains (run_id, domain);
+
+-- Alert state: Running citation-rate baseline and CUSUM per (model, query); query_id '*' is model-wide
+CREATE TABLE IF NOT EXISTS alert_state (
+    model_id TEXT NOT NULL,
+    query_id TEXT NOT NULL,
+    observations INTEGER NOT NULL DEFAULT 0,
+    ewma_rate REAL NOT NULL DEFAULT 0,
+    cusum_low REAL NOT NULL DEFAULT 0,
+    cusum_high REAL NOT NULL DEFAULT 0,
+    last_run_id TEXT,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (model_id, query_id)
+);
+
+-- Insert default models
+INSERT OR IGNORE INTO models (id, name, provider, active) VALUES
+('gpt-5', 'GPT-5', 'OpenAI', 1),
+('gpt-5-mini', 'GPT-5-mini', 'OpenAI', 1),
+('gpt-5-nano', 'GPT-5-nano', 'OpenAI', 1),
+('claude-3-7-sonnet', 'Claude 3.7 Sonnet', 'Anthropic', 1),
+('claude-sonnet-4-5', 'Claude Sonnet 4.5', 'Anthropic', 1),
+('claude-haiku-4-5', 'Claude Haiku 4.5', 'Anthropic', 1),
+('claude-opus-4-1', 'Claude Opus 4.1', 'Anthropic', 1),
+('deepseek-chat', 'DeepSeek Chat', 'DeepSeek', 0),
+('grok-2', 'Grok 2', 'xAI', 0),
+('sonar-pro', 'Sonar Pro', 'Perplexity', 0),
+('llama-3-70b', 'Llama 3 70B', 'Meta', 0);
+
+-- View for easy querying: Model performance summary
+CREATE VIEW IF NOT EXISTS model_performance AS
+SELECT
+    m.id as model_id,
+    m.name as model_name,
+    m.provider,
+    COUNT(r.id) as total_queries,
+    SUM(r.paintballevents_referenced) as times_cited,
+    ROUND(SUM(r.paintballevents_referenced) * 100.0 / COUNT(r.id), 1) as citation_rate,
+    AVG(r.response_time_ms) as avg_response_time_ms,
+    MAX(r.timestamp) as last_tested
+FROM models m
+LEFT JOIN responses r ON m.id = r.model_id
+WHERE m.active = 1
+GROUP BY m.id, m.name, m.provider;
+
+-- View for easy querying: Query performance summary
+CREATE VIEW IF NOT EXISTS query_performance AS
+SELECT
+    q.id as query_id,
+    q.query_text,
+    q.category,
+    COUNT(r.id) as times_tested,
+    SUM(r.paintballevents_referenced) as times_cited,
+    ROUND(SUM(r.paintballevents_referenced) * 100.0 / COUNT(r.id), 1) as citation_rate,
+    MAX(r.timestamp) as last_tested
+FROM queries q
+LEFT JOIN responses r ON q.id = r.query_id
+WHERE q.active = 1
+GROUP BY q.id, q.query_text, q.category;
+
+-- View for easy querying: Citation rate per tenant and model
+CREATE VIEW IF NOT EXISTS tenant_performance AS
+SELECT
+    t.id as tenant_id,
+    t.name as tenant_name,
+    r.model_id,
+    COUNT(tc.response_id) as total_queries,
+    SUM(tc.referenced) as times_cited,
+    ROUND(SUM(tc.referenced) * 100.0 / COUNT(tc.response_id), 1) as citation_rate,
+    MAX(r.timestamp) as last_tested
+FROM tenants t
+JOIN tenant_citations tc ON tc.tenant_id = t.id
+JOIN responses r ON r.id = tc.response_id
+GROUP BY t.id, t.name, r.model_id;
+
+-- View for dashboard: Recent citations
+CREATE VIEW IF NOT EXISTS recent_citations AS
+SELECT
+    r.id,
+    r.timestamp,
+    r.run_id,
+    m.name as model_name,
+    q.query_text,
+    r.cited_urls,
+    r.search_query
+FROM responses r
+JOIN models m ON r.model_id = m.id
+JOIN queries q ON r.query_id = q.id
+WHERE r.paintballevents_referenced = 1
+ORDER BY r.timestamp DESC
+LIMIT 50;
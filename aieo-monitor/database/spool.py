@@ -0,0 +1,364 @@
+"""
+Durable result spool for AI Citation Monitor
+Every result of a run is appended (and fsync'd) to a local JSONL segment
+before it goes near the database. A background flusher drains sealed
+segments into storage in batches, retrying with backoff while the database
+is unreachable, so provider calls never wait on (or are lost to) the
+database. Segments left behind by a crash or outage are flushed by the next
+run or by run_monitor.py --flush-spool.
+"""
+import os
+import json
+import time
+import uuid
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .base_storage import BaseStorage, print_stored, response_row
+
+DEFAULT_SPOOL_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'spool'
+)
+
+# Sealed segments are complete and ready to flush; open ones are still appended to.
+# A flusher claims a sealed segment by renaming it to <segment>.flushing-<pid>
+SEGMENT_SUFFIX = '.jsonl'
+OPEN_SUFFIX = '.jsonl.open'
+FLUSHING_SUFFIX = '.flushing-'
+
+# Responses per store_responses() transaction
+FLUSH_BATCH = 500
+# Seconds between flushes while the database is reachable
+FLUSH_INTERVAL_SECONDS = 2.0
+# Retry delay doubles after each failed flush up to this
+MAX_RETRY_SECONDS = 300.0
+# How long a run waits for its results to reach the database before giving up
+DRAIN_TIMEOUT_SECONDS = 120.0
+
+
+def _process_alive(pid: int) -> bool:
+    """Whether a process with this id exists"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _segment_pids(name: str) -> Optional[Tuple[int, Optional[int]]]:
+    """(writer pid, claiming flusher's pid or None) of a segment file name, or None"""
+    base, _, claimer = name.partition(FLUSHING_SUFFIX)
+    try:
+        writer = int(base.split('.', 1)[0].rsplit('-', 1)[1])
+        return writer, int(claimer) if claimer else None
+    except (IndexError, ValueError):
+        return None
+
+
+def _fsync_directory(directory: str):
+    """Make a new file's directory entry durable"""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ResponseSpool:
+    """
+    Append-only, fsync'd JSONL spool of results waiting for the database
+    
+    Offers the write half of the storage interface (store_response and
+    store_error), so the orchestrator can write to it instead of the
+    database. Appends go to one open segment per process; seal() closes it
+    so the flusher can pick it up. Several processes on a host can share
+    a spool directory: each flushes only its own segments and those left
+    by processes that are gone, claiming a segment before flushing it.
+    """
+    
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Args:
+            directory: Where segments live (SPOOL_DIR or data/spool; created if missing)
+        """
+        self.directory = directory or os.getenv('SPOOL_DIR') or DEFAULT_SPOOL_DIR
+        self._lock = threading.Lock()
+        self._file = None
+        self._path = None
+        os.makedirs(self.directory, exist_ok=True)
+        self._recover()
+    
+    def _recover(self):
+        """Seal segments left open by processes that are gone (crashed runs)"""
+        for name in os.listdir(self.directory):
+            if not name.endswith(OPEN_SUFFIX):
+                continue
+            try:
+                pid = int(name[:-len(OPEN_SUFFIX)].rsplit('-', 1)[1])
+            except (IndexError, ValueError):
+                continue
+            # Our own pid can only be a leftover here (e.g. a restarted container)
+            if pid != os.getpid() and _process_alive(pid):
+                continue
+            path = os.path.join(self.directory, name)
+            os.replace(path, path[:-len(OPEN_SUFFIX)] + SEGMENT_SUFFIX)
+    
+    def append(self, record: Dict):
+        """Write one record and fsync it before returning"""
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._path = os.path.join(self.directory, f"{time.time_ns():020d}-{os.getpid()}{OPEN_SUFFIX}")
+                self._file = open(self._path, 'a', encoding='utf-8')
+                _fsync_directory(self.directory)
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+    
+    def seal(self):
+        """Close the open segment (if any) so it can be flushed"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            os.replace(self._path, self._path[:-len(OPEN_SUFFIX)] + SEGMENT_SUFFIX)
+            self._file = None
+            self._path = None
+    
+    def segments(self) -> List[str]:
+        """
+        Segment paths this process flushes, oldest first
+        
+        Sealed segments it wrote or whose writer is gone, its own claimed
+        segments (a flush that failed part way) and segments claimed by a
+        flusher that is gone. Live processes' segments are left to them.
+        """
+        pid = os.getpid()
+        paths = []
+        for name in os.listdir(self.directory):
+            pids = _segment_pids(name)
+            if pids is None:
+                continue
+            writer, claimer = pids
+            if claimer is None:
+                if not name.endswith(SEGMENT_SUFFIX) or (writer != pid and _process_alive(writer)):
+                    continue
+            elif claimer != pid and _process_alive(claimer):
+                continue
+            paths.append(os.path.join(self.directory, name))
+        return sorted(paths, key=os.path.basename)
+    
+    def claim(self, path: str) -> Optional[str]:
+        """
+        Take a segment from segments() for flushing
+        
+        Returns:
+            The segment's claimed path, or None if another flusher took it first
+        """
+        base = os.path.basename(path).partition(FLUSHING_SUFFIX)[0]
+        claimed = os.path.join(self.directory, f"{base}{FLUSHING_SUFFIX}{os.getpid()}")
+        if path == claimed:
+            return claimed
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return None
+        return claimed
+    
+    def pending(self) -> int:
+        """Records this process has not flushed yet (its open segment and segments())"""
+        paths = self.segments()
+        with self._lock:
+            if self._path is not None:
+                paths.append(self._path)
+        count = 0
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    count += sum(1 for _ in f)
+            except FileNotFoundError:  # flushed meanwhile
+                continue
+        return count
+    
+    @staticmethod
+    def read_segment(path: str) -> List[Dict]:
+        """Records of a segment; a line torn by a crash mid-write is skipped"""
+        records = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    print(f"⚠️  Skipping unreadable spool line {os.path.basename(path)}:{number}")
+        return records
+    
+    def store_response(self, **fields):
+        """Spool a response (store_response() arguments) and print its citation status"""
+        row = response_row(**fields)
+        if not row['response_text'] or not row['response_text'].strip():
+            print(f"  ⚠️  Skipping empty response | {row['model_id']} | {row['query_id']}")
+            return
+        
+        # Lets the database recognize a response flushed twice
+        row['response_key'] = row['response_key'] or uuid.uuid4().hex
+        self.append(dict(row, kind='response'))
+        print_stored(row)
+    
+    def store_error(self, run_id: str, query_id: str, model_id: str, query_text: str, error: str):
+        """Spool an error for the run's error count"""
+        self.append({
+            'kind': 'error',
+            'run_id': run_id,
+            'query_id': query_id,
+            'model_id': model_id,
+            'query_text': query_text,
+            'error': error
+        })
+        print(f"  ✗ Error | {model_id} | {query_id}: {error}")
+    
+    def close(self):
+        """Seal the open segment"""
+        self.seal()
+
+
+def flush_spool(spool: ResponseSpool, db: BaseStorage, batch_size: int = FLUSH_BATCH) -> Dict:
+    """
+    Store every segment this process flushes (sealing its open one first) and delete it
+    
+    Each segment is claimed first, so two flushers never store the same
+    one. A segment is deleted only after all of its records are committed.
+    If a flush fails part way, the segment is flushed again later and
+    responses already stored are skipped by response_key. Errors only
+    feed the run's error count and are applied last; a failure while
+    applying them can count some of them twice.
+    
+    Returns:
+        Dict with segments, responses, errors and runs ({run_id: records})
+    """
+    spool.seal()
+    stats = {'segments': 0, 'responses': 0, 'errors': 0, 'runs': Counter()}
+    for path in spool.segments():
+        path = spool.claim(path)
+        if path is None:
+            continue
+        records = spool.read_segment(path)
+        responses = [record for record in records if record.get('kind') == 'response']
+        errors = [record for record in records if record.get('kind') == 'error']
+        
+        for start in range(0, len(responses), batch_size):
+            stats['responses'] += db.store_responses(responses[start:start + batch_size])
+        for record in errors:
+            db.store_error(
+                record['run_id'], record['query_id'], record['model_id'], record['query_text'], record['error']
+            )
+        
+        os.remove(path)
+        stats['segments'] += 1
+        stats['errors'] += len(errors)
+        stats['runs'].update(record['run_id'] for record in records)
+    return stats
+
+
+class SpoolFlusher:
+    """Background thread draining a ResponseSpool into storage, retrying with backoff"""
+    
+    def __init__(
+        self,
+        spool: ResponseSpool,
+        storage_factory: Callable[[], BaseStorage],
+        batch_size: int = FLUSH_BATCH,
+        interval: float = FLUSH_INTERVAL_SECONDS
+    ):
+        """
+        Args:
+            spool: Spool to drain
+            storage_factory: Opens the flusher's own storage connection (connections are not thread-safe)
+            batch_size: Responses per transaction
+            interval: Seconds between flushes while the database is reachable
+        """
+        self.spool = spool
+        self.storage_factory = storage_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self._db = None
+        self._delay = interval
+        self._requested = 0
+        self._answered = 0
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='spool-flusher', daemon=True)
+    
+    def start(self):
+        """Start flushing in the background"""
+        self._thread.start()
+    
+    def flush_now(self, timeout: float = DRAIN_TIMEOUT_SECONDS) -> int:
+        """
+        Flush everything spooled so far and wait for the attempt
+        
+        Returns:
+            Records still spooled (0 once everything reached the database)
+        """
+        with self._cond:
+            self._requested += 1
+            target = self._requested
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: self._answered >= target, timeout)
+        return self.spool.pending()
+    
+    def stop(self, timeout: float = DRAIN_TIMEOUT_SECONDS) -> int:
+        """
+        Make a last flush attempt and stop the thread
+        
+        Returns:
+            Records left in the spool for the next run or --flush-spool
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        self.spool.close()
+        return self.spool.pending()
+    
+    def _run(self):
+        """Flush on every interval or request; back off while flushes fail"""
+        while True:
+            with self._cond:
+                if not self._stopping and self._requested == self._answered:
+                    self._cond.wait(self._delay)
+                request, stopping = self._requested, self._stopping
+            
+            self._flush_once()
+            
+            with self._cond:
+                self._answered = request
+                self._cond.notify_all()
+            if stopping:
+                break
+        
+        if self._db is not None:
+            self._db.close()
+    
+    def _flush_once(self) -> bool:
+        """One flush attempt; on failure the connection is dropped and the delay grows"""
+        try:
+            if self._db is None:
+                self._db = self.storage_factory()
+            flush_spool(self.spool, self._db, self.batch_size)
+            self._delay = self.interval
+            return True
+        except Exception as e:
+            self._delay = min(self._delay * 2, MAX_RETRY_SECONDS)
+            print(f"⚠️  Spool flush failed, results stay in {self.spool.directory} "
+                  f"(retrying in {self._delay:.0f}s): {str(e)[:100]}")
+            if self._db is not None:
+                try:
+                    self._db.close()
+                except Exception:
+                    pass
+                self._db = None
+            return False
@@ -0,0 +1,521 @@
+"""
+SQLite storage backend for AI Citation Monitor
+Embedded, WAL-mode database with the same schema and views as MySQL, for
+local runs, CI, load tests and offline field runs
+"""
+import os
+import json
+import sqlite3
+from collections import Counter
+from datetime import datetime
+from typing import Iterator, List, Dict, Optional, Tuple
+from .base_storage import BaseStorage, CONFIG_FINGERPRINT_KEY, cited_domains
+from utils.simhash import fingerprint_columns
+from utils.search import HIGHLIGHT_END, HIGHLIGHT_START, fts5_query, search_terms
+from utils.tenants import DEFAULT_TENANTS
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema_sqlite.sql')
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'monitor.db')
+
+
+def _dict_factory(cursor, row):
+    """Return rows as dictionaries (like PyMySQL's DictCursor)"""
+    return {column[0]: row[index] for index, column in enumerate(cursor.description)}
+
+
+def _now() -> str:
+    """Timestamp in the format SQLite's date functions use"""
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class SQLiteStorage(BaseStorage):
+    """Manages SQLite database operations for the monitor"""
+    
+    backend = 'sqlite'
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Open (and create if needed) the SQLite database
+        
+        Args:
+            path: Database file, ':memory:' for a throwaway database;
+                defaults to SQLITE_PATH or data/monitor.db
+        """
+        self.path = path or os.getenv('SQLITE_PATH') or DEFAULT_PATH
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connect()
+        self._ensure_schema()
+    
+    def _connect(self):
+        """Open the database in WAL mode"""
+        # One instance may be handed between threads (e.g. the read API's
+        # pool), but is never used by two threads at once
+        self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.connection.row_factory = _dict_factory
+        # WAL lets readers (dashboards, reports) run while a monitor run writes;
+        # NORMAL sync is durable across application crashes in WAL mode
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute("PRAGMA foreign_keys = ON")
+    
+    def _ensure_schema(self):
+        """Create tables, indexes and views if they don't exist"""
+        # Databases created before response fingerprints get the columns
+        # first, so the schema's indexes on them can be created
+        columns = {row['name'] for row in self.connection.execute("PRAGMA table_info(responses)")}
+        if columns and 'simhash' not in columns:
+            for column in ('simhash', 'simhash_band0', 'simhash_band1', 'simhash_band2', 'simhash_band3'):
+                self.connection.execute(f"ALTER TABLE responses ADD COLUMN {column} INTEGER")
+        if columns and 'response_key' not in columns:
+            self.connection.execute("ALTER TABLE responses ADD COLUMN response_key TEXT")
+        has_fts = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'responses_fts'"
+        ).fetchone()
+        has_tenants = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'tenants'"
+        ).fetchone()
+        has_domains = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'response_domains'"
+        ).fetchone()
+        
+        with open(SCHEMA_PATH, 'r') as f:
+            self.connection.executescript(f.read())
+        
+        # Index responses stored before the full-text index existed
+        if columns and not has_fts:
+            self.connection.execute("INSERT INTO responses_fts (responses_fts) VALUES ('rebuild')")
+        # Responses stored before tenants existed belong to the original site
+        if columns and not has_tenants:
+            self._attribute_to_default_tenant()
+        # Index the cited domains of responses stored before response_domains existed
+        if columns and not has_domains:
+            self._replace_domains([
+                (row['id'], row['run_id'], json.loads(row['cited_urls'] or '[]'))
+                for row in self.connection.execute("SELECT id, run_id, cited_urls FROM responses")
+            ])
+        self.connection.commit()
+    
+    def _attribute_to_default_tenant(self):
+        """Record existing responses as tenant_citations of the default tenant (no commit)"""
+        tenant = DEFAULT_TENANTS[0]
+        self.connection.execute(
+            "INSERT OR IGNORE INTO tenants (id, name, domains) VALUES (?, ?, ?)",
+            (tenant['id'], tenant['name'], json.dumps(tenant['domains']))
+        )
+        self.connection.execute(
+            "INSERT OR IGNORE INTO tenant_queries (tenant_id, query_id) SELECT ?, id FROM queries",
+            (tenant['id'],)
+        )
+        self.connection.execute("""
+            INSERT OR IGNORE INTO tenant_citations (response_id, tenant_id, referenced)
+            SELECT id, ?, paintballevents_referenced FROM responses
+        """, (tenant['id'],))
+    
+    def start_run(self, run_id: str):
+        """Start a new monitoring run"""
+        self.connection.execute("""
+            INSERT INTO runs (run_id, started_at, status, queries_executed, errors_count)
+            VALUES (?, ?, ?, ?, ?)
+        """, (run_id, _now(), 'running', 0, 0))
+        self.connection.commit()
+        print(f"✓ Started run: {run_id}")
+    
+    def ensure_run(self, run_id: str):
+        """Create a run if it does not exist yet (shared by concurrent shards)"""
+        cursor = self.connection.execute("""
+            INSERT OR IGNORE INTO runs (run_id, started_at, status, queries_executed, errors_count)
+            VALUES (?, ?, ?, ?, ?)
+        """, (run_id, _now(), 'running', 0, 0))
+        self.connection.commit()
+        if cursor.rowcount:
+            print(f"✓ Started run: {run_id}")
+    
+    def finalize_run(self, run_id: str, notes: Optional[str] = None):
+        """Recount stored responses for a run and mark it completed"""
+        cursor = self.connection.execute("""
+            UPDATE runs
+            SET queries_executed = (
+                    SELECT COUNT(*) FROM responses WHERE run_id = ?
+                ),
+                completed_at = ?,
+                status = ?,
+                notes = COALESCE(?, notes)
+            WHERE run_id = ?
+        """, (run_id, _now(), 'completed', notes, run_id))
+        self.connection.commit()
+        
+        if not cursor.rowcount:
+            raise ValueError(f"Run not found: {run_id}")
+        print(f"✓ Finalized run: {run_id}")
+    
+    def complete_run(self, run_id: str, notes: Optional[str] = None):
+        """Mark a run as completed"""
+        self.connection.execute("""
+            UPDATE runs
+            SET completed_at = ?, status = ?, notes = ?
+            WHERE run_id = ?
+        """, (_now(), 'completed', notes, run_id))
+        self.connection.commit()
+        print(f"✓ Completed run: {run_id}")
+    
+    def fail_run(self, run_id: str, error: str):
+        """Mark a run as failed"""
+        self.connection.rollback()
+        self.connection.execute("""
+            UPDATE runs
+            SET completed_at = ?, status = ?, notes = ?
+            WHERE run_id = ?
+        """, (_now(), 'failed', error, run_id))
+        self.connection.commit()
+        print(f"✗ Failed run: {run_id}")
+    
+    def _load_config(self) -> Tuple[List[Dict], List[Dict]]:
+        """All rows of the queries and models tables, as (queries, models)"""
+        queries = self.connection.execute(
+            "SELECT id, query_text, category, priority, active FROM queries"
+        ).fetchall()
+        models = self.connection.execute("SELECT id, name, provider FROM models").fetchall()
+        return queries, models
+    
+    def _apply_config(self, query_rows: List[Tuple], model_rows: List[Tuple], fingerprint: Optional[str],
+                      tenant_rows: List[Tuple] = (), memberships: List[Tuple] = ()):
+        """Upsert changed query, model and tenant rows and store the fingerprint in one transaction"""
+        with self.connection:
+            self.connection.executemany("""
+                INSERT INTO queries (id, query_text, category, priority, active)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    query_text = excluded.query_text,
+                    category = excluded.category,
+                    priority = excluded.priority,
+                    active = excluded.active
+            """, query_rows)
+            self.connection.executemany("""
+                INSERT INTO models (id, name, provider, active)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    name = excluded.name,
+                    provider = excluded.provider
+            """, [row + (True,) for row in model_rows])
+            self.connection.executemany("""
+                INSERT INTO tenants (id, name, domains)
+                VALUES (?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    name = excluded.name,
+                    domains = excluded.domains
+            """, tenant_rows)
+            self.connection.executemany(
+                "DELETE FROM tenant_queries WHERE tenant_id = ?",
+                [(row[0],) for row in tenant_rows]
+            )
+            self.connection.executemany(
+                "INSERT INTO tenant_queries (tenant_id, query_id) VALUES (?, ?)", memberships
+            )
+            if fingerprint is not None:
+                self._write_state(CONFIG_FINGERPRINT_KEY, fingerprint)
+    
+    def get_state(self, key: str) -> Optional[str]:
+        """Read a value from the monitor_state key-value table (None if unset)"""
+        row = self.connection.execute(
+            "SELECT state_value FROM monitor_state WHERE state_key = ?", (key,)
+        ).fetchone()
+        return row['state_value'] if row else None
+    
+    def set_state(self, key: str, value: str):
+        """Write a value to the monitor_state key-value table"""
+        with self.connection:
+            self._write_state(key, value)
+    
+    def _write_state(self, key: str, value: str):
+        """Upsert a state value without committing"""
+        self.connection.execute("""
+            INSERT INTO monitor_state (state_key, state_value, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT (state_key) DO UPDATE SET
+                state_value = excluded.state_value,
+                updated_at = excluded.updated_at
+        """, (key, value, _now()))
+    
+    def store_responses(self, rows: List[Dict]) -> int:
+        """Store many responses with executemany() and one commit"""
+        rows = self._unstored(self._non_empty(rows))
+        if not rows:
+            return 0
+        
+        timestamp = _now()
+        sql = """
+            INSERT INTO responses
+            (run_id, timestamp, query_id, model_id, replicate_index, query_text,
+             response, paintballevents_referenced, search_query, cited_urls,
+             response_time_ms, error, response_key,
+             simhash, simhash_band0, simhash_band1, simhash_band2, simhash_band3)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        
+        def values(row):
+            return (
+                row['run_id'],
+                timestamp,
+                row['query_id'],
+                row['model_id'],
+                row.get('replicate_index', 0),
+                row['query_text'],
+                row['response_text'],
+                bool(row['paintballevents_ref']),
+                row.get('search_query'),
+                json.dumps(row.get('cited_urls') or []),
+                row.get('response_time_ms'),
+                row.get('error'),
+                row.get('response_key'),
+                *fingerprint_columns(row['response_text'])
+            )
+        
+        def linked(row):
+            return row.get('tenant_refs') or row.get('cited_urls')
+        
+        with self.connection:
+            self.connection.executemany(sql, [values(row) for row in rows if not linked(row)])
+            
+            # Rows with tenant results or cited domains are inserted one by one for their ids
+            citations = []
+            domains = []
+            for row in rows:
+                if linked(row):
+                    response_id = self.connection.execute(sql, values(row)).lastrowid
+                    citations.extend(
+                        (response_id, tenant_id, bool(referenced))
+                        for tenant_id, referenced in (row.get('tenant_refs') or {}).items()
+                    )
+                    domains.extend(
+                        (response_id, row['run_id'], domain) for domain in cited_domains(row.get('cited_urls'))
+                    )
+            self.connection.executemany("""
+                INSERT INTO tenant_citations (response_id, tenant_id, referenced)
+                VALUES (?, ?, ?)
+            """, citations)
+            self.connection.executemany(
+                "INSERT INTO response_domains (response_id, run_id, domain) VALUES (?, ?, ?)", domains
+            )
+            
+            # Update run statistics
+            self.connection.executemany("""
+                UPDATE runs
+                SET queries_executed = queries_executed + ?
+                WHERE run_id = ?
+            """, [(count, run_id) for run_id, count in Counter(row['run_id'] for row in rows).items()])
+        
+        return len(rows)
+    
+    def store_error(self, run_id: str, query_id: str, model_id: str, query_text: str, error: str):
+        """Log an error that occurred during a query (only the run's error count is kept)"""
+        self.connection.execute("""
+            UPDATE runs
+            SET errors_count = errors_count + 1
+            WHERE run_id = ?
+        """, (run_id,))
+        self.connection.commit()
+        print(f"  ✗ Error | {model_id} | {query_id}: {error}")
+    
+    def get_last_run_times(self) -> Dict[Tuple[str, str], datetime]:
+        """Get the most recent response time for each (model_id, query_id) pair"""
+        rows = self.connection.execute("""
+            SELECT model_id, query_id, MAX(timestamp) AS last_run
+            FROM responses
+            GROUP BY model_id, query_id
+        """).fetchall()
+        
+        return {
+            (row['model_id'], row['query_id']): datetime.fromisoformat(row['last_run'])
+            for row in rows
+        }
+    
+    def get_pair_latencies(self, before_run_id: str, days: int = 90) -> Dict[Tuple[str, str], float]:
+        """Average response time per (model_id, query_id) from runs before before_run_id"""
+        rows = self.connection.execute("""
+            SELECT r.model_id, r.query_id, AVG(r.response_time_ms) AS avg_ms
+            FROM responses r
+            JOIN runs cur ON cur.run_id = ?
+            WHERE r.run_id <> cur.run_id
+              AND r.timestamp < cur.started_at
+              AND r.timestamp >= datetime(cur.started_at, ?)
+              AND r.response_time_ms IS NOT NULL
+            GROUP BY r.model_id, r.query_id
+        """, (before_run_id, f'-{int(days)} days')).fetchall()
+        
+        return {(row['model_id'], row['query_id']): float(row['avg_ms']) for row in rows}
+    
+    def get_response_fingerprints(self, days: Optional[int] = None,
+                                  run_id: Optional[str] = None) -> List[Dict]:
+        """Fingerprint rows (text only where the fingerprint is missing), oldest first"""
+        conditions, params = [], []
+        if days is not None:
+            conditions.append("timestamp >= datetime('now', 'localtime', ?)")
+            params.append(f'-{int(days)} days')
+        if run_id is not None:
+            conditions.append("run_id = ?")
+            params.append(run_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        return self.connection.execute(f"""
+            SELECT id, run_id, timestamp, model_id, query_id, replicate_index, simhash,
+                   CASE WHEN simhash IS NULL THEN response END AS response
+            FROM responses
+            {where}
+            ORDER BY timestamp, id
+        """, params).fetchall()
+    
+    def store_fingerprints(self, rows: List[Tuple]):
+        """Set (simhash, band0, band1, band2, band3, id) on existing responses"""
+        with self.connection:
+            self.connection.executemany("""
+                UPDATE responses
+                SET simhash = ?, simhash_band0 = ?, simhash_band1 = ?,
+                    simhash_band2 = ?, simhash_band3 = ?
+                WHERE id = ?
+            """, rows)
+    
+    def iter_responses(self, after_id: int = 0, batch_size: int = 1000) -> Iterator[List[Dict]]:
+        """Stream responses in id order with keyset pages (reads are local, no cursor is held)"""
+        while True:
+            rows = self.connection.execute("""
+                SELECT id, run_id, query_id, model_id, query_text, response,
+                       paintballevents_referenced, cited_urls
+                FROM responses
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            """, (after_id, batch_size)).fetchall()
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1]['id']
+    
+    def update_citations(self, rows: List[Dict], state: Optional[Tuple[str, str]] = None):
+        """Overwrite re-derived citation results (and optionally a state value) in one transaction"""
+        citations = [
+            (row['id'], tenant_id, bool(referenced))
+            for row in rows
+            for tenant_id, referenced in (row.get('tenant_refs') or {}).items()
+        ]
+        with self.connection:
+            self.connection.executemany("""
+                UPDATE responses
+                SET cited_urls = ?, paintballevents_referenced = ?
+                WHERE id = ?
+            """, [(json.dumps(row['cited_urls']), bool(row['paintballevents_ref']), row['id']) for row in rows])
+            self.connection.executemany("""
+                INSERT INTO tenant_citations (response_id, tenant_id, referenced)
+                VALUES (?, ?, ?)
+                ON CONFLICT (response_id, tenant_id) DO UPDATE SET referenced = excluded.referenced
+            """, citations)
+            self._replace_domains([(row['id'], row['run_id'], row['cited_urls']) for row in rows])
+            if state:
+                self._write_state(*state)
+    
+    def store_response_domains(self, rows: List[Tuple[int, str, List[str]]]):
+        """Replace the indexed cited domains of existing (response_id, run_id, cited_urls) in one transaction"""
+        with self.connection:
+            self._replace_domains(rows)
+    
+    def _replace_domains(self, rows: List[Tuple[int, str, List[str]]]):
+        """Rewrite response_domains rows for (response_id, run_id, cited_urls) without committing"""
+        self.connection.executemany(
+            "DELETE FROM response_domains WHERE response_id = ?", [(row[0],) for row in rows]
+        )
+        self.connection.executemany(
+            "INSERT INTO response_domains (response_id, run_id, domain) VALUES (?, ?, ?)",
+            [(response_id, run_id, domain) for response_id, run_id, urls in rows for domain in cited_domains(urls)]
+        )
+    
+    def get_alert_states(self) -> Dict[Tuple[str, str], Dict]:
+        """Citation-rate alert state per (model_id, query_id)"""
+        rows = self.connection.execute("""
+            SELECT model_id, query_id, observations, ewma_rate, cusum_low, cusum_high, last_run_id
+            FROM alert_state
+        """).fetchall()
+        return {(row.pop('model_id'), row.pop('query_id')): row for row in rows}
+    
+    def save_alert_states(self, rows: List[Dict]):
+        """Upsert alert state rows in one transaction"""
+        with self.connection:
+            self.connection.executemany("""
+                INSERT INTO alert_state
+                (model_id, query_id, observations, ewma_rate, cusum_low, cusum_high, last_run_id, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (model_id, query_id) DO UPDATE SET
+                    observations = excluded.observations,
+                    ewma_rate = excluded.ewma_rate,
+                    cusum_low = excluded.cusum_low,
+                    cusum_high = excluded.cusum_high,
+                    last_run_id = excluded.last_run_id,
+                    updated_at = excluded.updated_at
+            """, [
+                (row['model_id'], row['query_id'], row['observations'], row['ewma_rate'],
+                 row['cusum_low'], row['cusum_high'], row['last_run_id'], _now())
+                for row in rows
+            ])
+    
+    def search_responses(
+        self,
+        text: str,
+        model_id: Optional[str] = None,
+        query_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 20
+    ) -> List[Dict]:
+        """Full-text search over response text, best matches first (FTS5 bm25)"""
+        terms = search_terms(text)
+        if not terms:
+            return []
+        
+        conditions, params = ["responses_fts MATCH ?"], [fts5_query(terms)]
+        for column, value in (('r.model_id', model_id), ('r.query_id', query_id)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("r.timestamp >= ?")
+            params.append(since.strftime('%Y-%m-%d %H:%M:%S'))
+        if until is not None:
+            conditions.append("r.timestamp < ?")
+            params.append(until.strftime('%Y-%m-%d %H:%M:%S'))
+        
+        # bm25() is lower for better matches; negate so higher is better like MySQL
+        return self.connection.execute(f"""
+            SELECT r.id, r.run_id, r.timestamp, r.model_id, r.query_id,
+                   r.paintballevents_referenced,
+                   -bm25(responses_fts) AS score,
+                   snippet(responses_fts, 0, ?, ?, '…', 24) AS snippet
+            FROM responses_fts
+            JOIN responses r ON r.id = responses_fts.rowid
+            WHERE {' AND '.join(conditions)}
+            ORDER BY bm25(responses_fts)
+            LIMIT ?
+        """, [HIGHLIGHT_START, HIGHLIGHT_END] + params + [int(limit)]).fetchall()
+    
+    def fetch_all(self, sql: str, params: Tuple = ()) -> List[Dict]:
+        """Run a read-only query (%s placeholders) and return all rows as dicts"""
+        return self.connection.execute(sql.replace('%s', '?'), params).fetchall()
+    
+    def get_run_summary(self, run_id: str) -> Dict:
+        """Get summary statistics for a run"""
+        return self.connection.execute("""
+            SELECT
+                run_id,
+                started_at,
+                completed_at,
+                status,
+                queries_executed,
+                errors_count,
+                notes
+            FROM runs
+            WHERE run_id = ?
+        """, (run_id,)).fetchone()
+    
+    def close(self):
+        """Close database connection"""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,32 @@
+"""
+Storage backend selection for AI Citation Monitor
+"""
+import os
+from typing import Optional
+from .base_storage import BaseStorage
+
+BACKENDS = ('mysql', 'sqlite')
+
+
+def create_storage(backend: Optional[str] = None, path: Optional[str] = None) -> BaseStorage:
+    """
+    Create the configured storage backend
+    
+    Args:
+        backend: 'mysql' or 'sqlite'; defaults to MONITOR_STORAGE, then 'mysql'
+        path: SQLite database file (ignored for MySQL)
+    
+    Returns:
+        Connected storage backend
+    """
+    backend = (backend or os.getenv('MONITOR_STORAGE') or 'mysql').lower()
+    
+    if backend == 'mysql':
+        from .operations import DatabaseManager
+        return DatabaseManager()
+    
+    if backend == 'sqlite':
+        from .sqlite_storage import SQLiteStorage
+        return SQLiteStorage(path)
+    
+    raise ValueError(f"Unknown storage backend '{backend}' (expected one of: {', '.join(BACKENDS)})")
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+AI Citation Monitor - Response Drift Report
+Uses the SimHash fingerprints stored with each response (utils/simhash.py)
+to show which (model, query) answers meaningfully changed between runs and
+which models gave near-identical answers, without diffing full texts
+
+Usage:
+    python drift_report.py [--days 90] [--threshold 10] [--max-distance 3]
+    python drift_report.py --run-id RUN_ID          # cluster one run's answers
+    python drift_report.py --backfill               # fingerprint older responses
+    python drift_report.py --json drift.json        # machine-readable output
+"""
+import os
+import sys
+import json
+import argparse
+from typing import Dict, List
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.storage import BACKENDS, create_storage
+from utils.simhash import cluster, fingerprint_columns, hamming, near_duplicate_pairs, to_unsigned
+
+# Backfill writes are committed in batches of this many rows
+BACKFILL_BATCH = 500
+
+
+def resolve_fingerprints(db, rows: List[Dict], backfill: bool) -> Dict[int, int]:
+    """
+    Unsigned fingerprint per response id
+    
+    Rows stored before fingerprints existed are hashed from their text; with
+    backfill the result is also written back so later reports skip the work.
+    """
+    fingerprints = {}
+    pending = []
+    for row in rows:
+        if row['simhash'] is not None:
+            fingerprints[row['id']] = to_unsigned(row['simhash'])
+            continue
+        
+        columns = fingerprint_columns(row['response'])
+        fingerprints[row['id']] = to_unsigned(columns[0])
+        if backfill:
+            pending.append(columns + (row['id'],))
+            if len(pending) >= BACKFILL_BATCH:
+                db.store_fingerprints(pending)
+                pending = []
+    
+    if backfill and pending:
+        db.store_fingerprints(pending)
+    return fingerprints
+
+
+def find_drift(rows: List[Dict], fingerprints: Dict[int, int], threshold: int) -> Dict:
+    """
+    Compare each (model, query) pair's answer with its answer in the previous run
+    
+    Only the first replicate of a pair in each run is compared, so replicate
+    noise within a run does not count as drift. Rows are sorted by time, so
+    this is a single linear pass.
+    """
+    latest = {}
+    drifted = []
+    unchanged = []
+    for row in rows:
+        if row['replicate_index'] != 0:
+            continue
+        
+        pair = (row['model_id'], row['query_id'])
+        previous = latest.get(pair)
+        latest[pair] = row
+        if previous is None or previous['run_id'] == row['run_id']:
+            continue
+        
+        distance = hamming(fingerprints[previous['id']], fingerprints[row['id']])
+        change = {
+            'model_id': row['model_id'],
+            'query_id': row['query_id'],
+            'from_run': previous['run_id'],
+            'to_run': row['run_id'],
+            'from_response_id': previous['id'],
+            'to_response_id': row['id'],
+            'distance': distance
+        }
+        (drifted if distance > threshold else unchanged).append(change)
+    
+    return {'drifted': drifted, 'unchanged': unchanged}
+
+
+def find_clusters(db, rows: List[Dict], fingerprints: Dict[int, int], max_distance: int,
+                  indexed: bool) -> List[List[Dict]]:
+    """
+    Groups of near-identical answers in one run (via LSH buckets, not all-pairs comparison)
+    
+    With every fingerprint of the run stored (indexed), candidate pairs
+    come from the database's band indexes; otherwise the run's
+    fingerprints are bucketed in memory.
+    """
+    by_id = {row['id']: row for row in rows}
+    subset = {response_id: fingerprints[response_id] for response_id in by_id}
+    if indexed and rows:
+        candidates = [
+            (a, b) for a, b in db.get_band_pairs(rows[0]['run_id'])
+            if a in subset and b in subset
+        ]
+        pairs = [(a, b, hamming(subset[a], subset[b])) for a, b in candidates]
+        pairs = [pair for pair in pairs if pair[2] <= max_distance]
+    else:
+        pairs = near_duplicate_pairs(subset, max_distance)
+    
+    return [
+        [
+            {'response_id': response_id, 'model_id': by_id[response_id]['model_id'],
+             'query_id': by_id[response_id]['query_id']}
+            for response_id in group
+        ]
+        for group in cluster(subset, pairs)
+    ]
+
+
+def print_report(drift: Dict, clusters: List[List[Dict]], cluster_run: str, limit: int):
+    """Print drift and cluster sections"""
+    compared = len(drift['drifted']) + len(drift['unchanged'])
+    
+    print(f"\n{'='*80}")
+    print("RESPONSE DRIFT")
+    print(f"{'='*80}")
+    print(f"Pair comparisons: {compared}")
+    print(f"Drifted: {len(drift['drifted'])}")
+    print(f"Unchanged: {len(drift['unchanged'])}")
+    
+    if drift['drifted']:
+        print(f"\n{'Model':<22} {'Query':<22} {'Bits':>4}  From → To")
+        print('-' * 80)
+        for change in sorted(drift['drifted'], key=lambda c: -c['distance'])[:limit]:
+            print(f"{change['model_id'][:22]:<22} {change['query_id'][:22]:<22} "
+                  f"{change['distance']:>4}  {change['from_run']} → {change['to_run']}")
+        if len(drift['drifted']) > limit:
+            print(f"... {len(drift['drifted']) - limit} more")
+    
+    print(f"\n{'='*80}")
+    print(f"NEAR-IDENTICAL ANSWERS ({cluster_run})")
+    print(f"{'='*80}")
+    if not clusters:
+        print("None")
+    for index, group in enumerate(clusters[:limit], 1):
+        members = ', '.join(f"{member['model_id']}/{member['query_id']}" for member in group)
+        print(f"{index:>3}. {len(group)} answers: {members}")
+    if len(clusters) > limit:
+        print(f"... {len(clusters) - limit} more")
+    print(f"{'='*80}\n")
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="AI Citation Monitor response drift report")
+    parser.add_argument('--storage', choices=BACKENDS, help="Storage backend (default: MONITOR_STORAGE or mysql)")
+    parser.add_argument('--sqlite-path', metavar='PATH', help="SQLite database file")
+    parser.add_argument('--days', type=int, default=90, help="Look back this many days (default: 90)")
+    parser.add_argument('--run-id', help="Cluster this run's answers, even if older than --days (default: the latest run in range)")
+    parser.add_argument(
+        '--threshold', type=int, default=10,
+        help="Answers more than this many bits apart (of 64) count as drifted (default: 10)"
+    )
+    parser.add_argument(
+        '--max-distance', type=int, default=3,
+        help="Answers at most this many bits apart count as near-identical (default: 3)"
+    )
+    parser.add_argument('--backfill', action='store_true', help="Store fingerprints for older responses")
+    parser.add_argument('--limit', type=int, default=25, help="Rows to print per section (default: 25)")
+    parser.add_argument('--json', metavar='PATH', help="Also write drift and clusters as JSON")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main entry point"""
+    load_dotenv()
+    args = parse_args()
+    
+    with create_storage(args.storage, args.sqlite_path) as db:
+        rows = db.get_response_fingerprints(days=args.days)
+        # The run to cluster is fetched by id, so it may predate the --days window
+        run_rows = db.get_response_fingerprints(run_id=args.run_id) if args.run_id else []
+        if args.run_id and not run_rows:
+            print(f"✗ ERROR: No responses for run {args.run_id}")
+            sys.exit(1)
+        if not rows and not run_rows:
+            print(f"No responses in the last {args.days} days")
+            return
+        
+        fingerprints = resolve_fingerprints(db, rows, args.backfill)
+        outside = [row for row in run_rows if row['id'] not in fingerprints]
+        fingerprints.update(resolve_fingerprints(db, outside, args.backfill))
+        
+        cluster_run = args.run_id or rows[-1]['run_id']
+        if not args.run_id:
+            run_rows = [row for row in rows if row['run_id'] == cluster_run]
+        run_rows = [row for row in run_rows if row['replicate_index'] == 0]
+        # Backfilled fingerprints are in the database by now
+        indexed = args.backfill or all(row['simhash'] is not None for row in run_rows)
+        clusters = find_clusters(db, run_rows, fingerprints, args.max_distance, indexed)
+    
+    if args.backfill:
+        missing = sum(1 for row in rows + outside if row['simhash'] is None)
+        print(f"✓ Backfilled {missing} fingerprints")
+    
+    drift = find_drift(rows, fingerprints, args.threshold)
+    print_report(drift, clusters, cluster_run, args.limit)
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'days': args.days,
+                'threshold': args.threshold,
+                'max_distance': args.max_distance,
+                'cluster_run': cluster_run,
+                'drifted': drift['drifted'],
+                'unchanged': drift['unchanged'],
+                'clusters': clusters
+            }, f, indent=2, default=str)
+        print(f"✓ Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
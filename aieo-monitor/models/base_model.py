@@ -10,6 +10,11 @@ import time
 class BaseModel(ABC):
     """Abstract base class for AI models"""
     
+    # Seconds before a call is abandoned and recorded as an error (None = wait indefinitely)
+    deadline_seconds = None
+    # Send a duplicate request once a call runs past this model's recent p95 latency
+    hedge = False
+    
     def __init__(self, api_key: str):
         """
         Initialize the model with an API key
@@ -41,6 +46,16 @@ class BaseModel(ABC):
         """
         pass
     
+    @property
+    def provider(self) -> str:
+        """
+        Return the provider name (matches models table in database)
+        
+        Returns:
+            Provider string (e.g., 'OpenAI', 'Anthropic')
+        """
+        return "Unknown"
+    
     @abstractmethod
     def query(self, prompt: str) -> Dict:
         """
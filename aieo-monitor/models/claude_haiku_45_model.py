@@ -5,6 +5,7 @@ import re
 import warnings
 from typing import Dict, List, Tuple
 from anthropic import Anthropic
+from utils.urls import canonicalize_url
 from .base_model import BaseModel
 
 # Suppress warnings
@@ -27,6 +28,10 @@ class ClaudeHaiku45Model(BaseModel):
     def model_name(self) -> str:
         return "Claude Haiku 4.5"
     
+    @property
+    def provider(self) -> str:
+        return "Anthropic"
+    
     def query(self, prompt: str) -> Dict:
         """Execute a query using Claude's API with web search"""
         def _query():
@@ -91,10 +96,8 @@ class ClaudeHaiku45Model(BaseModel):
                 all_urls = urls_with_protocol + list(urls_without_protocol)
                 
                 for url in all_urls:
-                    # Clean up URL (remove trailing punctuation)
-                    clean_url = url.rstrip('.,;:!?')
-                    # Remove utm_source parameter for cleaner URLs
-                    clean_url = clean_url.split('?utm_source')[0]
+                    # Canonical form (no trailing punctuation, tracking parameters or www.)
+                    clean_url = canonicalize_url(url)
                     if clean_url and clean_url not in cited_urls:
                         cited_urls.append(clean_url)
         
@@ -4,6 +4,7 @@ GPT-5 model implementation for AI Citation Monitor
 import warnings
 from typing import Dict, List, Tuple
 from openai import OpenAI
+from utils.urls import canonicalize_url
 from .base_model import BaseModel
 
 # Suppress Pydantic serialization warnings
@@ -26,6 +27,10 @@ class GPT5Model(BaseModel):
     def model_name(self) -> str:
         return "GPT-5"
     
+    @property
+    def provider(self) -> str:
+        return "OpenAI"
+    
     def query(self, prompt: str) -> Dict:
         """Execute a query using OpenAI's API with web search"""
         def _query():
@@ -66,8 +71,8 @@ class GPT5Model(BaseModel):
                     for annotation in annotations:
                         if annotation.get('type') == 'url_citation':
                             url = annotation.get('url', '')
-                            # Remove utm_source parameter for cleaner URLs
-                            clean_url = url.split('?utm_source')[0]
+                            # Canonical form (no tracking parameters, www. or trailing slash)
+                            clean_url = canonicalize_url(url)
                             if clean_url and clean_url not in cited_urls:
                                 cited_urls.append(clean_url)
         
@@ -4,6 +4,7 @@ GPT-5-nano model implementation for AI Citation Monitor
 import warnings
 from typing import Dict, List, Tuple
 from openai import OpenAI
+from utils.urls import canonicalize_url
 from .base_model import BaseModel
 
 # Suppress Pydantic serialization warnings
@@ -13,6 +14,10 @@ warnings.filterwarnings('ignore', category=UserWarning, module='pydantic')
 class GPT5NanoModel(BaseModel):
     """OpenAI GPT-5-nano implementation"""
     
+    # Cheap enough that a duplicate call costs less than a stalled run
+    deadline_seconds = 180
+    hedge = True
+    
     def __init__(self, api_key: str):
         super().__init__(api_key)
         self.client = OpenAI(api_key=api_key)
@@ -26,6 +31,10 @@ class GPT5NanoModel(BaseModel):
     def model_name(self) -> str:
         return "GPT-5-nano"
     
+    @property
+    def provider(self) -> str:
+        return "OpenAI"
+    
     def query(self, prompt: str) -> Dict:
         """Execute a query using OpenAI's API with web search"""
         def _query():
@@ -66,8 +75,8 @@ class GPT5NanoModel(BaseModel):
                     for annotation in annotations:
                         if annotation.get('type') == 'url_citation':
                             url = annotation.get('url', '')
-                            # Remove utm_source parameter for cleaner URLs
-                            clean_url = url.split('?utm_source')[0]
+                            # Canonical form (no tracking parameters, www. or trailing slash)
+                            clean_url = canonicalize_url(url)
                             if clean_url and clean_url not in cited_urls:
                                 cited_urls.append(clean_url)
         
@@ -1,50 +0,0 @@
-"""
-xAI Grok model implementation for AI Citation Monitor
-STUB - To be implemented when Grok API key is available
-"""
-from typing import Dict, List, Tuple
-from .base_model import BaseModel
-
-
-class GrokModel(BaseModel):
-    """xAI Grok 2 implementation - STUB"""
-    
-    def __init__(self, api_key: str):
-        super().__init__(api_key)
-        # TODO: Initialize Grok client when API is available
-        # self.client = xAI(api_key=api_key)
-    
-    @property
-    def model_id(self) -> str:
-        return "grok-2"
-    
-    @property
-    def model_name(self) -> str:
-        return "Grok 2"
-    
-    def query(self, prompt: str) -> Dict:
-        """Execute a query using Grok's API"""
-        # TODO: Implement Grok API call
-        # Example structure (adjust based on actual API):
-        # def _query():
-        #     response = self.client.chat.completions.create(
-        #         model="grok-2",
-        #         messages=[{"role": "user", "content": prompt}]
-        #     )
-        #     return response
-        # 
-        # raw_response, elapsed_ms = self._time_query(_query)
-        # 
-        # return {
-        #     'response_text': raw_response.choices[0].message.content,
-        #     'response_time_ms': elapsed_ms,
-        #     'raw_response': raw_response
-        # }
-        
-        raise NotImplementedError("Grok model not yet implemented")
-    
-    def extract_metadata(self, response: Dict) -> Tuple[str, List[str]]:
-        """Extract search query and cited URLs from Grok response"""
-        # TODO: Implement metadata extraction for Grok
-        raise NotImplementedError("Grok model not yet implemented")
-
@@ -1,52 +0,0 @@
-"""
-Meta Llama model implementation for AI Citation Monitor
-STUB - To be implemented when Llama API access is configured
-"""
-from typing import Dict, List, Tuple
-from .base_model import BaseModel
-
-
-class LlamaModel(BaseModel):
-    """Meta Llama 3 70B implementation - STUB"""
-    
-    def __init__(self, api_key: str):
-        super().__init__(api_key)
-        # TODO: Initialize Llama client when access is available
-        # Options: Together AI, Replicate, or self-hosted
-        # self.client = TogetherAI(api_key=api_key)
-    
-    @property
-    def model_id(self) -> str:
-        return "llama-3-70b"
-    
-    @property
-    def model_name(self) -> str:
-        return "Llama 3 70B"
-    
-    def query(self, prompt: str) -> Dict:
-        """Execute a query using Llama via hosted API"""
-        # TODO: Implement Llama API call
-        # Example structure (using Together AI):
-        # def _query():
-        #     response = self.client.chat.completions.create(
-        #         model="meta-llama/Llama-3-70b-chat-hf",
-        #         messages=[{"role": "user", "content": prompt}]
-        #     )
-        #     return response
-        # 
-        # raw_response, elapsed_ms = self._time_query(_query)
-        # 
-        # return {
-        #     'response_text': raw_response.choices[0].message.content,
-        #     'response_time_ms': elapsed_ms,
-        #     'raw_response': raw_response
-        # }
-        
-        raise NotImplementedError("Llama model not yet implemented")
-    
-    def extract_metadata(self, response: Dict) -> Tuple[str, List[str]]:
-        """Extract search query and cited URLs from Llama response"""
-        # TODO: Implement metadata extraction for Llama
-        # Note: May require custom web search integration
-        raise NotImplementedError("Llama model not yet implemented")
-
@@ -0,0 +1,247 @@
+"""
+OpenAI-compatible model implementation for AI Citation Monitor
+One adapter for every provider speaking the OpenAI chat completions API
+(xAI Grok, DeepSeek, Llama hosts, ...), configured per model in
+config/providers.json: endpoint, model string, API key variable and where
+the response carries citations and token usage. Models on the same
+endpoint share one client, and with it one HTTP connection pool.
+"""
+import os
+import re
+import json
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+from openai import AsyncOpenAI, OpenAI
+from utils.urls import canonicalize_url
+from .base_model import BaseModel
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'providers.json')
+
+# Token counts reported by the OpenAI chat completions format
+DEFAULT_USAGE_FIELDS = {
+    'input_tokens': 'usage.prompt_tokens',
+    'output_tokens': 'usage.completion_tokens'
+}
+
+# One client (connection pool) per (base_url, api_key)
+_clients: Dict[Tuple[str, str], OpenAI] = {}
+_async_clients: Dict[Tuple[str, str], AsyncOpenAI] = {}
+_clients_lock = threading.Lock()
+
+
+def shared_client(base_url: str, api_key: str) -> OpenAI:
+    """Client for an endpoint, created once and shared by every model on it"""
+    with _clients_lock:
+        client = _clients.get((base_url, api_key))
+        if client is None:
+            client = _clients[(base_url, api_key)] = OpenAI(api_key=api_key, base_url=base_url)
+        return client
+
+
+def shared_async_client(base_url: str, api_key: str) -> AsyncOpenAI:
+    """Async client for an endpoint, shared like shared_client() (use from one event loop)"""
+    with _clients_lock:
+        client = _async_clients.get((base_url, api_key))
+        if client is None:
+            client = _async_clients[(base_url, api_key)] = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        return client
+
+
+def field_values(data, path: str) -> List:
+    """
+    Values at a dotted path in a response dict
+    
+    Numeric parts index lists and a trailing "[]" fans out over a list,
+    e.g. "choices.0.message.annotations[].url_citation.url". Missing
+    fields yield no values.
+    """
+    values = [data]
+    for part in path.split('.'):
+        fan_out = part.endswith('[]')
+        key = part[:-2] if fan_out else part
+        found = []
+        for value in values:
+            if isinstance(value, dict):
+                value = value.get(key)
+            elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+                value = value[int(key)]
+            else:
+                value = None
+            
+            if value is None:
+                continue
+            if fan_out:
+                if isinstance(value, list):
+                    found.extend(item for item in value if item is not None)
+            else:
+                found.append(value)
+        values = found
+    return values
+
+
+def merge_chunks(chunks: List) -> Dict:
+    """
+    One chat completion dict from the chunks of a streamed response
+    
+    Content and annotation deltas are joined into a single message; other
+    top-level fields (id, usage, provider extras such as citations) keep
+    the last value sent.
+    """
+    merged = {}
+    content = []
+    annotations = []
+    for chunk in chunks:
+        data = chunk.model_dump(mode='json') if hasattr(chunk, 'model_dump') else chunk
+        for choice in data.get('choices') or []:
+            delta = choice.get('delta') or {}
+            if delta.get('content'):
+                content.append(delta['content'])
+            annotations.extend(delta.get('annotations') or [])
+        merged.update({key: value for key, value in data.items() if key != 'choices' and value is not None})
+    
+    message = {'role': 'assistant', 'content': ''.join(content)}
+    if annotations:
+        message['annotations'] = annotations
+    merged['choices'] = [{'index': 0, 'message': message}]
+    return merged
+
+
+def load_provider_configs(path: Optional[str] = None) -> List[Dict]:
+    """Model entries of PROVIDERS_CONFIG or config/providers.json (none if the file does not exist)"""
+    try:
+        with open(path or os.getenv('PROVIDERS_CONFIG') or CONFIG_PATH, 'r') as f:
+            return json.load(f)['models']
+    except FileNotFoundError:
+        return []
+
+
+class OpenAICompatibleModel(BaseModel):
+    """Configurable OpenAI chat completions adapter (see config/providers.json)"""
+    
+    def __init__(self, api_key: str, config: Dict):
+        """
+        Args:
+            api_key: API key for the model's endpoint
+            config: Model entry from config/providers.json
+        
+        Raises:
+            ValueError: If id, name, provider, base_url or model is missing
+        """
+        super().__init__(api_key)
+        missing = [key for key in ('id', 'name', 'provider', 'base_url', 'model') if not config.get(key)]
+        if missing:
+            raise ValueError(f"Provider model config is missing: {', '.join(missing)}")
+        
+        self.config = config
+        self.base_url = config['base_url']
+        self._model = config['model']
+        self.stream = config.get('stream', False)
+        self.deadline_seconds = config.get('deadline_seconds')
+        self.hedge = config.get('hedge', False)
+        self.client = shared_client(self.base_url, api_key)
+    
+    @property
+    def model_id(self) -> str:
+        return self.config['id']
+    
+    @property
+    def model_name(self) -> str:
+        return self.config['name']
+    
+    @property
+    def provider(self) -> str:
+        return self.config['provider']
+    
+    def _request(self, prompt: str) -> Dict:
+        """chat.completions.create() arguments for a prompt"""
+        request = {
+            'model': self._model,
+            'messages': [{"role": "user", "content": prompt}]
+        }
+        if self.config.get('max_tokens'):
+            request['max_tokens'] = self.config['max_tokens']
+        if self.config.get('extra_body'):
+            request['extra_body'] = self.config['extra_body']
+        if self.deadline_seconds:
+            request['timeout'] = self.deadline_seconds
+        if self.stream:
+            request['stream'] = True
+            if self.config.get('stream_usage', True):
+                request['stream_options'] = {'include_usage': True}
+        return request
+    
+    def _result(self, raw_response, elapsed_ms: int) -> Dict:
+        """query() result for a completion (SDK object, or merged dict when streamed)"""
+        if isinstance(raw_response, dict):
+            response_text = raw_response['choices'][0]['message']['content']
+        else:
+            response_text = raw_response.choices[0].message.content
+        
+        return {
+            'response_text': response_text or '',
+            'response_time_ms': elapsed_ms,
+            'raw_response': raw_response,
+            'usage': self.usage(raw_response)
+        }
+    
+    def query(self, prompt: str) -> Dict:
+        """Execute a query (streamed if the config says so)"""
+        def _query():
+            response = self.client.chat.completions.create(**self._request(prompt))
+            if self.stream:
+                return merge_chunks(list(response))
+            return response
+        
+        raw_response, elapsed_ms = self._time_query(_query)
+        return self._result(raw_response, elapsed_ms)
+    
+    async def aquery(self, prompt: str) -> Dict:
+        """Async query() on the endpoint's shared async client"""
+        client = shared_async_client(self.base_url, self.api_key)
+        start_time = time.time()
+        response = await client.chat.completions.create(**self._request(prompt))
+        if self.stream:
+            response = merge_chunks([chunk async for chunk in response])
+        elapsed_ms = int((time.time() - start_time) * 1000)
+        return self._result(response, elapsed_ms)
+    
+    def usage(self, raw_response) -> Dict[str, int]:
+        """Token counts at the configured usage fields (those the response has)"""
+        data = raw_response.model_dump(mode='json') if hasattr(raw_response, 'model_dump') else raw_response
+        usage = {}
+        for name, path in self.config.get('usage_fields', DEFAULT_USAGE_FIELDS).items():
+            values = field_values(data, path)
+            if values:
+                usage[name] = values[0]
+        return usage
+    
+    def extract_metadata(self, response: Dict) -> Tuple[str, List[str]]:
+        """Extract search query and cited URLs at the configured fields"""
+        raw_response = response['raw_response']
+        data = raw_response.model_dump(mode='json') if hasattr(raw_response, 'model_dump') else raw_response
+        
+        cited_urls = []
+        candidates = []
+        for path in self.config.get('citation_fields', []):
+            for value in field_values(data, path):
+                # Citations are URLs or objects with a url field
+                candidates.append(value.get('url') if isinstance(value, dict) else value)
+        
+        # URLs written into the answer count too, unless the config turns them off
+        if self.config.get('text_urls', True):
+            candidates += re.findall(r'https?://[^\s\)>\]]+', response['response_text'])
+        
+        for url in candidates:
+            if not isinstance(url, str):
+                continue
+            clean_url = canonicalize_url(url)
+            if clean_url and clean_url not in cited_urls:
+                cited_urls.append(clean_url)
+        
+        search_query = None
+        if self.config.get('search_query_field'):
+            values = field_values(data, self.config['search_query_field'])
+            search_query = values[0] if values else None
+        
+        return search_query, cited_urls
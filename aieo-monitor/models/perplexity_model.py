@@ -5,6 +5,7 @@ Uses Perplexity's Sonar models which are optimized for real-time search
 import re
 from typing import Dict, List, Tuple
 from openai import OpenAI
+from utils.urls import canonicalize_url
 from .base_model import BaseModel
 
 
@@ -28,6 +29,10 @@ class PerplexityModel(BaseModel):
     def model_name(self) -> str:
         return "Sonar Pro"
     
+    @property
+    def provider(self) -> str:
+        return "Perplexity"
+    
     def query(self, prompt: str) -> Dict:
         """Execute a query using Perplexity's API"""
         def _query():
@@ -56,13 +61,16 @@ class PerplexityModel(BaseModel):
         # Perplexity includes citations in the response
         # Look for citations in the response object
         if hasattr(raw_response, 'citations') and raw_response.citations:
-            cited_urls = list(raw_response.citations)
+            for url in raw_response.citations:
+                clean_url = canonicalize_url(url)
+                if clean_url and clean_url not in cited_urls:
+                    cited_urls.append(clean_url)
         
         # Also extract URLs from the response text using regex
         # Perplexity often includes URLs in [n] citation format
         urls_in_text = re.findall(r'https?://[^\s\)>\]]+', response_text)
         for url in urls_in_text:
-            clean_url = url.rstrip('.,;:!?')
+            clean_url = canonicalize_url(url)
             if clean_url and clean_url not in cited_urls:
                 cited_urls.append(clean_url)
         
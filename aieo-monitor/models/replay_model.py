@@ -0,0 +1,254 @@
+"""
+Record/replay model implementation for AI Citation Monitor
+Serves recorded provider results back offline, with synthetic latency,
+errors and rate limiting, so the orchestrator can be load-tested without
+network access or paid API calls
+"""
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from .base_model import BaseModel
+
+
+class SyntheticRateLimitError(Exception):
+    """Injected HTTP 429, shaped like the provider SDKs' rate limit errors"""
+    status_code = 429
+
+
+class SyntheticProviderError(Exception):
+    """Injected provider failure"""
+    status_code = 500
+
+
+class CassetteRecorder:
+    """
+    Appends normalized provider results to cassette files
+    
+    One JSONL file per model in the cassette directory. Safe to call from
+    several worker threads.
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+    
+    def record(self, model, query: Dict, outcome: Dict):
+        """Append one normalized result (as produced by the orchestrator)"""
+        entry = {
+            'model_id': model.model_id,
+            'model_name': model.model_name,
+            'provider': model.provider,
+            'query_id': query['id'],
+            'query_text': query['text'],
+            'response_text': outcome['response_text'],
+            'search_query': outcome['search_query'],
+            'cited_urls': outcome['cited_urls'],
+            'response_time_ms': outcome['response_time_ms'],
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        path = os.path.join(self.directory, f"{model.model_id}.jsonl")
+        with self._lock:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+
+
+class ReplayProfile:
+    """Synthetic behaviour applied to replayed calls"""
+    
+    def __init__(
+        self,
+        latency: str = 'recorded',
+        time_scale: float = 1.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            latency: Latency distribution in milliseconds, one of
+                'recorded', 'fixed:MS', 'uniform:LOW:HIGH',
+                'lognormal:MEDIAN:SIGMA'
+            time_scale: Multiplier applied to actual sleeping (e.g. 0.01
+                to run a 1000x matrix quickly); reported times are unscaled
+            error_rate: Probability a call raises SyntheticProviderError
+            rate_limit_rate: Probability a call raises SyntheticRateLimitError
+            seed: Random seed for reproducible runs
+        """
+        self.latency = latency
+        self.time_scale = time_scale
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._kind, self._params = self._parse_latency(latency)
+    
+    @staticmethod
+    def _parse_latency(spec: str) -> Tuple[str, List[float]]:
+        kind, _, rest = spec.partition(':')
+        params = [float(part) for part in rest.split(':')] if rest else []
+        expected = {'recorded': 0, 'fixed': 1, 'uniform': 2, 'lognormal': 2}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(
+                f"Invalid latency spec '{spec}' (use recorded, fixed:MS, "
+                f"uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA)"
+            )
+        return kind, params
+    
+    def sample_latency_ms(self, recorded_ms: Optional[int]) -> int:
+        """Draw a latency for one call"""
+        with self._lock:
+            if self._kind == 'fixed':
+                return int(self._params[0])
+            if self._kind == 'uniform':
+                return int(self._random.uniform(*self._params))
+            if self._kind == 'lognormal':
+                median, sigma = self._params
+                return int(median * self._random.lognormvariate(0, sigma))
+        return int(recorded_ms or 0)
+    
+    def sample_failure(self) -> Optional[Exception]:
+        """Return an exception to inject for one call, or None"""
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            return SyntheticRateLimitError("Synthetic 429: rate limit exceeded")
+        if roll < self.rate_limit_rate + self.error_rate:
+            return SyntheticProviderError("Synthetic provider error")
+        return None
+
+
+class ReplayModel(BaseModel):
+    """Serves recorded results for one model instead of calling a provider"""
+    
+    def __init__(
+        self,
+        model_id: str,
+        model_name: str,
+        entries: List[Dict],
+        profile: Optional[ReplayProfile] = None
+    ):
+        """
+        Args:
+            model_id: Model identifier reported to the orchestrator
+            model_name: Human-readable model name
+            entries: Recorded results (cassette lines) to serve
+            profile: Synthetic latency/error behaviour
+        """
+        super().__init__(api_key=None)
+        if not entries:
+            raise ValueError(f"No recorded entries for {model_id}")
+        
+        self._model_id = model_id
+        self._model_name = model_name
+        self.profile = profile or ReplayProfile()
+        self._entries = entries
+        self._by_prompt = {}
+        for entry in entries:
+            self._by_prompt.setdefault(entry['query_text'], []).append(entry)
+    
+    @property
+    def model_id(self) -> str:
+        return self._model_id
+    
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+    
+    @property
+    def provider(self) -> str:
+        return self._entries[0].get('provider', "Replay")
+    
+    def query(self, prompt: str) -> Dict:
+        """Replay a recorded response for the prompt"""
+        # Prompts without a recording (e.g. synthetic queries) map onto a
+        # stable pseudo-random recorded entry
+        candidates = self._by_prompt.get(prompt) or self._entries
+        digest = hashlib.sha1(prompt.encode('utf-8')).digest()
+        entry = candidates[int.from_bytes(digest[:4], 'big') % len(candidates)]
+        
+        latency_ms = self.profile.sample_latency_ms(entry.get('response_time_ms'))
+        failure = self.profile.sample_failure()
+        
+        def _query():
+            time.sleep(latency_ms * self.profile.time_scale / 1000)
+            if failure:
+                raise failure
+            return entry
+        
+        raw_response, _ = self._time_query(_query)
+        
+        return {
+            'response_text': raw_response['response_text'],
+            'response_time_ms': latency_ms,
+            'raw_response': raw_response
+        }
+    
+    def extract_metadata(self, response: Dict) -> Tuple[str, List[str]]:
+        """Return the search query and cited URLs captured at record time"""
+        raw_response = response['raw_response']
+        return raw_response.get('search_query'), list(raw_response.get('cited_urls') or [])
+
+
+def load_cassettes(directory: str, profile: Optional[ReplayProfile] = None) -> List[ReplayModel]:
+    """Create one ReplayModel per cassette file in a directory"""
+    models = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.jsonl'):
+            continue
+        
+        with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        
+        if entries:
+            models.append(ReplayModel(
+                entries[0]['model_id'],
+                entries[0].get('model_name', entries[0]['model_id']),
+                entries,
+                profile
+            ))
+    
+    if not models:
+        raise ValueError(f"No cassettes found in {directory}")
+    return models
+
+
+def synthetic_models(base_models: List[ReplayModel], copies: int) -> List[ReplayModel]:
+    """
+    Scale a set of replay models up to len(base_models) * copies models
+    
+    Copies share the recorded entries and profile of their base model but
+    get their own ids (e.g. 'gpt-5~3'), so they count as separate models.
+    """
+    if copies <= 1:
+        return list(base_models)
+    
+    return [
+        ReplayModel(
+            f"{model.model_id}~{copy}",
+            f"{model.model_name} #{copy}",
+            model._entries,
+            model.profile
+        )
+        for copy in range(copies)
+        for model in base_models
+    ]
+
+
+def synthetic_queries(count: int) -> List[Dict]:
+    """Generate count distinct synthetic queries (served by hash-mapped entries)"""
+    return [
+        {
+            'id': f"synthetic_{index:05d}",
+            'text': f"Synthetic load-test query #{index}: find paintball events",
+            'category': 'synthetic',
+            'priority': 3,
+            'active': True
+        }
+        for index in range(count)
+    ]
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+AI Citation Monitor - Run Diff
+What changed between two runs: (model, query) pairs that gained or lost a
+citation, newly cited and no longer cited domains, and per-model latency
+and citation rate shifts. Every comparison is an indexed join or
+NOT EXISTS probe in the database (idx_run_pair, response_domains), so only
+the differences come back, however large the runs are.
+
+Usage:
+    python run_diff.py                              # the two latest completed runs
+    python run_diff.py RUN_A RUN_B [--json diff.json]
+    python run_diff.py --backfill-domains           # index domains of older responses
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.storage import BACKENDS, create_storage
+
+# Per-pair citation result of one run (any replicate cited)
+PAIR_CITATIONS = """
+    SELECT model_id, query_id,
+           MAX(paintballevents_referenced) AS cited,
+           AVG(paintballevents_referenced) AS rate
+    FROM responses
+    WHERE run_id = %s
+    GROUP BY model_id, query_id
+"""
+
+# Per-model totals of one run
+MODEL_TOTALS = """
+    SELECT model_id,
+           COUNT(*) AS responses,
+           AVG(paintballevents_referenced) AS citation_rate,
+           AVG(response_time_ms) AS avg_ms
+    FROM responses
+    WHERE run_id = %s
+    GROUP BY model_id
+"""
+
+# Domains cited in one run and not in the other, most cited first
+DOMAINS_ONLY_IN = """
+    SELECT d.domain, COUNT(*) AS responses
+    FROM response_domains d
+    WHERE d.run_id = %s
+      AND NOT EXISTS (
+          SELECT 1 FROM response_domains o
+          WHERE o.run_id = %s AND o.domain = d.domain
+      )
+    GROUP BY d.domain
+    ORDER BY responses DESC, d.domain
+"""
+
+BACKFILL_BATCH = 1000
+
+
+def latest_runs(db) -> Optional[Tuple[str, str]]:
+    """(previous, latest) completed run ids, or None if there are fewer than two"""
+    rows = db.fetch_all("""
+        SELECT run_id FROM runs
+        WHERE status = 'completed'
+        ORDER BY started_at DESC, run_id DESC
+        LIMIT 2
+    """)
+    if len(rows) < 2:
+        return None
+    return rows[1]['run_id'], rows[0]['run_id']
+
+
+def diff_pairs(db, run_a: str, run_b: str) -> Dict:
+    """Pairs asked in both runs whose citation result changed, and pair counts"""
+    changed = db.fetch_all(f"""
+        SELECT a.model_id, a.query_id, a.rate AS rate_a, b.rate AS rate_b, b.cited AS cited
+        FROM ({PAIR_CITATIONS}) a
+        JOIN ({PAIR_CITATIONS}) b ON b.model_id = a.model_id AND b.query_id = a.query_id
+        WHERE a.cited <> b.cited
+        ORDER BY a.model_id, a.query_id
+    """, (run_a, run_b))
+    counts = db.fetch_all(f"""
+        SELECT
+            (SELECT COUNT(*) FROM ({PAIR_CITATIONS}) a) AS pairs_a,
+            (SELECT COUNT(*) FROM ({PAIR_CITATIONS}) b) AS pairs_b,
+            (SELECT COUNT(*) FROM ({PAIR_CITATIONS}) a
+             JOIN ({PAIR_CITATIONS}) b ON b.model_id = a.model_id AND b.query_id = a.query_id) AS shared
+    """, (run_a, run_b, run_a, run_b))[0]
+    
+    strip = lambda row: {
+        'model_id': row['model_id'],
+        'query_id': row['query_id'],
+        'rate_a': round(float(row['rate_a']), 3),
+        'rate_b': round(float(row['rate_b']), 3)
+    }
+    return {
+        'pairs_a': int(counts['pairs_a']),
+        'pairs_b': int(counts['pairs_b']),
+        'shared': int(counts['shared']),
+        'gained': [strip(row) for row in changed if row['cited']],
+        'lost': [strip(row) for row in changed if not row['cited']]
+    }
+
+
+def diff_domains(db, run_a: str, run_b: str) -> Dict:
+    """Domains cited only in the later run (new) and only in the earlier one (dropped)"""
+    as_list = lambda rows: [{'domain': row['domain'], 'responses': int(row['responses'])} for row in rows]
+    return {
+        'new': as_list(db.fetch_all(DOMAINS_ONLY_IN, (run_b, run_a))),
+        'dropped': as_list(db.fetch_all(DOMAINS_ONLY_IN, (run_a, run_b)))
+    }
+
+
+def diff_models(db, run_a: str, run_b: str) -> List[Dict]:
+    """Per-model citation rate and average latency in both runs"""
+    rows = db.fetch_all(f"""
+        SELECT a.model_id,
+               a.citation_rate AS rate_a, b.citation_rate AS rate_b,
+               a.avg_ms AS avg_ms_a, b.avg_ms AS avg_ms_b
+        FROM ({MODEL_TOTALS}) a
+        JOIN ({MODEL_TOTALS}) b ON b.model_id = a.model_id
+        ORDER BY a.model_id
+    """, (run_a, run_b))
+    
+    models = []
+    for row in rows:
+        avg_a = float(row['avg_ms_a']) if row['avg_ms_a'] is not None else None
+        avg_b = float(row['avg_ms_b']) if row['avg_ms_b'] is not None else None
+        models.append({
+            'model_id': row['model_id'],
+            'rate_a': round(float(row['rate_a']), 3),
+            'rate_b': round(float(row['rate_b']), 3),
+            'avg_ms_a': round(avg_a) if avg_a is not None else None,
+            'avg_ms_b': round(avg_b) if avg_b is not None else None,
+            'latency_change': round(avg_b / avg_a - 1, 3) if avg_a and avg_b is not None else None
+        })
+    return models
+
+
+def backfill_domains(db, batch_size: int = BACKFILL_BATCH) -> int:
+    """Index the cited domains of every stored response (idempotent)"""
+    count = 0
+    for batch in db.iter_responses(0, batch_size):
+        db.store_response_domains([
+            (row['id'], row['run_id'], json.loads(row['cited_urls'] or '[]')) for row in batch
+        ])
+        count += len(batch)
+    return count
+
+
+def print_report(diff: Dict, limit: int):
+    """Print the diff as compact tables"""
+    pairs = diff['pairs']
+    print(f"\n{'='*80}")
+    print(f"RUN DIFF: {diff['run_a']} → {diff['run_b']}")
+    print(f"{'='*80}")
+    print(f"Pairs: {pairs['pairs_a']} → {pairs['pairs_b']} ({pairs['shared']} in both)")
+    print(f"Citations gained: {len(pairs['gained'])} | lost: {len(pairs['lost'])}")
+    print(f"Domains new: {len(diff['domains']['new'])} | dropped: {len(diff['domains']['dropped'])}")
+    
+    if diff['models']:
+        print(f"\n{'Model':<22} {'Cited':>15} {'Avg latency':>21} {'Change':>8}")
+        print('-' * 80)
+        for model in diff['models']:
+            latency = '-'
+            if model['avg_ms_a'] is not None and model['avg_ms_b'] is not None:
+                latency = f"{model['avg_ms_a']:,}ms → {model['avg_ms_b']:,}ms"
+            change = f"{model['latency_change']:+.0%}" if model['latency_change'] is not None else '-'
+            print(f"{model['model_id'][:22]:<22} {model['rate_a']:>6.0%} → {model['rate_b']:>5.0%} "
+                  f"{latency:>21} {change:>8}")
+    
+    for label, rows in (('GAINED', pairs['gained']), ('LOST', pairs['lost'])):
+        if not rows:
+            continue
+        print(f"\n{label} CITATIONS")
+        print('-' * 80)
+        for row in rows[:limit]:
+            print(f"{row['model_id'][:22]:<22} {row['query_id'][:30]:<30} "
+                  f"{row['rate_a']:>5.0%} → {row['rate_b']:.0%}")
+        if len(rows) > limit:
+            print(f"... {len(rows) - limit} more")
+    
+    for label, rows in (('NEW', diff['domains']['new']), ('DROPPED', diff['domains']['dropped'])):
+        if not rows:
+            continue
+        print(f"\n{label} DOMAINS")
+        print('-' * 80)
+        for row in rows[:limit]:
+            print(f"{row['domain'][:60]:<60} {row['responses']:>6} responses")
+        if len(rows) > limit:
+            print(f"... {len(rows) - limit} more")
+    print(f"{'='*80}\n")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command line parser (main() also uses it to reject unknown run ids)"""
+    parser = argparse.ArgumentParser(description="Compare two AI Citation Monitor runs")
+    parser.add_argument('runs', nargs='*', metavar='RUN_ID',
+                        help="Earlier and later run id (default: the two latest completed runs)")
+    parser.add_argument('--storage', choices=BACKENDS, help="Storage backend (default: MONITOR_STORAGE or mysql)")
+    parser.add_argument('--sqlite-path', metavar='PATH', help="SQLite database file")
+    parser.add_argument('--limit', type=int, default=25, help="Rows to print per section (default: 25)")
+    parser.add_argument('--json', metavar='PATH', help="Also write the diff as JSON")
+    parser.add_argument('--backfill-domains', action='store_true',
+                        help="Index cited domains of responses stored before response_domains existed")
+    return parser
+
+
+def parse_args(parser: argparse.ArgumentParser, argv=None):
+    """Parse command line arguments"""
+    args = parser.parse_args(argv)
+    
+    if len(args.runs) not in (0, 2):
+        parser.error("pass two run ids (earlier, later) or none")
+    return args
+
+
+def unknown_runs(db, run_ids: Tuple[str, ...]) -> List[str]:
+    """Run ids not found in the runs table"""
+    placeholders = ', '.join(['%s'] * len(run_ids))
+    rows = db.fetch_all(f"SELECT run_id FROM runs WHERE run_id IN ({placeholders})", run_ids)
+    known = {row['run_id'] for row in rows}
+    return [run_id for run_id in run_ids if run_id not in known]
+
+
+def main():
+    """Main entry point"""
+    load_dotenv()
+    parser = build_parser()
+    args = parse_args(parser)
+    
+    with create_storage(args.storage, args.sqlite_path) as db:
+        if args.backfill_domains:
+            print(f"✓ Indexed cited domains of {backfill_domains(db):,} responses")
+            return
+        
+        runs = tuple(args.runs) or latest_runs(db)
+        if not runs:
+            print("Need two completed runs to compare")
+            return
+        unknown = unknown_runs(db, runs)
+        if unknown:
+            parser.error(f"unknown run id(s): {', '.join(unknown)}")
+        run_a, run_b = runs
+        
+        start = time.perf_counter()
+        diff = {
+            'run_a': run_a,
+            'run_b': run_b,
+            'pairs': diff_pairs(db, run_a, run_b),
+            'domains': diff_domains(db, run_a, run_b),
+            'models': diff_models(db, run_a, run_b)
+        }
+        elapsed_ms = (time.perf_counter() - start) * 1000
+    
+    print_report(diff, args.limit)
+    print(f"Computed in {elapsed_ms:.0f}ms")
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(diff, f, indent=2)
+        print(f"✓ Diff written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,14 +8,28 @@ Designed to run as a weekly cron job via GitHub Actions
 import os
 import sys
 import json
+import time
+
+# Taken before the heavy imports so --profile can report import time
+_STARTED = time.perf_counter()
+
 import uuid
-from datetime import datetime
+import signal
+import socket
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import AbstractSet, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
 # Add current directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from database.operations import DatabaseManager
+from database.storage import BACKENDS, create_storage
+from database.job_queue import JobQueue, LeaseHeartbeat
+from database.spool import ResponseSpool, SpoolFlusher, flush_spool
+from database.raw_archive import RawArchive
 from models.gpt5_model import GPT5Model
 from models.gpt5_mini_model import GPT5MiniModel
 from models.gpt5_nano_model import GPT5NanoModel
@@ -23,24 +37,106 @@ from models.claude_model import ClaudeModel
 from models.claude_sonnet_45_model import ClaudeSonnet45Model
 from models.claude_haiku_45_model import ClaudeHaiku45Model
 from models.claude_opus_41_model import ClaudeOpus41Model
-from models.deepseek_model import DeepSeekModel
-from models.grok_model import GrokModel
 from models.perplexity_model import PerplexityModel
-from models.llama_model import LlamaModel
+from models.openai_compatible_model import OpenAICompatibleModel, load_provider_configs
+from models.replay_model import (
+    CassetteRecorder, ReplayProfile, load_cassettes, synthetic_models, synthetic_queries
+)
+from utils.alerts import check_run
+from utils.cadence import CadenceScheduler
+from utils.hedging import HedgeBudget, HedgedCaller
+from utils.pipeline import Pipeline, Stage, print_stage_report
+from utils.profiling import RunProfiler
+from utils.query_templates import expand_queries, in_rotation, rotating_ids, rotation_week
+from utils.sampling import AdaptiveSampler, wilson_interval
+from utils.scheduling import ProviderDispatcher, ewma_latencies, longest_first
+from utils.sharding import assign_shards, parse_shard
+from utils.tenants import DEFAULT_TENANTS, resolve_tenants, share_prompts, tenant_references
+from utils.urls import cites_domain
 
 # Load environment variables
 load_dotenv()
 
+# Days of response history behind the per-pair latency estimates
+LATENCY_HISTORY_DAYS = 90
+
+# Worker threads of the CPU-bound pipeline stages (persist always has one:
+# the database connection is not thread-safe)
+PARSE_WORKERS = 2
+MATCH_WORKERS = 2
+
 
 class MonitorOrchestrator:
     """Orchestrates the monitoring process across all models and queries"""
     
-    def __init__(self):
-        """Initialize the orchestrator"""
-        self.db = DatabaseManager()
-        self.run_id = f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
-        self.models = self._initialize_models()
-        self.queries = self._load_queries()
+    def __init__(
+        self,
+        sampler: Optional[AdaptiveSampler] = None,
+        run_id: Optional[str] = None,
+        models: Optional[List] = None,
+        queries: Optional[List[Dict]] = None,
+        tenants: Optional[List[Dict]] = None,
+        recorder: Optional[CassetteRecorder] = None,
+        db=None,
+        hedger: Optional[HedgedCaller] = None,
+        provider_concurrency: int = 1,
+        profiler: Optional[RunProfiler] = None,
+        flusher: Optional[SpoolFlusher] = None,
+        week: Optional[int] = None,
+        archive: Optional[RawArchive] = None
+    ):
+        """
+        Initialize the orchestrator
+        
+        Args:
+            sampler: Adaptive replicate sampler; None asks each pair once
+            run_id: Existing run to attach to; a new id is generated if omitted
+            models: Model instances to use instead of those configured via API keys
+            queries: Queries to use instead of config/queries.json
+            tenants: Tenant definitions to use instead of config/tenants.json
+            recorder: Cassette recorder that captures every normalized result
+            db: Storage backend to use instead of the configured one
+            hedger: Deadline/hedging policy for provider calls (default budget if omitted)
+            provider_concurrency: Calls in flight at once per provider during a run
+            profiler: Run profiler that times each pair's phases (--profile)
+            flusher: Spool flusher; results are spooled locally and flushed to
+                the database in the background instead of written directly
+            week: Rotation week selecting which template queries run (default: this week)
+            archive: Raw payload archive; each response's provider payload is kept there
+        """
+        self.profiler = profiler
+        self.db = db if db is not None else create_storage()
+        self.flusher = flusher
+        # Where results and errors are written: the spool if there is one
+        self.writer = flusher.spool if flusher else self.db
+        self.sampler = sampler
+        self.recorder = recorder
+        self.archive = archive
+        self.provider_concurrency = provider_concurrency
+        self._pool = (
+            ThreadPoolExecutor(max_workers=sampler.max_replicates)
+            if sampler else None
+        )
+        self.run_id = run_id or self._new_run_id()
+        self.models = models if models is not None else self._initialize_models()
+        queries = self._load_queries() if queries is None else queries
+        try:
+            self.tenants = resolve_tenants(self._load_tenants() if tenants is None else tenants, queries)
+        except ValueError as e:
+            print(f"✗ ERROR: Invalid tenant config: {e}")
+            sys.exit(1)
+        # Register queries (active or not), models and tenants so responses can reference them
+        self.db.sync_config(queries, self.models, self.tenants)
+        # Template queries run in their rotation week only (the daemon follows the calendar unless pinned)
+        self._config_queries = queries
+        self._pinned_week = week is not None
+        self.rotating = rotating_ids(queries)
+        active = self._select_queries(rotation_week() if week is None else week)
+        generated = [q for q in queries if 'template' in q]
+        self.hedger = hedger or HedgedCaller()
+        hedged = [m for m in self.models if m.hedge]
+        if hedged:
+            self._seed_latencies(hedged)
         
         print(f"\n{'='*80}")
         print(f"AI CITATION MONITOR")
@@ -48,9 +144,53 @@ class MonitorOrchestrator:
         print(f"Run ID: {self.run_id}")
         print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"Models: {len(self.models)} active")
-        print(f"Queries: {len(self.queries)} active")
+        print(f"Tenants: {', '.join(tenant['id'] for tenant in self.tenants)}")
+        if flusher:
+            print(f"Spool: {flusher.spool.directory}")
+        if archive:
+            print(f"Raw archive: {archive.directory} ({archive.codec})")
+        print(f"Queries: {len(self.queries)} unique prompts ({len(active)} active queries)")
+        if generated:
+            print(f"Templates: {sum(1 for q in active if 'template' in q)} of {len(generated)} "
+                  f"generated queries this week (rotation week {self.week})")
+        if sampler:
+            print(f"Replicates: {sampler.min_replicates}-{sampler.max_replicates} per pair (adaptive)")
+        if hedged and self.hedger.budget.max_fraction > 0:
+            print(f"Hedging: {', '.join(m.model_id for m in hedged)} "
+                  f"(budget {self.hedger.budget.max_fraction:.0%} of calls)")
         print(f"{'='*80}\n")
     
+    def _seed_latencies(self, models: List):
+        """Prime the hedge trigger with each hedged model's latest stored latencies"""
+        tracker = self.hedger.tracker
+        for model in models:
+            rows = self.db.fetch_all("""
+                SELECT model_id, response_time_ms
+                FROM responses
+                WHERE model_id = %s AND response_time_ms IS NOT NULL
+                ORDER BY id DESC
+                LIMIT %s
+            """, (model.model_id, tracker.window))
+            tracker.seed(reversed(rows))
+    
+    def _select_queries(self, week: int) -> List[Dict]:
+        """
+        Select the queries asked in a rotation week (sets self.queries and self.query_tenants)
+        
+        Returns:
+            The week's active config queries, before prompts are shared
+        """
+        self.week = week
+        active = [q for q in self._config_queries if q.get('active', True) and in_rotation(q, week)]
+        # Each unique prompt is asked once and evaluated for every tenant tracking it
+        self.queries, self.query_tenants = share_prompts(active, self.tenants)
+        return active
+    
+    @staticmethod
+    def _new_run_id(prefix: str = 'run') -> str:
+        """Generate a unique run identifier"""
+        return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
+    
     def _initialize_models(self):
         """Initialize all active models that have API keys configured"""
         models = []
@@ -104,26 +244,6 @@ class MonitorOrchestrator:
             # except Exception as e:
             #     print(f"✗ Claude Opus 4.1 model failed to initialize: {e}")
         
-        # DeepSeek (commented out until implemented)
-        # if os.getenv("DEEPSEEK_API_KEY"):
-        #     try:
-        #         models.append(DeepSeekModel(os.getenv("DEEPSEEK_API_KEY")))
-        #         print("✓ DeepSeek model initialized")
-        #     except NotImplementedError:
-        #         print("⚠️  DeepSeek model not yet implemented")
-        #     except Exception as e:
-        #         print(f"✗ DeepSeek model failed to initialize: {e}")
-        
-        # Grok (commented out until implemented)
-        # if os.getenv("GROK_API_KEY"):
-        #     try:
-        #         models.append(GrokModel(os.getenv("GROK_API_KEY")))
-        #         print("✓ Grok model initialized")
-        #     except NotImplementedError:
-        #         print("⚠️  Grok model not yet implemented")
-        #     except Exception as e:
-        #         print(f"✗ Grok model failed to initialize: {e}")
-        
         # Perplexity
         if os.getenv("PERPLEXITY_API_KEY"):
             try:
@@ -132,15 +252,21 @@ class MonitorOrchestrator:
             except Exception as e:
                 print(f"✗ Perplexity model failed to initialize: {e}")
         
-        # Llama (commented out until implemented)
-        # if os.getenv("LLAMA_API_KEY"):
-        #     try:
-        #         models.append(LlamaModel(os.getenv("LLAMA_API_KEY")))
-        #         print("✓ Llama model initialized")
-        #     except NotImplementedError:
-        #         print("⚠️  Llama model not yet implemented")
-        #     except Exception as e:
-        #         print(f"✗ Llama model failed to initialize: {e}")
+        # OpenAI-compatible providers (xAI Grok, DeepSeek, Llama, ...) from config/providers.json
+        try:
+            provider_configs = load_provider_configs()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"✗ ERROR: Invalid config/providers.json: {e}")
+            sys.exit(1)
+        for config in provider_configs:
+            api_key = os.getenv(config.get('api_key_env', ''))
+            if not config.get('active', True) or not api_key:
+                continue
+            try:
+                models.append(OpenAICompatibleModel(api_key, config))
+                print(f"✓ {config['name']} model initialized")
+            except Exception as e:
+                print(f"✗ {config.get('name', config.get('id'))} model failed to initialize: {e}")
         
         if not models:
             print("✗ ERROR: No models initialized! Check your API keys in .env")
@@ -148,19 +274,16 @@ class MonitorOrchestrator:
         
         return models
     
-    def _load_queries(self):
-        """Load queries from config file"""
+    @staticmethod
+    def _load_queries():
+        """Load all queries (active and inactive, templates expanded) from config file"""
         config_path = os.path.join(os.path.dirname(__file__), 'config', 'queries.json')
         
         try:
             with open(config_path, 'r') as f:
                 data = json.load(f)
-                queries = [q for q in data['queries'] if q.get('active', True)]
-                
-            # Sync queries to database
-            self.db.sync_queries(data['queries'])
             
-            return queries
+            return expand_queries(data)
             
         except FileNotFoundError:
             print(f"✗ ERROR: Config file not found: {config_path}")
@@ -168,6 +291,25 @@ class MonitorOrchestrator:
         except json.JSONDecodeError as e:
             print(f"✗ ERROR: Invalid JSON in config file: {e}")
             sys.exit(1)
+        except ValueError as e:
+            print(f"✗ ERROR: Invalid query template: {e}")
+            sys.exit(1)
+    
+    def _load_tenants(self):
+        """Load tenant definitions from config file (the original single site if absent)"""
+        config_path = os.path.join(os.path.dirname(__file__), 'config', 'tenants.json')
+        
+        try:
+            with open(config_path, 'r') as f:
+                data = json.load(f)
+            
+            return data['tenants']
+            
+        except FileNotFoundError:
+            return DEFAULT_TENANTS
+        except json.JSONDecodeError as e:
+            print(f"✗ ERROR: Invalid JSON in tenant config: {e}")
+            sys.exit(1)
     
     def run(self):
         """Execute all queries across all models"""
@@ -175,70 +317,17 @@ class MonitorOrchestrator:
             # Start the run
             self.db.start_run(self.run_id)
             
-            total_queries = len(self.models) * len(self.queries)
-            completed = 0
+            self._run_pairs([(model, query) for model in self.models for query in self.queries])
             
-            # Iterate through each model
-            for model in self.models:
-                print(f"\n{'='*80}")
-                print(f"Testing Model: {model.model_name} ({model.model_id})")
-                print(f"{'='*80}\n")
-                
-                # Iterate through each query
-                for query in self.queries:
-                    completed += 1
-                    progress = f"[{completed}/{total_queries}]"
-                    
-                    print(f"{progress} Query: {query['text'][:60]}...")
-                    
-                    try:
-                        # Execute query
-                        result = model.query(query['text'])
-                        
-                        # Check if we got a valid response
-                        response_text = result.get('response_text', '')
-                        if not response_text or not response_text.strip():
-                            print(f"  ✗ Empty response (skipped) | {model.model_id} | {query['id']}")
-                            continue
-                        
-                        # Extract metadata
-                        search_query, cited_urls = model.extract_metadata(result)
-                        
-                        # Check if paintballevents.net is referenced
-                        paintballevents_ref = self._check_reference(
-                            cited_urls, 
-                            response_text
-                        )
-                        
-                        # Store result in database
-                        self.db.store_response(
-                            run_id=self.run_id,
-                            query_id=query['id'],
-                            query_text=query['text'],
-                            model_id=model.model_id,
-                            response_text=response_text,
-                            paintballevents_ref=paintballevents_ref,
-                            search_query=search_query,
-                            cited_urls=cited_urls,
-                            response_time_ms=result.get('response_time_ms')
-                        )
-                        
-                    except Exception as e:
-                        print(f"  ✗ Error: {str(e)[:100]}")
-                        # Log error and update error count (but don't store empty responses)
-                        self.db.store_error(
-                            self.run_id,
-                            query['id'],
-                            model.model_id,
-                            query['text'],
-                            str(e)
-                        )
+            # Counts and alerts below need every result in the database
+            self._drain_spool(required=True)
             
             # Complete the run
             self.db.complete_run(self.run_id)
             
             # Print summary
             self._print_summary()
+            check_alerts(self.db, self.run_id, self.rotating)
             
         except Exception as e:
             print(f"\n✗ FATAL ERROR: {e}")
@@ -246,42 +335,802 @@ class MonitorOrchestrator:
             raise
         
         finally:
+            if self._pool:
+                self._pool.shutdown(wait=False)
+            self._stop_spool()
             self.db.close()
     
-    def _check_reference(self, cited_urls: list, response_text: str) -> bool:
-        """Check if paintballevents.net is referenced in URLs or response text"""
-        # Check in cited URLs
-        for url in cited_urls:
-            if 'paintballevents.net' in url.lower():
-                return True
+    def run_daemon(self, catchup_minutes: int = 60, poll_seconds: int = 60):
+        """
+        Run continuously, asking each (model, query) pair on its own cadence
+        
+        Cadence comes from the query priority (see utils/cadence.py). Model
+        clients and the database connection stay warm between calls. Results
+        are grouped into one run per calendar day.
+        
+        Args:
+            catchup_minutes: Window over which overdue pairs are spread at startup
+            poll_seconds: Maximum time to sleep between schedule checks
+        """
+        def _handle_sigterm(signum, frame):
+            raise KeyboardInterrupt
+        
+        signal.signal(signal.SIGTERM, _handle_sigterm)
+        
+        scheduler = CadenceScheduler(
+            self.models,
+            self.queries,
+            self.db.get_last_run_times(),
+            catchup=timedelta(minutes=catchup_minutes)
+        )
+        print(f"✓ Daemon scheduled {len(scheduler)} model/query pairs")
+        
+        self.run_id = self._new_run_id('daemon')
+        run_day = None
+        
+        try:
+            while True:
+                now = datetime.now()
+                
+                # Roll over to a new run each day
+                if now.date() != run_day:
+                    if run_day is not None:
+                        self._drain_spool()
+                        self.db.complete_run(self.run_id)
+                        self._print_summary()
+                        check_alerts(self.db, self.run_id, self.rotating)
+                        self.run_id = self._new_run_id('daemon')
+                        
+                        # A new rotation week swaps the generated queries being asked
+                        week = rotation_week(now.date())
+                        if not self._pinned_week and week != self.week:
+                            self._select_queries(week)
+                            scheduler = CadenceScheduler(
+                                self.models,
+                                self.queries,
+                                self.db.get_last_run_times(),
+                                catchup=timedelta(minutes=catchup_minutes)
+                            )
+                            print(f"✓ Rotation week {week}: daemon rescheduled {len(scheduler)} model/query pairs")
+                    self.db.start_run(self.run_id)
+                    run_day = now.date()
+                
+                for model, query in scheduler.pop_due(now):
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] {model.model_id} | "
+                          f"Query: {query['text'][:60]}...")
+                    self._run_pair(model, query)
+                    scheduler.reschedule(model, query, datetime.now())
+                
+                next_due = scheduler.peek()
+                wait = poll_seconds
+                if next_due is not None:
+                    wait = min(wait, (next_due - datetime.now()).total_seconds())
+                if wait > 0:
+                    time.sleep(wait)
+        
+        except KeyboardInterrupt:
+            print("\n⏹  Daemon stopping")
+            if run_day is not None:
+                self._drain_spool()
+                self.db.complete_run(self.run_id)
+                self._print_summary()
+                check_alerts(self.db, self.run_id, self.rotating)
+        
+        except Exception as e:
+            print(f"\n✗ FATAL ERROR: {e}")
+            self.db.fail_run(self.run_id, str(e))
+            raise
+        
+        finally:
+            if self._pool:
+                self._pool.shutdown(wait=False)
+            self._stop_spool()
+            self.db.close()
+    
+    def enqueue_run(self) -> str:
+        """Create a run and one queue job per (model, query) pair for workers to claim"""
+        self._require_mysql("--enqueue")
+        try:
+            self.db.start_run(self.run_id)
+            JobQueue(self.db).enqueue(
+                self.run_id,
+                [model.model_id for model in self.models],
+                [query['id'] for query in self.queries]
+            )
+            return self.run_id
+        finally:
+            self.db.close()
+    
+    def run_worker(self, worker_id: Optional[str] = None,
+                   lease_seconds: int = 300, poll_seconds: int = 15):
+        """
+        Claim and execute queue jobs for self.run_id (created with enqueue_run())
+        
+        Any number of workers, on any machine, can serve the same run. A
+        worker only claims jobs for models it has initialized, waits while
+        other workers still hold leases (so a crashed worker's jobs get
+        reclaimed), and the last worker to see the queue drain completes
+        the run.
+        """
+        self._require_mysql("--worker")
+        run_id = self.run_id
+        worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        queue = JobQueue(self.db, lease_seconds=lease_seconds)
+        models = {model.model_id: model for model in self.models}
+        queries = {query['id']: query for query in self.queries}
+        model_ids = list(models)
+        
+        heartbeat = LeaseHeartbeat(worker_id, lease_seconds)
+        heartbeat.start()
+        print(f"✓ Worker {worker_id} serving run {run_id}")
+        
+        processed = 0
+        try:
+            while True:
+                job = queue.claim(run_id, worker_id, model_ids)
+                
+                if job is None:
+                    if queue.remaining(run_id, model_ids) == 0:
+                        break
+                    # Other workers hold the remaining leases; wait in case they crash
+                    time.sleep(poll_seconds)
+                    continue
+                
+                model = models[job['model_id']]
+                query = queries.get(job['query_id'])
+                if query is None:
+                    queue.fail(job['id'], worker_id, f"Unknown query: {job['query_id']}")
+                    continue
+                
+                processed += 1
+                print(f"[job {job['id']}] {model.model_id} | Query: {query['text'][:60]}...")
+                
+                heartbeat.track(job['id'])
+                try:
+                    if self.sampler:
+                        # Replicate failures are recorded per call; the job itself is done
+                        self._run_replicates(model, query)
+                    else:
+                        # Unlike _run_pair, let provider errors reach the queue so the job is retried
+                        self._record_outcome(model, query, self._execute_query(model, query))
+                    queue.complete(job['id'], worker_id)
+                except Exception as e:
+                    if job['attempts'] >= queue.max_attempts:
+                        self._record_error(model, query, e)
+                    else:
+                        print(f"  ⚠️  Attempt {job['attempts']}/{queue.max_attempts} failed, "
+                              f"job will be retried: {str(e)[:100]}")
+                    queue.fail(job['id'], worker_id, str(e))
+                finally:
+                    heartbeat.track(None)
+            
+            print(f"✓ Worker {worker_id} finished after {processed} jobs")
+            # The run may only be completed once this worker's results are in the database
+            self._drain_spool(required=True)
+            if queue.finish_run_if_drained(run_id):
+                self._print_summary()
+                check_alerts(self.db, run_id, self.rotating)
+        
+        finally:
+            heartbeat.stop()
+            if self._pool:
+                self._pool.shutdown(wait=False)
+            self._stop_spool()
+            self.db.close()
+    
+    def _require_mysql(self, mode: str):
+        """The job queue relies on MySQL row locking (SKIP LOCKED)"""
+        if self.db.backend != 'mysql':
+            raise ValueError(f"{mode} requires the MySQL storage backend (got {self.db.backend})")
+    
+    def run_shard(self, shard_index: int, shard_count: int):
+        """
+        Execute this process's share of the model x query matrix into self.run_id
+        
+        Every shard computes the same deterministic partition (see
+        utils/sharding.py), weighted by latency history from before the run
+        started, and writes into the shared run. The run stays 'running'
+        until finalize_run() is called once all shards are done.
+        """
+        try:
+            self.db.ensure_run(self.run_id)
+            
+            latencies = self.db.get_pair_latencies(before_run_id=self.run_id)
+            pairs = [(model.model_id, query['id']) for model in self.models for query in self.queries]
+            assignment = assign_shards(pairs, shard_count, latencies)
+            
+            mine = [
+                (model, query)
+                for model in self.models
+                for query in self.queries
+                if assignment[(model.model_id, query['id'])] == shard_index
+            ]
+            print(f"✓ Shard {shard_index}/{shard_count}: {len(mine)} of {len(pairs)} pairs")
+            
+            self._run_pairs(mine)
+            # Fail the shard rather than let --finalize count a partial run
+            self._drain_spool(required=True)
+            
+            print(f"✓ Shard {shard_index}/{shard_count} done (run stays open until --finalize)")
         
-        # Check in response text
-        if 'paintballevents.net' in response_text.lower():
-            return True
+        finally:
+            if self._pool:
+                self._pool.shutdown(wait=False)
+            self._stop_spool()
+            self.db.close()
+    
+    def _drain_spool(self, required: bool = False):
+        """
+        Wait until spooled results are in the database (no-op without a spool)
+        
+        Args:
+            required: Raise if results are still spooled (instead of warning)
+        """
+        if not self.flusher:
+            return
+        left = self.flusher.flush_now()
+        if left:
+            message = (f"{left} results still spooled in {self.flusher.spool.directory}; "
+                       f"recover them with: python run_monitor.py --flush-spool")
+            if required:
+                raise RuntimeError(message)
+            print(f"⚠️  {message}")
+    
+    def _stop_spool(self):
+        """Stop the flusher after a last attempt, reporting anything left behind"""
+        if not self.flusher:
+            return
+        left = self.flusher.stop()
+        if left:
+            print(f"⚠️  {left} results left in {self.flusher.spool.directory}; once the database "
+                  f"is reachable run: python run_monitor.py --flush-spool")
+    
+    def _estimate_latencies(self) -> Dict:
+        """EWMA response time per (model_id, query_id) from earlier runs"""
+        since = datetime.now() - timedelta(days=LATENCY_HISTORY_DAYS)
+        rows = self.db.fetch_all("""
+            SELECT model_id, query_id, response_time_ms
+            FROM responses
+            WHERE timestamp >= %s AND run_id <> %s AND response_time_ms IS NOT NULL
+            ORDER BY id
+        """, (since.strftime('%Y-%m-%d %H:%M:%S'), self.run_id))
+        return ewma_latencies(rows)
+    
+    def _run_pairs(self, pairs: List):
+        """
+        Run (model, query) pairs, longest expected duration first
+        
+        Single-shot runs are a pipeline: fetch (provider calls) -> parse
+        (metadata) -> match (citation checks) -> persist (one writer, as
+        the connection is not thread-safe). Fetch keeps up to
+        provider_concurrency calls in flight per provider, always starting
+        the longest pending pair whose provider has room; the other stages
+        have their own workers and bounded input queues, so a slow
+        database write never holds up a provider call until the queues
+        fill, and then new calls wait (backpressure). Replicate mode runs
+        pairs one at a time (its replicates already run concurrently).
+        """
+        by_key = {(model.model_id, query['id']): (model, query) for model, query in pairs}
+        ordered = longest_first(list(by_key), self._estimate_latencies())
+        
+        if self.sampler:
+            for completed, (key, _) in enumerate(ordered, 1):
+                model, query = by_key[key]
+                print(f"[{completed}/{len(ordered)}] {model.model_id} | Query: {query['text'][:60]}...")
+                self._run_pair(model, query)
+            return
+        
+        dispatcher = ProviderDispatcher(self.provider_concurrency)
+        for key, estimate in ordered:
+            model, query = by_key[key]
+            dispatcher.add(model.provider, (model, query), estimate)
+        
+        pipeline = Pipeline([
+            Stage('parse', self._parse_stage, PARSE_WORKERS),
+            Stage('match', self._match_stage, MATCH_WORKERS),
+            Stage('persist', self._persist_stage, 1)
+        ], on_error=self._stage_failed)
+        fetch_stats = pipeline.source('fetch', dispatcher.capacity)
+        
+        executor = ThreadPoolExecutor(max_workers=dispatcher.capacity)
+        running = {}
+        started = 0
+        try:
+            while dispatcher or running:
+                job = dispatcher.next_job()
+                while job:
+                    _, (model, query) = job
+                    started += 1
+                    print(f"[{started}/{len(ordered)}] {model.model_id} | Query: {query['text'][:60]}...")
+                    running[executor.submit(self._fetch_stage, model, query, fetch_stats)] = (model, query)
+                    job = dispatcher.next_job()
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    model, query = running.pop(future)
+                    dispatcher.release(model.provider)
+                    # Blocks while parsing is backed up, so no new calls start meanwhile
+                    pipeline.put(future.result())
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            # Results already fetched are still stored
+            print_stage_report(pipeline.close())
+    
+    def _fetch_stage(self, model, query: Dict, stats) -> Dict:
+        """Pipeline source (worker thread): call the provider; failures travel on as the item's error"""
+        start = time.perf_counter()
+        item = {'model': model, 'query': query}
+        try:
+            item['result'] = self._fetch(model, query)
+        except Exception as e:
+            item['error'] = e
+        stats.record(time.perf_counter() - start, failed='error' in item)
+        return item
+    
+    def _parse_stage(self, item: Dict) -> Dict:
+        """Pipeline stage: extract the search query and cited URLs"""
+        if 'error' not in item:
+            item['parsed'] = self._parse(item['model'], item['query'], item['result'])
+        return item
+    
+    def _match_stage(self, item: Dict) -> Dict:
+        """Pipeline stage: evaluate citations into the outcome"""
+        if 'error' not in item:
+            item['outcome'] = self._match(item['model'], item['query'], item['result'], item['parsed'])
+        return item
+    
+    def _persist_stage(self, item: Dict):
+        """Pipeline stage (single worker): store the outcome or error"""
+        if 'error' in item:
+            self._record_error(item['model'], item['query'], item['error'])
+        else:
+            self._record_outcome(item['model'], item['query'], item['outcome'])
+    
+    def _stage_failed(self, stage: str, item: Dict, error: Exception) -> Optional[Dict]:
+        """Pipeline error handler: a failed item is recorded as an error by persist"""
+        if stage == 'persist':
+            # Already in the writer thread; the write itself failed
+            self._record_error(item['model'], item['query'], error)
+            return None
+        return dict(item, error=error)
+    
+    def _run_pair(self, model, query: Dict):
+        """Ask one (model, query) pair once, or adaptively in replicate mode"""
+        if self.sampler:
+            self._run_replicates(model, query)
+            return
+        
+        try:
+            outcome = self._execute_query(model, query)
+            self._record_outcome(model, query, outcome)
+        except Exception as e:
+            self._record_error(model, query, e)
+    
+    def _phase(self, name: str, model=None, query: Optional[Dict] = None):
+        """Profile a phase of one pair when --profile is on (no-op otherwise)"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.phase(
+            name,
+            model.model_id if model else None,
+            query['id'] if query else None
+        )
+    
+    def _execute_query(self, model, query: Dict) -> Optional[Dict]:
+        """
+        Call the provider and evaluate the answer (safe to run in a worker thread)
+        
+        Returns:
+            Outcome dictionary, or None if the model returned an empty response
+        """
+        result = self._fetch(model, query)
+        return self._match(model, query, result, self._parse(model, query, result))
+    
+    def _fetch(self, model, query: Dict) -> Dict:
+        """Call the provider (under the model's deadline, hedged past its p95)"""
+        with self._phase('provider', model, query):
+            return self.hedger.call(model, lambda: model.query(query['text']))
+    
+    def _parse(self, model, query: Dict, result: Dict) -> Optional[Tuple[Optional[str], List[str]]]:
+        """(search_query, cited_urls) of a provider result, or None if the response is empty"""
+        # Check if we got a valid response
+        response_text = result.get('response_text', '')
+        if not response_text or not response_text.strip():
+            return None
+        
+        with self._phase('extraction', model, query):
+            return model.extract_metadata(result)
+    
+    def _match(self, model, query: Dict, result: Dict,
+               parsed: Optional[Tuple[Optional[str], List[str]]]) -> Optional[Dict]:
+        """Evaluate citations of a parsed result into an outcome (None for an empty response)"""
+        if parsed is None:
+            return None
+        search_query, cited_urls = parsed
+        response_text = result['response_text']
+        
+        with self._phase('match', model, query):
+            # Check if paintballevents.net is referenced
+            paintballevents_ref = self._check_reference(
+                cited_urls, 
+                response_text
+            )
+            
+            outcome = {
+                'response_text': response_text,
+                'search_query': search_query,
+                'cited_urls': cited_urls,
+                'paintballevents_ref': paintballevents_ref,
+                'tenant_refs': tenant_references(
+                    self.query_tenants.get(query['id'], []), cited_urls, response_text
+                ),
+                'response_time_ms': result.get('response_time_ms')
+            }
+        
+        if self.recorder:
+            self.recorder.record(model, query, outcome)
+        if self.archive:
+            outcome['response_key'] = self._archive_raw(model, query, result)
+        
+        return outcome
+    
+    def _archive_raw(self, model, query: Dict, result: Dict) -> Optional[str]:
+        """Archive a result's raw payload; its response_key, or None if archiving failed"""
+        response_key = uuid.uuid4().hex
+        try:
+            with self._phase('archive', model, query):
+                self.archive.put(result.get('raw_response'), response_key, self.run_id, model.model_id, query['id'])
+        except Exception as e:
+            # The payload is a convenience copy; never lose the result over it
+            print(f"  ⚠️  Raw payload not archived | {model.model_id} | {query['id']}: {str(e)[:100]}")
+            return None
+        return response_key
+    
+    def _record_outcome(self, model, query: Dict, outcome: Optional[Dict], replicate_index: int = 0):
+        """Store an outcome from _execute_query in the database"""
+        if outcome is None:
+            print(f"  ✗ Empty response (skipped) | {model.model_id} | {query['id']}")
+            return
         
-        return False
+        # Store result in database
+        with self._phase('db', model, query):
+            self.writer.store_response(
+                run_id=self.run_id,
+                query_id=query['id'],
+                query_text=query['text'],
+                model_id=model.model_id,
+                response_text=outcome['response_text'],
+                paintballevents_ref=outcome['paintballevents_ref'],
+                search_query=outcome['search_query'],
+                cited_urls=outcome['cited_urls'],
+                response_time_ms=outcome['response_time_ms'],
+                replicate_index=replicate_index,
+                tenant_refs=outcome.get('tenant_refs'),
+                response_key=outcome.get('response_key')
+            )
+    
+    def _record_error(self, model, query: Dict, error: Exception):
+        """Log a failed query against the run"""
+        print(f"  ✗ Error: {str(error)[:100]}")
+        # Log error and update error count (but don't store empty responses)
+        with self._phase('db', model, query):
+            self.writer.store_error(
+                self.run_id,
+                query['id'],
+                model.model_id,
+                query['text'],
+                str(error)
+            )
+    
+    def _run_replicates(self, model, query: Dict):
+        """
+        Sample a (model, query) pair repeatedly until its citation rate is settled
+        
+        Replicates within a wave run concurrently; database writes stay on
+        the main thread because the connection is not thread-safe.
+        """
+        successes = 0
+        trials = 0
+        attempted = 0
+        
+        while True:
+            wave = self.sampler.next_wave(successes, trials, attempted)
+            if not wave:
+                break
+            
+            futures = [
+                self._pool.submit(self._execute_query, model, query)
+                for _ in range(wave)
+            ]
+            
+            for future in futures:
+                replicate_index = attempted
+                attempted += 1
+                
+                try:
+                    outcome = future.result()
+                    self._record_outcome(model, query, outcome, replicate_index)
+                except Exception as e:
+                    self._record_error(model, query, e)
+                    continue
+                
+                if outcome is not None:
+                    trials += 1
+                    successes += int(outcome['paintballevents_ref'])
+        
+        lower, upper = wilson_interval(successes, trials)
+        print(f"  → {successes}/{trials} cited over {attempted} calls "
+              f"(95% CI {lower:.0%}-{upper:.0%})")
+    
+    def _check_reference(self, cited_urls: list, response_text: str) -> bool:
+        """Check if paintballevents.net (or a subdomain) is cited by URL host or named in the text"""
+        return cites_domain('paintballevents.net', cited_urls, response_text)
     
     def _print_summary(self):
         """Print summary of the run"""
-        summary = self.db.get_run_summary(self.run_id)
-        
-        print(f"\n{'='*80}")
-        print(f"RUN SUMMARY")
-        print(f"{'='*80}")
-        print(f"Run ID: {summary['run_id']}")
-        print(f"Status: {summary['status']}")
-        print(f"Started: {summary['started_at']}")
-        print(f"Completed: {summary['completed_at']}")
-        print(f"Queries executed: {summary['queries_executed']}")
-        print(f"Errors: {summary['errors_count']}")
-        print(f"{'='*80}\n")
+        print_run_summary(self.db.get_run_summary(self.run_id))
+
+
+def print_run_summary(summary: Dict):
+    """Print summary statistics for a run"""
+    print(f"\n{'='*80}")
+    print(f"RUN SUMMARY")
+    print(f"{'='*80}")
+    print(f"Run ID: {summary['run_id']}")
+    print(f"Status: {summary['status']}")
+    print(f"Started: {summary['started_at']}")
+    print(f"Completed: {summary['completed_at']}")
+    print(f"Queries executed: {summary['queries_executed']}")
+    print(f"Errors: {summary['errors_count']}")
+    print(f"{'='*80}\n")
+
+
+def check_alerts(db, run_id: str, rotating: AbstractSet[str] = frozenset()):
+    """Fold a completed run into the citation rate alerts (never fails the run)"""
+    if not db.supports_alerts:
+        return
+    try:
+        check_run(db, run_id, rotating=rotating)
+    except Exception as e:
+        print(f"⚠️  Citation rate alerts failed: {e}")
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="AI Citation Monitor")
+    parser.add_argument(
+        '--storage', choices=BACKENDS,
+        help="Storage backend (default: MONITOR_STORAGE or mysql)"
+    )
+    parser.add_argument(
+        '--sqlite-path', metavar='PATH',
+        help="SQLite database file (default: SQLITE_PATH or data/monitor.db)"
+    )
+    parser.add_argument(
+        '--replicates', type=int, metavar='MAX',
+        help="Sample each (model, query) pair up to MAX times, stopping adaptively"
+    )
+    parser.add_argument(
+        '--min-replicates', type=int, default=3, metavar='N',
+        help="Replicates always taken per pair in replicate mode (default: 3)"
+    )
+    parser.add_argument(
+        '--ci-width', type=float, default=0.3, metavar='W',
+        help="Stop sampling once the 95%% interval is at most W wide (default: 0.3)"
+    )
+    parser.add_argument(
+        '--daemon', action='store_true',
+        help="Run continuously, scheduling each pair on a cadence driven by query priority"
+    )
+    parser.add_argument(
+        '--catchup-minutes', type=int, default=60, metavar='M',
+        help="Daemon mode: spread overdue pairs over M minutes at startup (default: 60)"
+    )
+    parser.add_argument(
+        '--enqueue', action='store_true',
+        help="Create a run and queue one job per pair for --worker processes, then exit"
+    )
+    parser.add_argument(
+        '--worker', action='store_true',
+        help="Claim and execute queued jobs for --run-id until the queue drains"
+    )
+    parser.add_argument(
+        '--run-id', metavar='RUN_ID',
+        help="Existing run to work on (required with --worker)"
+    )
+    parser.add_argument(
+        '--lease-seconds', type=int, default=300, metavar='S',
+        help="Worker mode: job lease length before a silent worker's job is reclaimed (default: 300)"
+    )
+    parser.add_argument(
+        '--shard', metavar='i/N',
+        help="Execute shard i of N (0-based) of the model x query matrix into --run-id"
+    )
+    parser.add_argument(
+        '--finalize', action='store_true',
+        help="Reconcile counters for --run-id and mark it completed (after all shards)"
+    )
+    parser.add_argument(
+        '--rotation-week', type=int, metavar='W',
+        help="Ask the template queries of rotation week W instead of this week's (e.g. to pin shards)"
+    )
+    parser.add_argument(
+        '--spool', metavar='DIR',
+        help="Spool results to DIR and flush them to the database in the background "
+             "(default with MySQL; DIR defaults to SPOOL_DIR or data/spool)"
+    )
+    parser.add_argument(
+        '--no-spool', action='store_true',
+        help="Write results straight to the database"
+    )
+    parser.add_argument(
+        '--flush-spool', action='store_true',
+        help="Store results left in the spool by an earlier run (e.g. during a database outage), then exit"
+    )
+    parser.add_argument(
+        '--archive', nargs='?', const='', metavar='DIR',
+        help="Keep each raw provider payload in a compressed archive in DIR "
+             "(default: ARCHIVE_DIR or data/archive) for offline re-parsing"
+    )
+    parser.add_argument(
+        '--record', metavar='DIR',
+        help="Capture every normalized provider result to cassette files in DIR"
+    )
+    parser.add_argument(
+        '--replay', metavar='DIR',
+        help="Serve recorded results from DIR instead of calling providers (offline load testing)"
+    )
+    parser.add_argument(
+        '--replay-latency', default='recorded', metavar='SPEC',
+        help="Replay latency: recorded, fixed:MS, uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA"
+    )
+    parser.add_argument(
+        '--replay-time-scale', type=float, default=1.0, metavar='X',
+        help="Replay: multiply actual sleeps by X (reported latency is unscaled)"
+    )
+    parser.add_argument(
+        '--replay-error-rate', type=float, default=0.0, metavar='P',
+        help="Replay: probability of an injected provider error"
+    )
+    parser.add_argument(
+        '--replay-429-rate', type=float, default=0.0, metavar='P',
+        help="Replay: probability of an injected 429 rate limit error"
+    )
+    parser.add_argument(
+        '--replay-copies', type=int, default=1, metavar='N',
+        help="Replay: clone each recorded model N times as separate synthetic models"
+    )
+    parser.add_argument(
+        '--synthetic-queries', type=int, metavar='N',
+        help="Replay: use N synthetic queries instead of config/queries.json"
+    )
+    parser.add_argument(
+        '--hedge-budget', type=float, default=0.1, metavar='F',
+        help="Allow hedged duplicate calls for up to F of hedge-enabled calls; 0 disables (default: 0.1)"
+    )
+    parser.add_argument(
+        '--provider-concurrency', type=int, default=1, metavar='N',
+        help="Calls in flight at once per provider; slowest pairs start first (default: 1)"
+    )
+    parser.add_argument(
+        '--profile', metavar='DIR',
+        help="Write per-phase stack samples, top memory allocators and a per-pair timing trace to DIR"
+    )
+    args = parser.parse_args(argv)
+    
+    if (args.synthetic_queries or args.replay_copies > 1) and not args.replay:
+        parser.error("--synthetic-queries and --replay-copies require --replay")
+    
+    if (args.worker or args.shard or args.finalize) and not args.run_id:
+        parser.error("--worker, --shard and --finalize require --run-id")
+    
+    if args.spool and args.no_spool:
+        parser.error("--spool and --no-spool are mutually exclusive")
+    
+    if args.provider_concurrency < 1:
+        parser.error("--provider-concurrency must be at least 1")
+    
+    if args.replicates is not None and args.replicates < 1:
+        parser.error("--replicates must be at least 1")
+    
+    if args.min_replicates < 1:
+        parser.error("--min-replicates must be at least 1")
+    
+    if args.shard:
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    return args
 
 
 def main():
     """Main entry point"""
+    args = parse_args()
+    
+    sampler = None
+    if args.replicates is not None:
+        sampler = AdaptiveSampler(
+            max_replicates=args.replicates,
+            min_replicates=args.min_replicates,
+            max_ci_width=args.ci_width
+        )
+    
+    profiler = RunProfiler(args.profile, _STARTED) if args.profile else None
+    archive = None
+    
     try:
-        orchestrator = MonitorOrchestrator()
-        orchestrator.run()
+        if args.finalize:
+            # Finalizing needs only the database, not model API keys
+            with create_storage(args.storage, args.sqlite_path) as db:
+                db.finalize_run(args.run_id)
+                print_run_summary(db.get_run_summary(args.run_id))
+                check_alerts(db, args.run_id, rotating_ids(MonitorOrchestrator._load_queries()))
+            return
+        
+        if args.flush_spool:
+            spool = ResponseSpool(args.spool)
+            with create_storage(args.storage, args.sqlite_path) as db:
+                stats = flush_spool(spool, db)
+            print(f"✓ Flushed {stats['responses']} responses and {stats['errors']} errors "
+                  f"from {stats['segments']} segments in {spool.directory}")
+            for run_id, count in sorted(stats['runs'].items()):
+                print(f"  {run_id}: {count} results (close an interrupted run with --finalize --run-id {run_id})")
+            return
+        
+        models = None
+        queries = None
+        if args.replay:
+            profile = ReplayProfile(
+                latency=args.replay_latency,
+                time_scale=args.replay_time_scale,
+                error_rate=args.replay_error_rate,
+                rate_limit_rate=args.replay_429_rate
+            )
+            models = synthetic_models(load_cassettes(args.replay, profile), args.replay_copies)
+            if args.synthetic_queries:
+                queries = synthetic_queries(args.synthetic_queries)
+        
+        db = create_storage(args.storage, args.sqlite_path)
+        flusher = None
+        if not args.no_spool and (args.spool or db.backend == 'mysql') and not args.enqueue:
+            flusher = SpoolFlusher(
+                ResponseSpool(args.spool),
+                lambda: create_storage(args.storage, args.sqlite_path)
+            )
+            flusher.start()
+        if args.archive is not None and not args.enqueue:
+            archive = RawArchive(args.archive or None)
+        
+        with profiler.phase('init') if profiler else nullcontext():
+            orchestrator = MonitorOrchestrator(
+                sampler=sampler,
+                run_id=args.run_id,
+                models=models,
+                queries=queries,
+                recorder=CassetteRecorder(args.record) if args.record else None,
+                db=db,
+                hedger=HedgedCaller(budget=HedgeBudget(args.hedge_budget)),
+                provider_concurrency=args.provider_concurrency,
+                profiler=profiler,
+                flusher=flusher,
+                week=args.rotation_week,
+                archive=archive
+            )
+        if profiler:
+            profiler.snapshot('after init')
+        if args.enqueue:
+            run_id = orchestrator.enqueue_run()
+            print(f"Start workers with: python run_monitor.py --worker --run-id {run_id}")
+        elif args.shard:
+            orchestrator.run_shard(*args.shard)
+        elif args.worker:
+            orchestrator.run_worker(lease_seconds=args.lease_seconds)
+        elif args.daemon:
+            orchestrator.run_daemon(catchup_minutes=args.catchup_minutes)
+        else:
+            orchestrator.run()
         
     except KeyboardInterrupt:
         print("\n\n✗ Interrupted by user")
@@ -292,6 +1141,12 @@ def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    
+    finally:
+        if archive:
+            archive.close()
+        if profiler:
+            profiler.write()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+AI Citation Monitor - Response Search
+Full-text search over stored responses (MySQL FULLTEXT / SQLite FTS5) for
+competitor names, event titles and the like
+
+Usage:
+    python search_responses.py "Lone Star" [--model gpt-5] [--query q1]
+    python search_responses.py '"Operation Lone Star" texas' --since 2025-10-01 --until 2025-10-31
+    python search_responses.py magfed --limit 100 --json results.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.storage import BACKENDS, create_storage
+
+
+def parse_date(value: str) -> datetime:
+    """argparse type for YYYY-MM-DD dates"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Search stored AI responses")
+    parser.add_argument('text', help='Search terms (all required); "quoted text" matches as a phrase')
+    parser.add_argument('--storage', choices=BACKENDS, help="Storage backend (default: MONITOR_STORAGE or mysql)")
+    parser.add_argument('--sqlite-path', metavar='PATH', help="SQLite database file")
+    parser.add_argument('--model', help="Only responses from this model id")
+    parser.add_argument('--query', help="Only responses to this query id")
+    parser.add_argument('--since', type=parse_date, help="Only responses on or after this date (YYYY-MM-DD)")
+    parser.add_argument('--until', type=parse_date, help="Only responses on or before this date (YYYY-MM-DD)")
+    parser.add_argument('--limit', type=int, default=20, help="Maximum results (default: 20)")
+    parser.add_argument('--json', metavar='PATH', help="Also write results as JSON")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main entry point"""
+    load_dotenv()
+    args = parse_args()
+    
+    with create_storage(args.storage, args.sqlite_path) as db:
+        start = time.perf_counter()
+        results = db.search_responses(
+            args.text,
+            model_id=args.model,
+            query_id=args.query,
+            since=args.since,
+            # --until is inclusive: everything before the next midnight
+            until=args.until + timedelta(days=1) if args.until else None,
+            limit=args.limit
+        )
+        elapsed_ms = (time.perf_counter() - start) * 1000
+    
+    print(f"\n{len(results)} result(s) for {args.text!r} in {elapsed_ms:.1f} ms\n")
+    for rank, row in enumerate(results, 1):
+        cited = '✓' if row['paintballevents_referenced'] else '✗'
+        print(f"{rank:>3}. [{row['score']:.3g}] {row['timestamp']} | {row['model_id']} | "
+              f"{row['query_id']} | cited {cited} | #{row['id']}")
+        print(f"     {row['snippet']}")
+        print()
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"✓ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+AI Citation Monitor - Analytics Mirror
+Keeps a local columnar copy of stored responses for heavy ad-hoc analysis,
+so analysts stop scanning the production database. Only responses with an
+id above the last synced watermark are read (primary key pages) and
+appended as Parquet files partitioned by month (month=YYYY-MM/). Derived
+columns (registrable cited domains, cited flag, counts) are computed once
+at sync time. Query the mirror with DuckDB or anything that reads Parquet.
+
+Usage:
+    python sync_analytics.py                        # append new responses to data/analytics
+    python sync_analytics.py --query "SELECT model_id, AVG(cited::INT) FROM responses GROUP BY 1"
+    python sync_analytics.py --compact              # merge each month's files into one
+    python sync_analytics.py --rebuild              # start over (e.g. after backfill_citations.py)
+
+Requires pyarrow (and duckdb for --query): pip install pyarrow duckdb
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # checked in main()
+    pa = pq = None
+
+try:
+    import duckdb
+except ImportError:  # only --query needs it
+    duckdb = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.storage import BACKENDS, create_storage
+from utils.urls import url_domain
+
+DEFAULT_MIRROR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'analytics')
+
+WATERMARK_FILE = '_watermark.json'
+PARTITION_PREFIX = 'month='
+PART_SUFFIX = '.parquet'
+
+# Responses per page read from the database (and per Parquet file at most)
+SYNC_BATCH = 20000
+
+# One keyset page of responses between the watermark and a bound
+PAGE_SQL = """
+    SELECT id, run_id, timestamp, query_id, model_id, replicate_index, query_text, response,
+           paintballevents_referenced, search_query, cited_urls, response_time_ms, error
+    FROM responses
+    WHERE id > %s AND id < %s
+    ORDER BY id
+    LIMIT %s
+"""
+
+# Runs still in progress with their earliest and latest response: later rows
+# may commit with ids below rows already stored, so the mirror stops short
+OPEN_RUNS_SQL = """
+    SELECT u.run_id, MIN(r.id) AS floor_id, MAX(r.timestamp) AS last_response_at
+    FROM runs u
+    JOIN responses r ON r.run_id = u.run_id
+    WHERE u.status = 'running'
+    GROUP BY u.run_id
+    ORDER BY floor_id
+"""
+
+# A running run without responses for this long is taken as dead (killed,
+# or a shard/worker run never finalized) and no longer holds the sync back
+DEFAULT_STALE_HOURS = 24
+
+
+def mirror_schema():
+    """Arrow schema of the mirrored responses (month is the partition directory)"""
+    return pa.schema([
+        ('id', pa.int64()),
+        ('run_id', pa.string()),
+        ('timestamp', pa.timestamp('s')),
+        ('date', pa.date32()),
+        ('query_id', pa.string()),
+        ('model_id', pa.string()),
+        ('replicate_index', pa.int32()),
+        ('query_text', pa.string()),
+        ('response', pa.string()),
+        ('search_query', pa.string()),
+        ('response_time_ms', pa.int32()),
+        ('error', pa.string()),
+        ('cited', pa.bool_()),
+        ('cited_urls', pa.list_(pa.string())),
+        ('cited_domains', pa.list_(pa.string())),
+        ('cited_url_count', pa.int32()),
+        ('response_chars', pa.int32())
+    ])
+
+
+def _timestamp(value) -> datetime:
+    """Response timestamp as a datetime (SQLite returns text)"""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def derive(row: Dict) -> Dict:
+    """Mirror record of a responses row, with the derived columns filled in"""
+    cited_urls = row['cited_urls']
+    if isinstance(cited_urls, (str, bytes)):
+        cited_urls = json.loads(cited_urls)
+    cited_urls = cited_urls or []
+    
+    domains = []
+    for url in cited_urls:
+        domain = url_domain(url)
+        if domain and domain not in domains:
+            domains.append(domain)
+    
+    timestamp = _timestamp(row['timestamp'])
+    return {
+        'id': row['id'],
+        'run_id': row['run_id'],
+        'timestamp': timestamp,
+        'date': timestamp.date(),
+        'query_id': row['query_id'],
+        'model_id': row['model_id'],
+        'replicate_index': row['replicate_index'],
+        'query_text': row['query_text'],
+        'response': row['response'],
+        'search_query': row['search_query'],
+        'response_time_ms': row['response_time_ms'],
+        'error': row['error'],
+        'cited': bool(row['paintballevents_referenced']),
+        'cited_urls': cited_urls,
+        'cited_domains': domains,
+        'cited_url_count': len(cited_urls),
+        'response_chars': len(row['response'] or '')
+    }
+
+
+def _part_range(name: str) -> Optional[Tuple[int, int]]:
+    """(first_id, last_id) of a part file name, or None for other files"""
+    if not name.startswith('part-') or not name.endswith(PART_SUFFIX):
+        return None
+    try:
+        first, last = name[len('part-'):-len(PART_SUFFIX)].split('-')
+        return int(first), int(last)
+    except ValueError:
+        return None
+
+
+def _partitions(directory: str) -> List[str]:
+    """Month partition directories of the mirror, oldest first"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.startswith(PARTITION_PREFIX) and os.path.isdir(os.path.join(directory, name))
+    )
+
+
+def _parts(partition: str) -> List[str]:
+    """Part files of a partition, in id order"""
+    names = [name for name in os.listdir(partition) if _part_range(name)]
+    return [os.path.join(partition, name) for name in sorted(names, key=_part_range)]
+
+
+def load_watermark(directory: str) -> int:
+    """
+    Last synced response id
+    
+    The highest id in any part file counts too, so a sync interrupted
+    after writing a file but before saving the watermark does not append
+    that file's rows again.
+    """
+    last_id = 0
+    try:
+        with open(os.path.join(directory, WATERMARK_FILE), 'r') as f:
+            last_id = int(json.load(f)['last_id'])
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+    for partition in _partitions(directory):
+        for path in _parts(partition):
+            last_id = max(last_id, _part_range(os.path.basename(path))[1])
+    return last_id
+
+
+def save_watermark(directory: str, last_id: int):
+    """Record the last synced response id (atomic replace)"""
+    path = os.path.join(directory, WATERMARK_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'last_id': last_id, 'synced_at': datetime.now().isoformat(timespec='seconds')}, f)
+    os.replace(path + '.tmp', path)
+
+
+def write_part(directory: str, month: str, records: List[Dict]) -> str:
+    """Write records (in id order) as a new part file of a month partition"""
+    partition = os.path.join(directory, f"{PARTITION_PREFIX}{month}")
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, f"part-{records[0]['id']:012d}-{records[-1]['id']:012d}{PART_SUFFIX}")
+    table = pa.Table.from_pylist(records, schema=mirror_schema())
+    pq.write_table(table, path + '.tmp', compression='zstd')
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def open_runs(db, stale_hours: float = DEFAULT_STALE_HOURS) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Running runs with stored responses, split into (live, stale)
+    
+    Each is a dict with run_id, floor_id and last_response_at. A run is
+    stale when its latest response is older than stale_hours (0 makes
+    every running run stale). Live runs come first response first.
+    """
+    cutoff = datetime.now() - timedelta(hours=stale_hours)
+    live, stale = [], []
+    for row in db.fetch_all(OPEN_RUNS_SQL):
+        (stale if _timestamp(row['last_response_at']) < cutoff else live).append(row)
+    return live, stale
+
+
+def sync(db, directory: str, after_id: int, batch_size: int = SYNC_BATCH,
+         stale_hours: float = DEFAULT_STALE_HOURS) -> Dict:
+    """
+    Append responses after after_id to the mirror, one database page at a time
+    
+    Each page is split by month into part files, then the watermark moves
+    past it, so an interrupted sync resumes with the next page. Rows from
+    the first response of a still-running run on wait for the next sync,
+    unless the run has had no responses for stale_hours.
+    
+    Returns:
+        Dict with rows, files, last_id, held_by (open_runs() row or None),
+        stale (open_runs() rows synced past) and seconds
+    """
+    stats = {'rows': 0, 'files': 0, 'last_id': after_id, 'held_by': None}
+    start = time.perf_counter()
+    live, stats['stale'] = open_runs(db, stale_hours)
+    before_id = sys.maxsize
+    if live:
+        before_id = live[0]['floor_id']
+        stats['held_by'] = live[0]
+    while True:
+        rows = db.fetch_all(PAGE_SQL, (after_id, before_id, batch_size))
+        if not rows:
+            break
+        
+        by_month: Dict[str, List[Dict]] = {}
+        for row in rows:
+            record = derive(row)
+            by_month.setdefault(record['timestamp'].strftime('%Y-%m'), []).append(record)
+        for month, records in sorted(by_month.items()):
+            write_part(directory, month, records)
+            stats['files'] += 1
+        
+        after_id = rows[-1]['id']
+        save_watermark(directory, after_id)
+        stats['rows'] += len(rows)
+        stats['last_id'] = after_id
+        rate = stats['rows'] / max(time.perf_counter() - start, 1e-9)
+        print(f"  ✓ {stats['rows']:,} responses | last id {after_id} | {rate:,.0f}/s")
+    
+    stats['seconds'] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+def compact(directory: str) -> int:
+    """
+    Merge each month's part files into one file (fewer, larger files scan faster)
+    
+    The merged file is put in place before the parts are removed; parts
+    left behind by an interrupted compaction are covered by a merged
+    file's id range and removed first.
+    
+    Returns:
+        Number of part files merged away
+    """
+    merged = 0
+    for partition in _partitions(directory):
+        parts = _parts(partition)
+        ranges = {path: _part_range(os.path.basename(path)) for path in parts}
+        covered = [
+            path for path in parts
+            if any(other != path and ranges[other][0] <= ranges[path][0] and ranges[path][1] <= ranges[other][1]
+                   for other in parts)
+        ]
+        for path in covered:
+            os.remove(path)
+        parts = [path for path in parts if path not in covered]
+        if len(parts) < 2:
+            continue
+        
+        table = pq.read_table(parts, schema=mirror_schema()).sort_by('id')
+        first, last = ranges[parts[0]][0], ranges[parts[-1]][1]
+        path = os.path.join(partition, f"part-{first:012d}-{last:012d}{PART_SUFFIX}")
+        pq.write_table(table, path + '.tmp', compression='zstd')
+        os.replace(path + '.tmp', path)
+        for part in parts:
+            if part != path:
+                os.remove(part)
+        merged += len(parts)
+        print(f"  ✓ {os.path.basename(partition)}: {len(parts)} files → 1 ({table.num_rows:,} rows)")
+    return merged
+
+
+def rebuild(directory: str):
+    """Remove the mirrored partitions and watermark (other files are left alone)"""
+    for partition in _partitions(directory):
+        shutil.rmtree(partition)
+    try:
+        os.remove(os.path.join(directory, WATERMARK_FILE))
+    except FileNotFoundError:
+        pass
+
+
+def run_query(directory: str, sql: str, limit: int):
+    """Run SQL in DuckDB against the mirror, exposed as the view responses"""
+    connection = duckdb.connect()
+    pattern = os.path.join(directory, f"{PARTITION_PREFIX}*", f"*{PART_SUFFIX}").replace("'", "''")
+    connection.execute(f"CREATE VIEW responses AS SELECT * FROM read_parquet('{pattern}', hive_partitioning = true)")
+    
+    start = time.perf_counter()
+    cursor = connection.execute(sql)
+    columns = [column[0] for column in cursor.description]
+    rows = cursor.fetchall()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    
+    print('\t'.join(columns))
+    for row in rows[:limit]:
+        print('\t'.join('' if value is None else str(value) for value in row))
+    if len(rows) > limit:
+        print(f"... {len(rows) - limit} more")
+    print(f"\n{len(rows):,} rows in {elapsed_ms:.0f}ms")
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Sync and query a local Parquet mirror of stored responses")
+    parser.add_argument('--storage', choices=BACKENDS, help="Storage backend (default: MONITOR_STORAGE or mysql)")
+    parser.add_argument('--sqlite-path', metavar='PATH', help="SQLite database file")
+    parser.add_argument('--dir', metavar='DIR', help="Mirror directory (default: ANALYTICS_DIR or data/analytics)")
+    parser.add_argument('--batch-size', type=int, default=SYNC_BATCH,
+                        help=f"Responses per database page (default: {SYNC_BATCH:,})")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Drop the mirror and sync everything again (after rows were rewritten)")
+    parser.add_argument('--compact', action='store_true', help="Merge each month's part files after syncing")
+    parser.add_argument('--stale-after', type=float, default=DEFAULT_STALE_HOURS, metavar='HOURS',
+                        help="Sync past running runs without responses for this long "
+                             f"(default: {DEFAULT_STALE_HOURS})")
+    parser.add_argument('--force', action='store_true',
+                        help="Sync past every running run (their late rows are missed until --rebuild)")
+    parser.add_argument('--no-sync', action='store_true', help="Don't read the database (with --compact or --query)")
+    parser.add_argument('--query', metavar='SQL', help="Run SQL over the mirror (view: responses) with DuckDB")
+    parser.add_argument('--limit', type=int, default=50, help="Query rows to print (default: 50)")
+    args = parser.parse_args(argv)
+    
+    if args.stale_after < 0:
+        parser.error("--stale-after must not be negative")
+    return args
+
+
+def main():
+    """Main entry point"""
+    load_dotenv()
+    args = parse_args()
+    directory = args.dir or os.getenv('ANALYTICS_DIR') or DEFAULT_MIRROR_DIR
+    
+    if pa is None:
+        print("✗ ERROR: The analytics mirror needs pyarrow: pip install pyarrow")
+        sys.exit(1)
+    if args.query and duckdb is None:
+        print("✗ ERROR: --query needs duckdb: pip install duckdb")
+        sys.exit(1)
+    os.makedirs(directory, exist_ok=True)
+    
+    if args.rebuild:
+        rebuild(directory)
+        print(f"✓ Cleared the mirror in {directory}")
+    
+    if not args.no_sync:
+        after_id = load_watermark(directory)
+        print(f"Syncing responses after id {after_id} into {directory}")
+        with create_storage(args.storage, args.sqlite_path) as db:
+            stats = sync(db, directory, after_id, args.batch_size, 0 if args.force else args.stale_after)
+        print(f"✓ Mirrored {stats['rows']:,} responses in {stats['files']} files ({stats['seconds']}s); "
+              f"watermark at id {stats['last_id']}")
+        for run in stats['stale']:
+            print(f"⚠️  Synced past run {run['run_id']}, still marked running (last response "
+                  f"{run['last_response_at']}); if it was interrupted, close it with: "
+                  f"python run_monitor.py --finalize --run-id {run['run_id']}")
+        held = stats['held_by']
+        if held:
+            print(f"⚠️  Stopped before run {held['run_id']} (still running, last response "
+                  f"{held['last_response_at']}); its responses are mirrored once it completes.")
+            print(f"   If it was interrupted, close it with: python run_monitor.py --finalize --run-id {held['run_id']}")
+            print(f"   (or sync past it with --force; it is skipped anyway after {args.stale_after:g}h without responses)")
+    
+    if args.compact:
+        print(f"✓ Compacted {compact(directory)} part files")
+    
+    if args.query:
+        run_query(directory, args.query, args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Shared fixtures for the AI Citation Monitor tests
+Run from the repository root: python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.sqlite_storage import SQLiteStorage
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """Throwaway SQLite storage with query q1, model m1 and a running run r1"""
+    db = SQLiteStorage(str(tmp_path / 'monitor.db'))
+    db.connection.execute("INSERT INTO queries (id, query_text) VALUES ('q1', 'paintball events near me')")
+    db.connection.execute("INSERT INTO models (id, name, provider) VALUES ('m1', 'Model One', 'test')")
+    db.connection.commit()
+    db.start_run('r1')
+    yield db
+    db.close()
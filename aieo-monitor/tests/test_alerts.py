@@ -0,0 +1,124 @@
+"""
+Tests for utils/alerts.py (EWMA baseline, CUSUM change detection, run folding)
+"""
+import json
+
+import pytest
+
+from database.base_storage import response_row
+from utils.alerts import (
+    MIN_OBSERVATIONS, MODEL_WIDE, AlertSink, check_run, new_state, observe_run, update_state
+)
+
+
+def run_rows(model_id, results):
+    """observe_run() rows from {query_id: (cited, trials)}"""
+    return [
+        {'model_id': model_id, 'query_id': query_id, 'cited': cited, 'trials': trials}
+        for query_id, (cited, trials) in results.items()
+    ]
+
+
+def test_baseline_is_a_plain_mean_while_it_forms():
+    state = new_state()
+    for cited in (1, 0, 1):
+        assert update_state(state, cited, 1) is None
+    assert state['observations'] == MIN_OBSERVATIONS
+    assert state['ewma_rate'] == pytest.approx(2 / 3)
+    assert state['cusum_low'] == state['cusum_high'] == 0.0
+
+
+def test_steady_rate_never_alerts():
+    state = new_state()
+    changes = [update_state(state, 6, 10) for _ in range(200)]
+    assert changes.count(None) == 200
+    assert state['ewma_rate'] == pytest.approx(0.6)
+
+
+def test_drop_is_detected_once_and_baseline_reforms():
+    state = new_state()
+    for _ in range(10):
+        update_state(state, 8, 10)
+    
+    changes = [update_state(state, 2, 10) for _ in range(5)]
+    assert 'drop' in changes
+    assert changes.count('drop') == 1
+    # After the alert the baseline re-forms at the new level
+    assert state['observations'] < MIN_OBSERVATIONS + 5
+    assert state['cusum_low'] < 5
+
+
+def test_rise_is_detected():
+    state = new_state()
+    for _ in range(10):
+        update_state(state, 1, 10)
+    changes = [update_state(state, 9, 10) for _ in range(5)]
+    assert 'rise' in changes
+
+
+def test_more_trials_detect_smaller_shifts():
+    def runs_to_alert(trials):
+        state = new_state()
+        for _ in range(10):
+            update_state(state, round(0.6 * trials), trials)
+        for run in range(1, 50):
+            if update_state(state, round(0.45 * trials), trials):
+                return run
+        return None
+    
+    # A 15-point drop stands out in 100 trials per run, not in 10
+    assert runs_to_alert(100) <= 5
+    assert runs_to_alert(10) is None
+
+
+def test_model_wide_totals_skip_rotating_queries():
+    states = {}
+    rows = run_rows('m1', {'fixed1': (1, 1), 'fixed2': (0, 1), 'tmpl-a': (1, 1)})
+    changed, alerts = observe_run(states, rows, 'r1', rotating={'tmpl-a'})
+    assert alerts == []
+    assert {(row['model_id'], row['query_id']) for row in changed} == {
+        ('m1', 'fixed1'), ('m1', 'fixed2'), ('m1', 'tmpl-a'), ('m1', MODEL_WIDE)
+    }
+    assert states[('m1', MODEL_WIDE)]['ewma_rate'] == pytest.approx(0.5)
+
+
+def test_observing_a_run_twice_changes_nothing():
+    states = {}
+    rows = run_rows('m1', {'q1': (1, 1)})
+    observe_run(states, rows, 'r1')
+    changed, alerts = observe_run(states, rows, 'r1')
+    assert changed == [] and alerts == []
+    assert states[('m1', 'q1')]['observations'] == 1
+
+
+def test_pairs_without_trials_are_skipped():
+    states = {}
+    changed, _ = observe_run(states, run_rows('m1', {'q1': (0, 0)}), 'r1')
+    assert changed == []
+
+
+def test_check_run_folds_stored_responses_and_writes_alerts(sqlite_db, tmp_path):
+    sink = AlertSink(path=str(tmp_path / 'alerts.jsonl'))
+    
+    def store_run(run_id, referenced):
+        sqlite_db.ensure_run(run_id)
+        sqlite_db.store_responses([
+            response_row(run_id, 'q1', 'paintball events near me', 'm1', f"Answer {index}", referenced, None, [],
+                         replicate_index=index)
+            for index in range(20)
+        ])
+    
+    for number in range(8):
+        store_run(f"r{number + 2}", True)
+        assert check_run(sqlite_db, f"r{number + 2}", sink) == []
+    # Running it again for the same run is a no-op
+    assert check_run(sqlite_db, 'r9', sink) == []
+    assert sqlite_db.get_alert_states()[('m1', 'q1')]['observations'] == 8
+    
+    store_run('r10', False)
+    alerts = check_run(sqlite_db, 'r10', sink)
+    assert {(alert['query_id'], alert['type']) for alert in alerts} == {
+        ('q1', 'citation_rate_drop'), (MODEL_WIDE, 'citation_rate_drop')
+    }
+    with open(sink.path) as f:
+        assert [json.loads(line)['run_id'] for line in f] == ['r10', 'r10']
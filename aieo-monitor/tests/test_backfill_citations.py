@@ -0,0 +1,82 @@
+"""
+Tests for backfill_citations.py (re-derivation, change counts, resume fingerprint)
+"""
+import json
+
+import backfill_citations
+from backfill_citations import WATERMARK_KEY, backfill, rederive, resume_point, rules_fingerprint
+from database.base_storage import response_row
+
+TENANT = {'id': 'acme', 'name': 'Acme', 'domains': ['acme.com'], 'query_ids': ['q1']}
+
+
+def stored_row(cited_urls, response='An answer', referenced=False, tenant_refs=None):
+    return {
+        'id': 1,
+        'run_id': 'r1',
+        'query_id': 'q1',
+        'query_text': 'paintball events near me',
+        'response': response,
+        'cited_urls': json.dumps(cited_urls),
+        'paintballevents_referenced': referenced,
+        'tenant_refs': tenant_refs or {}
+    }
+
+
+def install_tenants(tenants):
+    backfill_citations._init_worker({}, {'q1': tenants})
+
+
+def test_rederive_canonicalizes_and_merges_urls():
+    install_tenants([])
+    row = stored_row(['https://www.example.com/a/?utm_source=x', 'https://example.com/a'])
+    updates, changed = rederive([row])
+    assert updates[0]['cited_urls'] == ['https://example.com/a']
+    assert changed == 1
+
+
+def test_rederive_counts_unchanged_rows_as_unchanged():
+    install_tenants([TENANT])
+    row = stored_row(['https://acme.com/x'], tenant_refs={'acme': True})
+    updates, changed = rederive([row])
+    assert updates[0]['tenant_refs'] == {'acme': True}
+    assert changed == 0
+
+
+def test_rederive_counts_tenant_only_changes():
+    install_tenants([TENANT])
+    # Stored before acme was tracked: no tenant row yet
+    updates, changed = rederive([stored_row(['https://acme.com/x'])])
+    assert updates[0]['tenant_refs'] == {'acme': True}
+    assert changed == 1
+    # A new tenant that is not cited changes nothing
+    _, changed = rederive([stored_row(['https://example.com/a'])])
+    assert changed == 0
+
+
+def test_fingerprint_covers_url_rules_version(monkeypatch):
+    before = rules_fingerprint([TENANT])
+    assert rules_fingerprint([TENANT]) == before
+    monkeypatch.setattr(backfill_citations, 'RULES_VERSION', backfill_citations.RULES_VERSION + 1)
+    assert rules_fingerprint([TENANT]) != before
+
+
+def test_backfill_saves_watermark_and_resumes(sqlite_db):
+    sqlite_db.store_responses([
+        response_row('r1', 'q1', 'paintball events near me', 'm1', f"Answer {index}", False, None,
+                     [f"https://WWW.example.com/{index}/"])
+        for index in range(5)
+    ])
+    fingerprint = rules_fingerprint([])
+    stats = backfill(sqlite_db, {}, {}, fingerprint, 0, workers=1, batch_size=2)
+    assert stats['processed'] == 5
+    assert stats['changed'] == 5
+    
+    saved = json.loads(sqlite_db.get_state(WATERMARK_KEY))
+    assert saved['last_id'] == stats['last_id']
+    assert resume_point(sqlite_db, fingerprint, restart=False) == stats['last_id']
+    assert resume_point(sqlite_db, 'other rules', restart=False) == 0
+    assert resume_point(sqlite_db, fingerprint, restart=True) == 0
+    
+    urls = [json.loads(row['cited_urls']) for row in sqlite_db.fetch_all("SELECT cited_urls FROM responses ORDER BY id")]
+    assert urls == [[f"https://example.com/{index}"] for index in range(5)]
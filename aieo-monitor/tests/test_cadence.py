@@ -0,0 +1,70 @@
+"""
+Tests for utils/cadence.py (priority cadences, fixed phases, catch-up spreading)
+"""
+from datetime import datetime, timedelta
+
+from utils.cadence import CadenceScheduler, cadence_for_priority, phase_fraction
+
+NOW = datetime(2026, 3, 4, 12, 0)
+
+
+class Model:
+    def __init__(self, model_id):
+        self.model_id = model_id
+
+
+MODELS = [Model('m1'), Model('m2')]
+QUERIES = [
+    {'id': 'daily', 'priority': 1},
+    {'id': 'weekly', 'priority': 2},
+    {'id': 'monthly', 'priority': 3},
+]
+
+
+def test_cadence_for_priority_clamps_unknown_values():
+    assert cadence_for_priority(1) == timedelta(days=1)
+    assert cadence_for_priority(None) == timedelta(days=1)
+    assert cadence_for_priority(0) == timedelta(days=1)
+    assert cadence_for_priority(9) == timedelta(days=30)
+
+
+def test_phase_is_stable_and_in_range():
+    fraction = phase_fraction('q1', 'm1')
+    assert 0 <= fraction < 1
+    assert phase_fraction('q1', 'm1') == fraction
+    assert phase_fraction('q1', 'm2') != fraction
+
+
+def test_never_run_pairs_are_spread_over_the_catch_up_window():
+    scheduler = CadenceScheduler(MODELS, QUERIES, {}, now=NOW, catchup=timedelta(hours=1))
+    assert len(scheduler) == 6
+    assert scheduler.peek() >= NOW
+    assert len(scheduler.pop_due(NOW + timedelta(hours=1))) == 6
+
+
+def test_pair_that_ran_this_slot_waits_for_its_next_slot():
+    scheduler = CadenceScheduler([], [], {}, now=NOW)
+    model, query = MODELS[0], QUERIES[1]
+    following = scheduler.next_due(model, query, NOW, NOW)
+    assert NOW < following <= NOW + timedelta(days=7)
+    # Slots keep the pair's phase: exactly one interval apart
+    assert scheduler.next_due(model, query, following, following) == following + timedelta(days=7)
+
+
+def test_missed_slot_is_caught_up():
+    scheduler = CadenceScheduler([], [], {}, now=NOW, catchup=timedelta(hours=1))
+    model, query = MODELS[0], QUERIES[1]
+    due = scheduler.next_due(model, query, NOW - timedelta(days=20), NOW)
+    assert NOW <= due <= NOW + timedelta(hours=1)
+
+
+def test_pop_due_and_reschedule():
+    scheduler = CadenceScheduler(MODELS, QUERIES, {}, now=NOW)
+    due = scheduler.pop_due(NOW + timedelta(hours=1))
+    assert len(due) == 6 and len(scheduler) == 0
+    
+    for model, query in due:
+        scheduler.reschedule(model, query, NOW + timedelta(hours=1))
+    assert scheduler.pop_due(NOW + timedelta(hours=1)) == []
+    assert scheduler.peek() > NOW + timedelta(hours=1)
+    assert len(scheduler.pop_due(NOW + timedelta(days=31))) == 6
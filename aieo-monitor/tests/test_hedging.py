@@ -0,0 +1,112 @@
+"""
+Tests for utils/hedging.py (p95 tracking, hedge budget, deadlines)
+"""
+import time
+import threading
+
+import pytest
+
+from utils.hedging import DeadlineExceeded, HedgeBudget, HedgedCaller, LatencyTracker
+
+
+class HedgedModel:
+    model_id = 'hedged'
+    deadline_seconds = None
+    hedge = True
+
+
+class DeadlineModel:
+    model_id = 'deadline'
+    deadline_seconds = 0.05
+    hedge = False
+
+
+def warm_tracker(model_id: str, seconds: float = 0.01) -> LatencyTracker:
+    tracker = LatencyTracker(min_samples=1)
+    tracker.observe(model_id, seconds)
+    return tracker
+
+
+def test_p95_needs_min_samples():
+    tracker = LatencyTracker(min_samples=10)
+    for value in range(9):
+        tracker.observe('m', value)
+    assert tracker.p95('m') is None
+    for value in range(9, 100):
+        tracker.observe('m', value)
+    assert tracker.p95('m') == 94
+
+
+def test_budget_allows_a_fraction_of_calls_and_at_least_one():
+    budget = HedgeBudget(max_fraction=0.1)
+    assert budget.try_acquire() is True
+    assert budget.try_acquire() is False
+    for _ in range(20):
+        budget.record_call()
+    assert budget.try_acquire() is True
+    assert budget.try_acquire() is False
+    assert HedgeBudget(max_fraction=0).try_acquire() is False
+
+
+def test_hedge_wins_when_the_primary_is_slow():
+    calls = []
+    lock = threading.Lock()
+    
+    def request():
+        with lock:
+            calls.append(None)
+            first = len(calls) == 1
+        time.sleep(0.5 if first else 0.01)
+        return 'primary' if first else 'hedge'
+    
+    caller = HedgedCaller(warm_tracker('hedged'), HedgeBudget(max_fraction=1.0))
+    assert caller.call(HedgedModel, request) == 'hedge'
+    assert caller.hedges_won == 1
+    assert caller.budget.abandoned == 1
+
+
+def test_abandoned_requests_pause_hedging_until_they_finish():
+    release = threading.Event()
+    budget = HedgeBudget(max_fraction=1.0, max_abandoned=1)
+    caller = HedgedCaller(warm_tracker('hedged'), budget)
+    calls = []
+    lock = threading.Lock()
+    
+    def request():
+        with lock:
+            calls.append(None)
+            first = len(calls) == 1
+        if first:
+            release.wait(5)
+        else:
+            time.sleep(0.05)
+        return len(calls)
+    
+    caller.call(HedgedModel, request)
+    assert budget.hedges == 1
+    # The losing primary is still running: no second hedge
+    caller.call(HedgedModel, lambda: time.sleep(0.1))
+    assert budget.hedges == 1
+    
+    release.set()
+    deadline = time.monotonic() + 5
+    while budget.try_acquire() is False and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert budget.hedges == 2
+
+
+def test_deadline_raises_and_abandons_the_call():
+    budget = HedgeBudget()
+    caller = HedgedCaller(LatencyTracker(), budget)
+    with pytest.raises(DeadlineExceeded):
+        caller.call(DeadlineModel, lambda: time.sleep(0.3))
+    assert budget.abandoned == 1
+
+
+def test_failure_is_raised_once_no_copy_is_left():
+    def request():
+        raise RuntimeError('provider down')
+    
+    caller = HedgedCaller(warm_tracker('deadline'), HedgeBudget())
+    with pytest.raises(RuntimeError):
+        caller.call(DeadlineModel, request)
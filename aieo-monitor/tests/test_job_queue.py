@@ -0,0 +1,136 @@
+"""
+Tests for database/job_queue.py (claims, leases, retries and draining)
+
+The queue relies on MySQL 8 (SELECT ... FOR UPDATE SKIP LOCKED), so these
+tests run only when TEST_MYSQL_DATABASE names a scratch database with
+schema.sql and add_jobs_table.sql applied (MYSQL_HOST, MYSQL_USER and
+MYSQL_PASSWORD as usual). Each test uses its own run, deleted afterwards.
+"""
+import os
+import time
+import uuid
+import threading
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv('TEST_MYSQL_DATABASE'), reason="set TEST_MYSQL_DATABASE to a scratch MySQL database"
+)
+
+QUERY_IDS = ['q1', 'q2', 'q3']
+MODEL_IDS = ['m1', 'm2']
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    """Opens DatabaseManagers on the scratch database"""
+    monkeypatch.setenv('MYSQL_DATABASE', os.environ['TEST_MYSQL_DATABASE'])
+    from database.operations import DatabaseManager
+    
+    opened = []
+    
+    def open_manager():
+        db = DatabaseManager()
+        opened.append(db)
+        return db
+    
+    yield open_manager
+    for db in opened:
+        db.close()
+
+
+@pytest.fixture
+def run_id(manager):
+    """A running run with one pending job per (query, model), removed with its jobs afterwards"""
+    from database.job_queue import JobQueue
+    
+    db = manager()
+    run_id = f"test-{uuid.uuid4().hex[:12]}"
+    db.start_run(run_id)
+    JobQueue(db).enqueue(run_id, MODEL_IDS, QUERY_IDS)
+    yield run_id
+    with db.connection.cursor() as cursor:
+        cursor.execute("DELETE FROM runs WHERE run_id = %s", (run_id,))
+    db.connection.commit()
+
+
+def test_concurrent_workers_never_claim_the_same_job(manager, run_id):
+    from database.job_queue import JobQueue
+    
+    claimed = []
+    lock = threading.Lock()
+    
+    def work(worker_id):
+        queue = JobQueue(manager())
+        while True:
+            job = queue.claim(run_id, worker_id, MODEL_IDS)
+            if job is None:
+                return
+            with lock:
+                claimed.append(job['id'])
+            queue.complete(job['id'], worker_id)
+    
+    workers = [threading.Thread(target=work, args=(f"w{index}",)) for index in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    
+    assert len(claimed) == len(QUERY_IDS) * len(MODEL_IDS)
+    assert len(set(claimed)) == len(claimed)
+
+
+def test_claims_are_limited_to_the_worker_models(manager, run_id):
+    from database.job_queue import JobQueue
+    
+    queue = JobQueue(manager())
+    job = queue.claim(run_id, 'w1', ['m2'])
+    assert job['model_id'] == 'm2'
+    assert queue.claim(run_id, 'w1', []) is None
+
+
+def test_expired_lease_is_claimed_again(manager, run_id):
+    from database.job_queue import JobQueue
+    
+    queue = JobQueue(manager(), lease_seconds=1)
+    job = queue.claim(run_id, 'crashed', ['m1'])
+    time.sleep(2.5)
+    
+    retried = queue.claim(run_id, 'w2', ['m1'])
+    assert retried['id'] == job['id']
+    assert retried['attempts'] == 2
+    # The first worker lost its lease and may not extend it
+    assert queue.heartbeat(job['id'], 'crashed') is False
+    assert queue.heartbeat(job['id'], 'w2') is True
+
+
+def test_failed_job_is_retried_until_max_attempts(manager, run_id):
+    from database.job_queue import JobQueue
+    
+    queue = JobQueue(manager(), max_attempts=2)
+    job = queue.claim(run_id, 'w1', ['m1'])
+    queue.fail(job['id'], 'w1', 'boom')
+    
+    again = queue.claim(run_id, 'w1', ['m1'])
+    assert again['id'] == job['id']
+    queue.fail(again['id'], 'w1', 'boom')
+    
+    rows = queue.db.fetch_all("SELECT status, last_error FROM jobs WHERE id = %s", (job['id'],))
+    assert rows[0]['status'] == 'failed'
+    assert rows[0]['last_error'] == 'boom'
+
+
+def test_run_finishes_once_when_drained(manager, run_id):
+    from database.job_queue import JobQueue
+    
+    queue = JobQueue(manager())
+    assert queue.finish_run_if_drained(run_id) is False
+    while True:
+        job = queue.claim(run_id, 'w1', MODEL_IDS)
+        if job is None:
+            break
+        queue.complete(job['id'], 'w1')
+    
+    assert queue.remaining(run_id) == 0
+    assert queue.finish_run_if_drained(run_id) is True
+    assert queue.finish_run_if_drained(run_id) is False
@@ -0,0 +1,91 @@
+"""
+Tests for utils/pipeline.py (stage ordering, error handling, backpressure, stats)
+"""
+import threading
+import time
+
+from utils.pipeline import Pipeline, Stage
+
+
+def test_items_flow_through_every_stage():
+    results = []
+    pipeline = Pipeline([
+        Stage('double', lambda item: item * 2, workers=3),
+        Stage('drop_odd', lambda item: item if item % 4 == 0 else None),
+        Stage('collect', results.append),
+    ])
+    for item in range(10):
+        pipeline.put(item)
+    stats = pipeline.close()
+    
+    assert sorted(results) == [0, 4, 8, 12, 16]
+    assert [row['processed'] for row in stats] == [10, 10, 5]
+    assert all(row['failed'] == 0 for row in stats)
+
+
+def test_failures_go_to_on_error_and_workers_keep_running():
+    seen = []
+    results = []
+    
+    def parse(item):
+        if item == 2:
+            raise ValueError('bad item')
+        return item
+    
+    def on_error(name, item, error):
+        seen.append((name, item, str(error)))
+        return -item
+    
+    pipeline = Pipeline([Stage('parse', parse), Stage('collect', results.append)], on_error=on_error)
+    for item in range(4):
+        pipeline.put(item)
+    stats = pipeline.close()
+    
+    assert seen == [('parse', 2, 'bad item')]
+    # The handler's return value replaces the result
+    assert results == [0, 1, -2, 3]
+    assert stats[0]['failed'] == 1
+
+
+def test_failing_error_handler_drops_the_item():
+    def on_error(name, item, error):
+        raise RuntimeError('handler broke')
+    
+    results = []
+    pipeline = Pipeline([Stage('fail', lambda item: 1 / item), Stage('collect', results.append)], on_error=on_error)
+    for item in [0, 1]:
+        pipeline.put(item)
+    pipeline.close()
+    assert results == [1.0]
+
+
+def test_full_queue_blocks_the_producer():
+    release = threading.Event()
+    pipeline = Pipeline([Stage('slow', lambda item: release.wait(5), capacity=2)])
+    # One item is taken by the worker, two fill the queue
+    for item in range(3):
+        pipeline.put(item)
+    time.sleep(0.05)
+    
+    producer = threading.Thread(target=pipeline.put, args=(3,), daemon=True)
+    producer.start()
+    producer.join(0.2)
+    assert producer.is_alive()
+    
+    release.set()
+    producer.join(5)
+    assert not producer.is_alive()
+    stats = pipeline.close()
+    assert stats[0]['processed'] == 4
+    assert stats[0]['queue_max'] == 2
+
+
+def test_source_stats_come_first_in_the_report():
+    pipeline = Pipeline([Stage('collect', lambda item: None)])
+    fetch = pipeline.source('fetch', workers=4)
+    fetch.record(0.01)
+    stats = pipeline.close()
+    
+    assert [row['stage'] for row in stats] == ['fetch', 'collect']
+    assert stats[0]['processed'] == 1
+    assert stats[0]['queue_capacity'] == 0
@@ -0,0 +1,103 @@
+"""
+Tests for utils/query_templates.py (expansion, stable ids, stratified rotation)
+"""
+import copy
+import json
+import os
+from collections import Counter
+
+import pytest
+
+from utils.query_templates import (
+    expand_queries, expand_template, in_rotation, rotating_ids, rotation_imbalance, template_query_id
+)
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'queries.json')
+
+TEMPLATE = {
+    'id': 'events',
+    'patterns': ["Find paintball {event} in {state}", "Where can I play {event} in {state}?"],
+    'slots': {
+        'state': ['Texas', 'Florida', 'Ohio', 'Georgia', 'Maine'],
+        'event': ['scenario games', 'big games', 'magfed events'],
+    },
+    'category': '{event}',
+    'rotation_weeks': 4,
+    'strata': ['state', 'event'],
+}
+
+
+def generated(config):
+    return [query for query in expand_queries(config) if 'template' in query]
+
+
+def test_every_combination_of_used_slots_is_generated():
+    queries = expand_template(TEMPLATE)
+    assert len(queries) == 2 * 5 * 3
+    assert len({query['id'] for query in queries}) == 30
+    first = queries[0]
+    assert first['text'] == 'Find paintball scenario games in Texas'
+    assert first['category'] == 'scenario games'
+    assert first['slots'] == {'event': 'scenario games', 'state': 'Texas', 'phrasing': '0'}
+
+
+def test_ids_depend_only_on_the_prompt_wording():
+    assert template_query_id('events', 'Find  Paintball games') == template_query_id('events', 'find paintball games')
+    reordered = copy.deepcopy(TEMPLATE)
+    reordered['slots']['state'].reverse()
+    assert {q['id'] for q in expand_template(reordered)} == {q['id'] for q in expand_template(TEMPLATE)}
+
+
+@pytest.mark.parametrize('change', [
+    {'id': ''},
+    {'id': 'x' * 31},
+    {'patterns': []},
+    {'patterns': ['Find {missing}']},
+])
+def test_invalid_templates_are_rejected(change):
+    with pytest.raises(ValueError):
+        expand_template(dict(TEMPLATE, **change))
+
+
+def test_prompts_repeating_a_hand_written_query_are_dropped():
+    config = {
+        'queries': [{'id': 'q1', 'text': 'find paintball BIG GAMES in texas'}],
+        'templates': [TEMPLATE],
+    }
+    queries = expand_queries(config)
+    assert len(queries) == 1 + 29
+    assert rotating_ids(queries) == {query['id'] for query in queries[1:]}
+
+
+def test_rotation_sizes_differ_by_at_most_one_and_strata_are_even():
+    queries = generated({'templates': [TEMPLATE]})
+    sizes = Counter(query['rotation']['bucket'] for query in queries)
+    assert sorted(sizes) == [0, 1, 2, 3]
+    assert max(sizes.values()) - min(sizes.values()) <= 1
+    assert rotation_imbalance(queries, TEMPLATE['strata']) == []
+
+
+def test_rotation_is_independent_of_slot_value_order():
+    reordered = copy.deepcopy(TEMPLATE)
+    reordered['slots']['state'].reverse()
+    reordered['slots']['event'].reverse()
+    schedule = {q['id']: q['rotation']['bucket'] for q in generated({'templates': [TEMPLATE]})}
+    assert {q['id']: q['rotation']['bucket'] for q in generated({'templates': [reordered]})} == schedule
+
+
+def test_each_query_is_asked_once_per_rotation():
+    queries = generated({'templates': [TEMPLATE]})
+    hand_written = {'id': 'q1', 'text': 'always asked'}
+    for query in queries:
+        assert sum(in_rotation(query, week) for week in range(100, 104)) == 1
+    assert all(in_rotation(hand_written, week) for week in range(4))
+
+
+@pytest.mark.parametrize('weeks', [1, 5, 7, 12])
+def test_shipped_template_rotation_is_balanced(weeks):
+    with open(CONFIG_PATH) as f:
+        config = json.load(f)
+    for template in config['templates']:
+        template['rotation_weeks'] = weeks
+        queries = generated({'templates': [template]})
+        assert rotation_imbalance(queries, template.get('strata', [])) == []
@@ -0,0 +1,110 @@
+"""
+Tests for database/raw_archive.py (round trips, dedup, segments, shared directories)
+"""
+import os
+import multiprocessing
+
+import database.raw_archive as raw_archive
+from database.base_storage import response_row
+from database.raw_archive import SEGMENT_SUFFIX, RawArchive, payload_bytes
+
+
+def payload(index):
+    return {'id': f"msg_{index}", 'content': [{'type': 'text', 'text': f"Answer {index} " * 50}], 'usage': {'n': index}}
+
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+
+
+def archive_range(directory, first, count):
+    """Worker process: archive payloads first..first+count-1"""
+    archive = RawArchive(directory)
+    for index in range(first, first + count):
+        archive.put(payload(index), f"key-{index}", run_id='r1')
+    archive.close()
+
+
+def test_payloads_round_trip(tmp_path):
+    archive = RawArchive(str(tmp_path))
+    for index in range(20):
+        archive.put(payload(index), f"key-{index}", run_id='r1', model_id='m1', query_id=f"q{index}")
+    
+    assert archive.get('key-7') == payload(7)
+    assert archive.get('missing') is None
+    assert [row['payload'] for row in archive.iter_run('r1')] == [payload(index) for index in range(20)]
+    stats = archive.stats()
+    assert stats['payloads'] == stats['blobs'] == 20
+    assert stats['stored_bytes'] < stats['raw_bytes']
+    archive.close()
+
+
+def test_identical_payloads_are_stored_once(tmp_path):
+    archive = RawArchive(str(tmp_path))
+    first = archive.put({'b': 1, 'a': [1, 2]}, 'key-1')
+    second = archive.put({'a': [1, 2], 'b': 1}, 'key-2')
+    assert first == second
+    stats = archive.stats()
+    assert (stats['payloads'], stats['blobs']) == (2, 1)
+    assert archive.get('key-2') == {'a': [1, 2], 'b': 1}
+    archive.close()
+
+
+def test_sdk_objects_are_dumped_to_json():
+    class Message:
+        def model_dump(self, mode):
+            return {'mode': mode, 'text': 'hi'}
+    
+    assert payload_bytes(Message()) == b'{"mode":"json","text":"hi"}'
+
+
+def test_full_segment_rolls_over(tmp_path, monkeypatch):
+    monkeypatch.setattr(raw_archive, 'SEGMENT_MAX_BYTES', 300)
+    archive = RawArchive(str(tmp_path))
+    for index in range(10):
+        archive.put(payload(index), f"key-{index}")
+    
+    assert len(segment_files(tmp_path)) > 1
+    assert all(archive.get(f"key-{index}") == payload(index) for index in range(10))
+    archive.close()
+
+
+def test_reopened_archive_writes_a_new_segment(tmp_path):
+    archive_range(str(tmp_path), 0, 3)
+    archive_range(str(tmp_path), 3, 3)
+    assert segment_files(tmp_path) == ['000001.seg', '000002.seg']
+    
+    archive = RawArchive(str(tmp_path))
+    assert all(archive.get(f"key-{index}") == payload(index) for index in range(6))
+    archive.close()
+
+
+def test_processes_sharing_a_directory_write_their_own_segments(tmp_path):
+    processes = [
+        multiprocessing.Process(target=archive_range, args=(str(tmp_path), worker * 50, 50))
+        for worker in range(3)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+    
+    assert len(segment_files(tmp_path)) == 3
+    archive = RawArchive(str(tmp_path))
+    assert archive.stats()['payloads'] == 150
+    assert all(archive.get(f"key-{index}") == payload(index) for index in range(150))
+    archive.close()
+
+
+def test_payload_of_a_stored_response(tmp_path, sqlite_db):
+    archive = RawArchive(str(tmp_path / 'archive'))
+    archive.put(payload(1), 'key-1', run_id='r1')
+    sqlite_db.store_responses([
+        response_row('r1', 'q1', 'paintball events near me', 'm1', 'Answer 1', False, None, [], response_key='key-1')
+    ])
+    response_id = sqlite_db.fetch_all("SELECT id FROM responses")[0]['id']
+    
+    assert archive.get_response(sqlite_db, response_id) == payload(1)
+    assert archive.get_response(sqlite_db, response_id + 1) is None
+    archive.close()
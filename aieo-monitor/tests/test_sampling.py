@@ -0,0 +1,65 @@
+"""
+Tests for utils/sampling.py (Wilson interval and adaptive stopping)
+"""
+import pytest
+
+from utils.sampling import AdaptiveSampler, wilson_interval
+
+
+def test_wilson_interval_without_trials_is_uninformative():
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+
+
+def test_wilson_interval_known_value():
+    lower, upper = wilson_interval(5, 10)
+    assert lower == pytest.approx(0.2366, abs=1e-4)
+    assert upper == pytest.approx(0.7634, abs=1e-4)
+
+
+def test_wilson_interval_stays_in_unit_range_and_narrows():
+    assert wilson_interval(0, 5)[0] == 0.0
+    assert wilson_interval(5, 5)[1] == 1.0
+    narrow = wilson_interval(50, 100)
+    wide = wilson_interval(5, 10)
+    assert narrow[1] - narrow[0] < wide[1] - wide[0]
+
+
+def test_sampler_rejects_zero_max_replicates():
+    with pytest.raises(ValueError):
+        AdaptiveSampler(max_replicates=0)
+
+
+def test_min_replicates_is_clamped_to_max():
+    sampler = AdaptiveSampler(max_replicates=2, min_replicates=5)
+    assert sampler.min_replicates == 2
+
+
+def test_first_wave_is_min_replicates():
+    sampler = AdaptiveSampler(max_replicates=10, min_replicates=3)
+    assert sampler.next_wave(0, 0, 0) == 3
+
+
+def test_unanimous_answers_settle_on_the_decision_threshold():
+    sampler = AdaptiveSampler(max_replicates=10, min_replicates=3)
+    # [0.44, 1.0] is 0.56 wide but lies above 0.5
+    assert sampler.is_settled(3, 3) is False
+    assert sampler.is_settled(5, 5) is True
+    assert sampler.next_wave(5, 5, 5) == 0
+
+
+def test_split_answers_keep_sampling_in_batches_until_the_cap():
+    sampler = AdaptiveSampler(max_replicates=6, min_replicates=3, batch_size=2)
+    assert sampler.next_wave(2, 3, 3) == 2
+    assert sampler.next_wave(2, 5, 5) == 1
+    assert sampler.next_wave(3, 6, 6) == 0
+
+
+def test_failed_calls_count_against_the_cap():
+    sampler = AdaptiveSampler(max_replicates=4, min_replicates=3)
+    assert sampler.next_wave(1, 1, 4) == 0
+
+
+def test_narrow_interval_settles_without_threshold():
+    sampler = AdaptiveSampler(max_replicates=200, max_ci_width=0.2, decision_threshold=None)
+    assert sampler.is_settled(50, 100) is True
+    assert sampler.is_settled(5, 10) is False
@@ -0,0 +1,57 @@
+"""
+Tests for utils/scheduling.py (latency estimates, longest-first order, provider limits)
+"""
+import pytest
+
+from utils.scheduling import ProviderDispatcher, ewma_latencies, longest_first
+
+
+def test_ewma_weights_newer_observations():
+    rows = [
+        {'model_id': 'm1', 'query_id': 'q1', 'response_time_ms': 1000},
+        {'model_id': 'm1', 'query_id': 'q1', 'response_time_ms': 2000},
+        {'model_id': 'm2', 'query_id': 'q1', 'response_time_ms': 500},
+    ]
+    estimates = ewma_latencies(rows, alpha=0.5)
+    assert estimates == {('m1', 'q1'): 1500.0, ('m2', 'q1'): 500.0}
+
+
+def test_longest_first_uses_fallbacks_for_new_pairs():
+    latencies = {('slow', 'q1'): 30.0, ('slow', 'q2'): 10.0, ('fast', 'q1'): 1.0}
+    pairs = [('fast', 'q1'), ('slow', 'q3'), ('slow', 'q1'), ('slow', 'q2')]
+    ordered = longest_first(pairs, latencies)
+    assert ordered[0] == (('slow', 'q1'), 30.0)
+    # slow/q3 has no history: the model median
+    assert (('slow', 'q3'), 20.0) in ordered
+    assert ordered[-1] == (('fast', 'q1'), 1.0)
+
+
+def test_dispatcher_respects_provider_limits():
+    dispatcher = ProviderDispatcher(limit=1)
+    dispatcher.add('openai', 'o1', 30)
+    dispatcher.add('openai', 'o2', 20)
+    dispatcher.add('anthropic', 'a1', 10)
+    assert dispatcher.capacity == 2
+    assert len(dispatcher) == 3
+    
+    assert dispatcher.next_job() == ('openai', 'o1')
+    # openai is at its limit, so the shorter anthropic job starts
+    assert dispatcher.next_job() == ('anthropic', 'a1')
+    assert dispatcher.next_job() is None
+    
+    dispatcher.release('openai')
+    assert dispatcher.next_job() == ('openai', 'o2')
+    assert len(dispatcher) == 0
+
+
+def test_dispatcher_prefers_the_longest_head_job():
+    dispatcher = ProviderDispatcher(limit=2)
+    dispatcher.add('a', 'short', 5)
+    dispatcher.add('b', 'long', 50)
+    assert dispatcher.next_job() == ('b', 'long')
+    assert dispatcher.next_job() == ('a', 'short')
+
+
+def test_dispatcher_rejects_zero_limit():
+    with pytest.raises(ValueError):
+        ProviderDispatcher(limit=0)
@@ -0,0 +1,65 @@
+"""
+Tests for utils/sharding.py (shard specs and balanced assignment)
+"""
+import random
+
+import pytest
+
+from utils.sharding import assign_shards, estimate_weights, pair_hash, parse_shard
+
+PAIRS = [(f"model-{m}", f"query-{q}") for m in range(4) for q in range(25)]
+
+
+def test_parse_shard():
+    assert parse_shard('0/4') == (0, 4)
+    assert parse_shard('3/4') == (3, 4)
+
+
+@pytest.mark.parametrize('spec', ['4/4', '-1/4', '0/0', '1', 'a/b', '1/2/3'])
+def test_parse_shard_rejects_invalid_specs(spec):
+    with pytest.raises(ValueError):
+        parse_shard(spec)
+
+
+def test_pair_hash_is_stable():
+    # Every shard must compute the same value, whatever PYTHONHASHSEED is
+    assert pair_hash('gpt-5-nano', 'q1') == 2413546406764394749
+    assert pair_hash('gpt-5-nano', 'q1') != pair_hash('gpt-5-nano', 'q2')
+
+
+def test_weights_fall_back_to_model_then_overall_median():
+    latencies = {('a', 'q1'): 2.0, ('a', 'q2'): 4.0, ('b', 'q1'): 10.0}
+    weights = estimate_weights([('a', 'q1'), ('a', 'q3'), ('c', 'q1')], latencies)
+    assert weights[('a', 'q1')] == 2.0
+    assert weights[('a', 'q3')] == 3.0
+    assert weights[('c', 'q1')] == 4.0
+    assert estimate_weights([('a', 'q1')], {}) == {('a', 'q1'): 1.0}
+
+
+def test_assignment_covers_every_pair_once():
+    assignment = assign_shards(PAIRS, 4, {})
+    assert set(assignment) == set(PAIRS)
+    assert set(assignment.values()) == {0, 1, 2, 3}
+
+
+def test_assignment_is_independent_of_input_order():
+    latencies = {pair: 1.0 + index % 7 for index, pair in enumerate(PAIRS)}
+    shuffled = PAIRS[:]
+    random.Random(1).shuffle(shuffled)
+    assert assign_shards(PAIRS, 4, latencies) == assign_shards(shuffled, 4, dict(reversed(list(latencies.items()))))
+
+
+def test_assignment_balances_expected_duration():
+    rng = random.Random(7)
+    latencies = {pair: rng.uniform(1, 60) for pair in PAIRS}
+    assignment = assign_shards(PAIRS, 4, latencies)
+    
+    loads = [0.0] * 4
+    for pair, shard in assignment.items():
+        loads[shard] += latencies[pair]
+    # Longest-first greedy leaves the shards at most one job apart
+    assert max(loads) - min(loads) <= max(latencies.values())
+
+
+def test_single_shard_takes_everything():
+    assert set(assign_shards(PAIRS, 1, {}).values()) == {0}
@@ -0,0 +1,111 @@
+"""
+Tests for utils/simhash.py (fingerprints, LSH bands, clustering) and the
+indexed band pairs of the storage backends
+"""
+import hashlib
+import random
+
+from database.base_storage import response_row
+from utils.simhash import (
+    BITS, _shingles, bands, cluster, fingerprint_columns, hamming,
+    near_duplicate_pairs, simhash, to_signed, to_unsigned
+)
+
+ANSWER = (
+    "The best paintball events this season are listed on paintballevents.net, "
+    "including scenario games in Ohio, a big game in Texas and several "
+    "tournaments across California with walk-on play welcome."
+)
+
+
+def reference_simhash(text: str) -> int:
+    """Per-bit SimHash, the definition the lane arithmetic in simhash() must match"""
+    shingles = _shingles(text)
+    if not shingles:
+        return 0
+    total = sum(shingles.values())
+    weights = [0] * BITS
+    for shingle, weight in shingles.items():
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(BITS):
+            if value >> bit & 1:
+                weights[bit] += weight
+    return sum(1 << bit for bit in range(BITS) if 2 * weights[bit] > total)
+
+
+def test_simhash_matches_per_bit_definition():
+    rng = random.Random(3)
+    words = ANSWER.split()
+    for _ in range(20):
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(1, 80)))
+        assert simhash(text) == reference_simhash(text)
+
+
+def test_empty_text_fingerprint_is_zero():
+    assert simhash('') == 0
+    assert simhash(None) == 0
+
+
+def test_similar_texts_are_close_and_different_texts_are_far():
+    edited = ANSWER.replace('Ohio', 'Indiana')
+    other = "Python dataclasses generate __init__ and __repr__ from annotated class attributes automatically."
+    assert simhash(ANSWER) == simhash(ANSWER.upper())
+    assert hamming(simhash(ANSWER), simhash(edited)) < hamming(simhash(ANSWER), simhash(other))
+
+
+def test_bands_and_signed_columns_round_trip():
+    fingerprint = 0xF00D_0000_BEEF_0001
+    assert bands(fingerprint) == (0xF00D, 0x0000, 0xBEEF, 0x0001)
+    assert to_signed(fingerprint) < 0
+    assert to_unsigned(to_signed(fingerprint)) == fingerprint
+    columns = fingerprint_columns(ANSWER)
+    assert to_unsigned(columns[0]) == simhash(ANSWER)
+    assert columns[1:] == bands(simhash(ANSWER))
+
+
+def test_near_duplicate_pairs_have_exact_recall_within_three_bits():
+    rng = random.Random(11)
+    fingerprints = {}
+    for item in range(200):
+        if item % 4 == 0:
+            fingerprints[item] = rng.getrandbits(BITS)
+        else:
+            # A variant of the last random fingerprint, 0-3 bits away
+            base = fingerprints[item - item % 4]
+            for bit in rng.sample(range(BITS), rng.randint(0, 3)):
+                base ^= 1 << bit
+            fingerprints[item] = base
+    
+    expected = sorted(
+        (a, b, hamming(fingerprints[a], fingerprints[b]))
+        for a in fingerprints for b in fingerprints
+        if a < b and hamming(fingerprints[a], fingerprints[b]) <= 3
+    )
+    assert sorted(near_duplicate_pairs(fingerprints, 3)) == expected
+
+
+def test_cluster_joins_connected_items():
+    pairs = [(1, 2, 0), (2, 3, 1), (7, 8, 2)]
+    assert cluster([1, 2, 3, 4, 7, 8], pairs) == [[1, 2, 3], [7, 8]]
+
+
+def test_band_pairs_from_indexes_match_in_memory_buckets(sqlite_db):
+    edited = ANSWER.replace('Texas', 'Florida')
+    texts = [ANSWER, edited, ANSWER, "Something else entirely about tax law and deductions in 2025."]
+    rows = [
+        response_row('r1', 'q1', 'paintball events near me', 'm1', text, False, None, [], replicate_index=0)
+        for text in texts
+    ]
+    # A replicate shares the first answer's bands but is not a candidate
+    rows.append(response_row('r1', 'q1', 'paintball events near me', 'm1', ANSWER, False, None, [], replicate_index=1))
+    sqlite_db.store_responses(rows)
+    
+    stored = sqlite_db.get_response_fingerprints(run_id='r1')
+    fingerprints = {row['id']: to_unsigned(row['simhash']) for row in stored if row['replicate_index'] == 0}
+    expected = {
+        (a, b) for a in fingerprints for b in fingerprints
+        if a < b and set(enumerate(bands(fingerprints[a]))) & set(enumerate(bands(fingerprints[b])))
+    }
+    assert len(expected) >= 1
+    assert set(sqlite_db.get_band_pairs('r1')) == expected
+    assert sqlite_db.get_band_pairs('other-run') == []
@@ -0,0 +1,162 @@
+"""
+Tests for database/spool.py (durable appends, recovery, segment ownership, flushing)
+"""
+import os
+import json
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from database.spool import (
+    FLUSHING_SUFFIX, OPEN_SUFFIX, SEGMENT_SUFFIX, ResponseSpool, SpoolFlusher, flush_spool
+)
+
+
+def dead_pid() -> int:
+    """Id of a process that has exited"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def write_segment(directory, name, records):
+    path = os.path.join(directory, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    return path
+
+
+def spool_response(spool, run_id='r1', text='An answer citing paintballevents.net'):
+    spool.store_response(
+        run_id=run_id, query_id='q1', query_text='paintball events near me', model_id='m1',
+        response_text=text, paintballevents_ref=True, search_query=None,
+        cited_urls=['https://paintballevents.net/']
+    )
+
+
+@pytest.fixture
+def spool_dir(tmp_path):
+    """Spool directory apart from the fixture database"""
+    directory = tmp_path / 'spool'
+    directory.mkdir()
+    return str(directory)
+
+
+def stored_count(db):
+    return db.fetch_all("SELECT COUNT(*) AS n FROM responses")[0]['n']
+
+
+def test_records_are_pending_until_flushed(spool_dir, sqlite_db):
+    spool = ResponseSpool(spool_dir)
+    spool_response(spool)
+    spool_response(spool)
+    spool.store_error('r1', 'q1', 'm1', 'paintball events near me', 'timeout')
+    assert spool.pending() == 3
+    assert [name for name in os.listdir(spool_dir) if name.endswith(OPEN_SUFFIX)]
+    
+    stats = flush_spool(spool, sqlite_db)
+    assert (stats['segments'], stats['responses'], stats['errors']) == (1, 2, 1)
+    assert spool.pending() == 0
+    assert os.listdir(spool_dir) == []
+    assert stored_count(sqlite_db) == 2
+    assert sqlite_db.get_run_summary('r1')['errors_count'] == 1
+
+
+def test_empty_responses_are_not_spooled(spool_dir):
+    spool = ResponseSpool(spool_dir)
+    spool_response(spool, text='  ')
+    assert spool.pending() == 0
+
+
+def test_reflushing_a_segment_skips_stored_responses(spool_dir, tmp_path, sqlite_db):
+    spool = ResponseSpool(spool_dir)
+    spool_response(spool)
+    spool.seal()
+    [segment] = spool.segments()
+    backup = str(tmp_path / 'backup')
+    shutil.copy(segment, backup)
+    
+    flush_spool(spool, sqlite_db)
+    # As if the first flush had failed after committing
+    shutil.move(backup, segment)
+    assert flush_spool(spool, sqlite_db)['responses'] == 0
+    assert stored_count(sqlite_db) == 1
+
+
+def test_torn_last_line_is_skipped(spool_dir, sqlite_db):
+    spool = ResponseSpool(spool_dir)
+    spool_response(spool)
+    spool.seal()
+    [segment] = spool.segments()
+    with open(segment, 'a') as f:
+        f.write('{"kind": "response", "run_')
+    
+    assert len(spool.read_segment(segment)) == 1
+    assert flush_spool(spool, sqlite_db)['responses'] == 1
+
+
+def test_open_segments_of_dead_processes_are_sealed_on_start(spool_dir):
+    dead = write_segment(spool_dir, f"{1:020d}-{dead_pid()}{OPEN_SUFFIX}", [{'kind': 'error'}])
+    live = write_segment(spool_dir, f"{2:020d}-{os.getppid()}{OPEN_SUFFIX}", [{'kind': 'error'}])
+    
+    ResponseSpool(spool_dir)
+    assert not os.path.exists(dead)
+    assert os.path.exists(dead[:-len(OPEN_SUFFIX)] + SEGMENT_SUFFIX)
+    assert os.path.exists(live)
+
+
+def test_segments_are_flushed_by_their_owner_or_after_it_exits(spool_dir):
+    gone = dead_pid()
+    other = os.getppid()
+    records = [{'kind': 'error'}]
+    own = write_segment(spool_dir, f"{1:020d}-{os.getpid()}{SEGMENT_SUFFIX}", records)
+    orphan = write_segment(spool_dir, f"{2:020d}-{gone}{SEGMENT_SUFFIX}", records)
+    write_segment(spool_dir, f"{3:020d}-{other}{SEGMENT_SUFFIX}", records)
+    stale_claim = write_segment(spool_dir, f"{4:020d}-{other}{SEGMENT_SUFFIX}{FLUSHING_SUFFIX}{gone}", records)
+    write_segment(spool_dir, f"{5:020d}-{gone}{SEGMENT_SUFFIX}{FLUSHING_SUFFIX}{other}", records)
+    write_segment(spool_dir, 'notes.txt', records)
+    
+    spool = ResponseSpool(spool_dir)
+    assert spool.segments() == [own, orphan, stale_claim]
+    assert spool.pending() == 3
+
+
+def test_claim_renames_once(spool_dir):
+    spool = ResponseSpool(spool_dir)
+    spool_response(spool)
+    spool.seal()
+    [segment] = spool.segments()
+    
+    claimed = spool.claim(segment)
+    assert claimed.endswith(f"{FLUSHING_SUFFIX}{os.getpid()}")
+    assert spool.claim(segment) is None
+    # A claimed segment left by a failed flush is taken again as is
+    assert spool.segments() == [claimed]
+    assert spool.claim(claimed) == claimed
+
+
+def test_flusher_drains_and_stops(spool_dir, sqlite_db):
+    spool = ResponseSpool(spool_dir)
+    flusher = SpoolFlusher(spool, lambda: type(sqlite_db)(sqlite_db.path), interval=60)
+    flusher.start()
+    spool_response(spool)
+    assert flusher.flush_now(timeout=10) == 0
+    spool_response(spool, text='A second answer')
+    assert flusher.stop(timeout=10) == 0
+    assert stored_count(sqlite_db) == 2
+
+
+def test_flusher_keeps_records_while_the_database_is_down(spool_dir):
+    spool = ResponseSpool(spool_dir)
+    
+    def unreachable():
+        raise ConnectionError('database down')
+    
+    flusher = SpoolFlusher(spool, unreachable, interval=60)
+    flusher.start()
+    spool_response(spool)
+    assert flusher.stop(timeout=10) == 1
+    assert len(spool.segments()) == 1
@@ -0,0 +1,59 @@
+"""
+Tests for utils/tenants.py (tenant resolution, shared prompts, per-tenant citations)
+"""
+import pytest
+
+from utils.tenants import prompt_key, resolve_tenants, share_prompts, tenant_references
+
+QUERIES = [
+    {'id': 'q1', 'text': 'Best paintball events', 'category': 'events', 'priority': 2},
+    {'id': 'q2', 'text': 'best  PAINTBALL events', 'category': 'events', 'priority': 1},
+    {'id': 'q3', 'text': 'Paintball gear reviews', 'category': 'gear', 'priority': 3},
+]
+
+
+def test_tenants_select_queries_by_id_category_or_all():
+    tenants = resolve_tenants([
+        {'id': 'all', 'domains': ['All.com ']},
+        {'id': 'gear', 'domains': ['gear.com'], 'categories': ['gear']},
+        {'id': 'one', 'domains': ['one.com'], 'queries': ['q2']},
+    ], QUERIES)
+    assert [tenant['query_ids'] for tenant in tenants] == [['q1', 'q2', 'q3'], ['q3'], ['q2']]
+    assert tenants[0]['domains'] == ['all.com']
+    assert tenants[0]['name'] == 'all'
+
+
+@pytest.mark.parametrize('config', [
+    [{'id': 'a', 'domains': ['a.com']}, {'id': 'a', 'domains': ['b.com']}],
+    [{'id': 'a', 'domains': [' ']}],
+    [{'id': 'a', 'domains': ['a.com'], 'queries': ['nope']}],
+])
+def test_invalid_tenants_are_rejected(config):
+    with pytest.raises(ValueError):
+        resolve_tenants(config, QUERIES)
+
+
+def test_same_prompt_is_asked_once_for_every_tenant():
+    tenants = resolve_tenants([
+        {'id': 'a', 'domains': ['a.com'], 'queries': ['q1']},
+        {'id': 'b', 'domains': ['b.com'], 'queries': ['q2']},
+    ], QUERIES)
+    queries, query_tenants = share_prompts(QUERIES, tenants)
+    
+    assert prompt_key(QUERIES[0]['text']) == prompt_key(QUERIES[1]['text'])
+    assert [query['id'] for query in queries] == ['q1']
+    # The shared query keeps the most important priority of the group
+    assert queries[0]['priority'] == 1
+    assert [tenant['id'] for tenant in query_tenants['q1']] == ['a', 'b']
+    # share_prompts() does not modify the config queries
+    assert QUERIES[0]['priority'] == 2
+
+
+def test_citations_are_evaluated_per_tenant():
+    tenants = [
+        {'id': 'a', 'domains': ['a.com', 'a.org']},
+        {'id': 'b', 'domains': ['b.com']},
+    ]
+    refs = tenant_references(tenants, ['https://shop.a.org/x'], 'Nothing about b here')
+    assert refs == {'a': True, 'b': False}
+    assert tenant_references(tenants, [], 'Try b.com.') == {'a': False, 'b': True}
@@ -0,0 +1,71 @@
+"""
+Tests for utils/urls.py (canonical URLs, registrable domains, domain matching)
+"""
+import doctest
+
+import pytest
+
+import utils.urls
+from utils.urls import canonicalize_url, cites_domain, host_matches, mentions_domain, registrable_domain, url_domain
+
+
+def test_docstring_examples():
+    assert doctest.testmod(utils.urls).failed == 0
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('http://www.example.com/events/', 'https://example.com/events'),
+    ('https://example.com/events?utm_source=openai', 'https://example.com/events'),
+    ('https://example.com/a?b=2&a=1&fbclid=x#section', 'https://example.com/a?a=1&b=2'),
+    ('https://example.com:443/a', 'https://example.com/a'),
+    ('https://example.com:8443/a', 'https://example.com:8443/a'),
+    ('example.com/page).', 'https://example.com/page)'),
+    ('https://example.com//a///b/', 'https://example.com/a/b'),
+    ('https://EXAMPLE.com./Path', 'https://example.com/Path'),
+    ('   ', ''),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_canonicalize_url_keeps_unparseable_input():
+    assert canonicalize_url('https://[broken') == 'https://[broken'
+
+
+@pytest.mark.parametrize('host, expected', [
+    ('blog.paintballevents.net', 'paintballevents.net'),
+    ('shop.example.co.uk', 'example.co.uk'),
+    ('co.uk', 'co.uk'),
+    ('user.github.io', 'user.github.io'),
+    ('a.b.example.ck', 'b.example.ck'),
+    ('www.ck', 'www.ck'),
+    ('192.168.0.1', '192.168.0.1'),
+    ('Example.COM.', 'example.com'),
+])
+def test_registrable_domain(host, expected):
+    assert registrable_domain(host) == expected
+
+
+def test_url_domain_of_bare_host_and_empty_url():
+    assert url_domain('news.paintballevents.net/story') == 'paintballevents.net'
+    assert url_domain('') == ''
+
+
+def test_host_matches_subdomains_only():
+    assert host_matches('https://events.paintballevents.net/x', 'paintballevents.net')
+    assert host_matches('https://www.paintballevents.net', 'paintballevents.net')
+    assert not host_matches('https://notpaintballevents.net', 'paintballevents.net')
+    assert not host_matches('https://paintballevents.net.evil.com', 'paintballevents.net')
+
+
+def test_mentions_domain_needs_token_boundaries():
+    assert mentions_domain('Visit PaintballEvents.net today', 'paintballevents.net')
+    assert mentions_domain('(events.paintballevents.net)', 'paintballevents.net')
+    assert not mentions_domain('paintballevents.network is different', 'paintballevents.net')
+    assert not mentions_domain('see my-paintballevents.net', 'paintballevents.net')
+
+
+def test_cites_domain_by_url_or_text():
+    assert cites_domain('PaintballEvents.net', ['https://www.paintballevents.net/ohio'], '')
+    assert cites_domain('paintballevents.net', [], 'Check paintballevents.net for dates.')
+    assert not cites_domain('paintballevents.net', ['https://example.com/?ref=paintballevents.net'], 'nothing here')
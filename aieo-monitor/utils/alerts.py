@@ -0,0 +1,203 @@
+"""
+Citation rate alerts for AI Citation Monitor
+Keeps a running baseline (EWMA) and two-sided CUSUM per (model, query) pair
+and per model (over the queries every run asks, so template rotation does
+not move the baseline), updated from each completed run's rows only, and
+raises an alert when a citation rate shifts. Alerts go to a JSONL file and, if
+configured, a webhook.
+"""
+import os
+import json
+import math
+import urllib.request
+from datetime import datetime
+from typing import AbstractSet, Dict, List, Optional, Tuple
+
+# query_id of the per-model state (the model's non-rotating queries together)
+MODEL_WIDE = '*'
+
+# Weight of each run in the baseline rate
+EWMA_ALPHA = 0.1
+# CUSUM slack and decision threshold, in standard errors. Simulated weekly
+# runs: ~0.3 false alarms per pair-year (single answers), ~0.1 per model-year,
+# a model's rate halving from 60% is flagged after ~5 runs
+CUSUM_SLACK = 0.5
+CUSUM_THRESHOLD = 5.0
+# Runs that build the baseline before any alert (again after each alert)
+MIN_OBSERVATIONS = 3
+# Baselines near 0% or 100% would make a single miss look significant
+RATE_FLOOR = 0.1
+
+DEFAULT_ALERT_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'alerts.jsonl'
+)
+WEBHOOK_TIMEOUT_SECONDS = 10
+
+
+def new_state() -> Dict:
+    """State of a pair with no runs yet"""
+    return {'observations': 0, 'ewma_rate': 0.0, 'cusum_low': 0.0, 'cusum_high': 0.0, 'last_run_id': None}
+
+
+def update_state(state: Dict, cited: int, trials: int) -> Optional[str]:
+    """
+    Fold one run's result for a pair into its state (in place)
+    
+    The deviation from the baseline is standardized by the binomial
+    standard error, so replicates and model-wide totals (more trials)
+    react to smaller shifts than single answers do.
+    
+    Returns:
+        'drop' or 'rise' if the CUSUM crossed its threshold, else None
+    """
+    rate = cited / trials
+    state['observations'] += 1
+    if state['observations'] <= MIN_OBSERVATIONS:
+        # Plain mean while the baseline forms
+        state['ewma_rate'] += (rate - state['ewma_rate']) / state['observations']
+        return None
+    
+    baseline = state['ewma_rate']
+    clipped = min(max(baseline, RATE_FLOOR), 1 - RATE_FLOOR)
+    z = (rate - baseline) / math.sqrt(clipped * (1 - clipped) / trials)
+    state['cusum_high'] = max(0.0, state['cusum_high'] + z - CUSUM_SLACK)
+    state['cusum_low'] = max(0.0, state['cusum_low'] - z - CUSUM_SLACK)
+    
+    change = None
+    if state['cusum_low'] > CUSUM_THRESHOLD:
+        change = 'drop'
+    elif state['cusum_high'] > CUSUM_THRESHOLD:
+        change = 'rise'
+    
+    if change:
+        # Re-form the baseline at the new level, so one shift raises one alert
+        state.update(new_state(), last_run_id=state['last_run_id'])
+    else:
+        state['ewma_rate'] += EWMA_ALPHA * (rate - baseline)
+    return change
+
+
+def observe_run(states: Dict[Tuple[str, str], Dict], run_rows: List[Dict], run_id: str,
+                rotating: AbstractSet[str] = frozenset()) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Update states with one run's per-pair results
+    
+    Pairs whose state already includes this run are skipped, so running
+    this twice for a run (e.g. after finalize) changes nothing. Rotating
+    queries keep their per-pair state but stay out of the model-wide
+    rate: the week's slice of them changes every run.
+    
+    Args:
+        states: {(model_id, query_id): state}, updated in place
+        run_rows: Dicts with model_id, query_id, trials and cited for the run
+        run_id: The run being folded in
+        rotating: Ids of queries asked in their rotation week only (template queries)
+    
+    Returns:
+        (changed state rows for save_alert_states(), alerts)
+    """
+    totals = {}
+    observations = []
+    for row in run_rows:
+        observations.append((row['model_id'], row['query_id'], int(row['cited']), int(row['trials'])))
+        if row['query_id'] in rotating:
+            continue
+        model_total = totals.setdefault(row['model_id'], [0, 0])
+        model_total[0] += int(row['cited'])
+        model_total[1] += int(row['trials'])
+    observations += [(model_id, MODEL_WIDE, cited, trials) for model_id, (cited, trials) in totals.items()]
+    
+    changed = []
+    alerts = []
+    timestamp = datetime.now().isoformat(timespec='seconds')
+    for model_id, query_id, cited, trials in observations:
+        state = states.setdefault((model_id, query_id), new_state())
+        if state['last_run_id'] == run_id or not trials:
+            continue
+        
+        baseline = state['ewma_rate']
+        change = update_state(state, cited, trials)
+        state['last_run_id'] = run_id
+        changed.append(dict(state, model_id=model_id, query_id=query_id))
+        if change:
+            alerts.append({
+                'type': f'citation_rate_{change}',
+                'timestamp': timestamp,
+                'run_id': run_id,
+                'model_id': model_id,
+                'query_id': query_id,
+                'baseline_rate': round(baseline, 3),
+                'observed_rate': round(cited / trials, 3),
+                'trials': trials
+            })
+    return changed, alerts
+
+
+class AlertSink:
+    """Delivers alerts to a JSONL file and optionally a webhook (JSON POST)"""
+    
+    def __init__(self, path: Optional[str] = None, webhook_url: Optional[str] = None):
+        """
+        Args:
+            path: JSONL file alerts are appended to (ALERT_FILE or data/alerts.jsonl)
+            webhook_url: URL each batch of alerts is POSTed to (ALERT_WEBHOOK_URL; none if unset)
+        """
+        self.path = path or os.getenv('ALERT_FILE') or DEFAULT_ALERT_FILE
+        self.webhook_url = webhook_url or os.getenv('ALERT_WEBHOOK_URL')
+    
+    def send(self, alerts: List[Dict]):
+        """Record alerts; webhook failures are reported but never raised"""
+        if not alerts:
+            return
+        
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a') as f:
+            for alert in alerts:
+                f.write(json.dumps(alert) + '\n')
+        
+        if self.webhook_url:
+            request = urllib.request.Request(
+                self.webhook_url,
+                data=json.dumps({'alerts': alerts}).encode('utf-8'),
+                headers={'Content-Type': 'application/json'},
+                method='POST'
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=WEBHOOK_TIMEOUT_SECONDS):
+                    pass
+            except OSError as e:
+                print(f"⚠️  Alert webhook failed: {e}")
+
+
+def check_run(db, run_id: str, sink: Optional[AlertSink] = None,
+              rotating: AbstractSet[str] = frozenset()) -> List[Dict]:
+    """
+    Fold a completed run into the alert state and deliver any alerts
+    
+    Reads only the run's own responses (grouped per pair) and the small
+    state table, so the cost does not grow with history. rotating is
+    passed on to observe_run().
+    
+    Returns:
+        Alerts raised for the run
+    """
+    run_rows = db.fetch_all("""
+        SELECT model_id, query_id, COUNT(*) AS trials, SUM(paintballevents_referenced) AS cited
+        FROM responses
+        WHERE run_id = %s
+        GROUP BY model_id, query_id
+    """, (run_id,))
+    if not run_rows:
+        return []
+    
+    states = db.get_alert_states()
+    changed, alerts = observe_run(states, run_rows, run_id, rotating)
+    db.save_alert_states(changed)
+    
+    for alert in alerts:
+        direction = '↓' if alert['type'].endswith('drop') else '↑'
+        scope = 'all fixed queries' if alert['query_id'] == MODEL_WIDE else alert['query_id']
+        print(f"⚠️  Citation rate {direction} {alert['model_id']} | {scope}: "
+              f"{alert['baseline_rate']:.0%} → {alert['observed_rate']:.0%}")
+    (sink or AlertSink()).send(alerts)
+    return alerts
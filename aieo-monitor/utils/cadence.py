@@ -0,0 +1,109 @@
+"""
+Priority-driven cadence scheduling for AI Citation Monitor
+Used by the long-running daemon mode (run_monitor.py --daemon)
+"""
+import hashlib
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# Query priority -> how often each (query, model) pair is asked
+# Lower numbers are more important (matches config/queries.json)
+PRIORITY_CADENCES = {
+    1: timedelta(days=1),
+    2: timedelta(days=7),
+    3: timedelta(days=30),
+}
+
+# Slots are aligned to a fixed epoch so restarts don't shift the schedule
+EPOCH = datetime(2025, 1, 1)
+
+
+def cadence_for_priority(priority: Optional[int]) -> timedelta:
+    """Return the cadence for a query priority (unknown values are clamped)"""
+    priority = priority or 1
+    priority = min(max(priority, min(PRIORITY_CADENCES)), max(PRIORITY_CADENCES))
+    return PRIORITY_CADENCES[priority]
+
+
+def phase_fraction(query_id: str, model_id: str) -> float:
+    """Stable pseudo-random position in [0, 1) for a (query, model) pair"""
+    digest = hashlib.sha1(f"{model_id}:{query_id}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') / 2**64
+
+
+class CadenceScheduler:
+    """
+    Keeps every (model, query) pair on its own cadence
+    
+    Each pair gets a fixed phase inside its cadence interval, derived from
+    a hash of its ids, so work is spread evenly instead of arriving in one
+    burst. Overdue pairs (never run, or missed while the daemon was down)
+    are spread across a catch-up window rather than all fired at once.
+    """
+    
+    def __init__(
+        self,
+        models: List,
+        queries: List[Dict],
+        last_run: Dict[Tuple[str, str], datetime],
+        now: Optional[datetime] = None,
+        catchup: timedelta = timedelta(hours=1)
+    ):
+        """
+        Args:
+            models: Model instances to schedule
+            queries: Active query dictionaries from config
+            last_run: Last response time per (model_id, query_id)
+            now: Current time (defaults to datetime.now())
+            catchup: Window over which overdue pairs are spread
+        """
+        self.catchup = catchup
+        self._heap = []
+        self._counter = 0
+        
+        now = now or datetime.now()
+        for model in models:
+            for query in queries:
+                previous = last_run.get((model.model_id, query['id']))
+                self._push(self.next_due(model, query, previous, now), model, query)
+    
+    def next_due(self, model, query: Dict, last_run: Optional[datetime], now: datetime) -> datetime:
+        """Compute when a pair should next be asked"""
+        interval = cadence_for_priority(query.get('priority'))
+        fraction = phase_fraction(query['id'], model.model_id)
+        offset = interval * fraction
+        
+        # Most recent slot at or before now
+        cycles = (now - EPOCH - offset) // interval
+        current_slot = EPOCH + offset + interval * cycles
+        
+        if last_run is not None and last_run >= current_slot:
+            return current_slot + interval
+        
+        # Overdue: spread across the catch-up window, never past the next slot
+        return min(now + self.catchup * fraction, current_slot + interval)
+    
+    def peek(self) -> Optional[datetime]:
+        """Return the earliest due time, or None if nothing is scheduled"""
+        return self._heap[0][0] if self._heap else None
+    
+    def pop_due(self, now: datetime) -> List[Tuple]:
+        """Remove and return all (model, query) pairs due at or before now"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, model, query = heapq.heappop(self._heap)
+            due.append((model, query))
+        return due
+    
+    def reschedule(self, model, query: Dict, ran_at: datetime):
+        """Schedule the next slot for a pair that just ran"""
+        self._push(self.next_due(model, query, ran_at, ran_at), model, query)
+    
+    def __len__(self):
+        return len(self._heap)
+    
+    def _push(self, due: datetime, model, query: Dict):
+        # The counter keeps heap ordering total without comparing models
+        self._counter += 1
+        heapq.heappush(self._heap, (due, self._counter, model, query))
@@ -0,0 +1,202 @@
+"""
+Hedged provider calls for AI Citation Monitor
+Per-model deadlines, and a second identical request once a call runs past
+the model's recent p95 latency (the first answer wins)
+"""
+import math
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """A provider call (and its hedge) did not finish within the model's deadline"""
+
+
+class LatencyTracker:
+    """Recent call latencies per model, for p95-based hedge triggers"""
+    
+    def __init__(self, window: int = 100, min_samples: int = 10):
+        """
+        Args:
+            window: Latest latencies kept per model
+            min_samples: Samples needed before a p95 is reported
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, model_id: str, seconds: float):
+        """Record one call latency"""
+        with self._lock:
+            self._samples.setdefault(model_id, deque(maxlen=self.window)).append(seconds)
+    
+    def seed(self, rows: Iterable[Dict]):
+        """Record historical latencies from rows with model_id and response_time_ms (oldest first)"""
+        for row in rows:
+            if row.get('response_time_ms'):
+                self.observe(row['model_id'], row['response_time_ms'] / 1000)
+    
+    def p95(self, model_id: str) -> Optional[float]:
+        """95th percentile latency in seconds, None until min_samples are known"""
+        with self._lock:
+            samples = sorted(self._samples.get(model_id, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[math.ceil(0.95 * len(samples)) - 1]
+
+
+class HedgeBudget:
+    """
+    Caps hedges at a fraction of hedge-eligible calls (at least one per run)
+    
+    Abandoned requests keep running (see _start), so no new hedge is sent
+    while max_abandoned of them are still in flight.
+    """
+    
+    def __init__(self, max_fraction: float = 0.1, max_abandoned: int = 4):
+        """
+        Args:
+            max_fraction: Extra calls allowed per eligible call (0 disables hedging)
+            max_abandoned: Abandoned requests allowed to run at once before
+                hedging pauses
+        """
+        self.max_fraction = max_fraction
+        self.max_abandoned = max_abandoned
+        self.calls = 0
+        self.hedges = 0
+        self.abandoned = 0
+        self._running_abandoned = 0
+        self._lock = threading.Lock()
+    
+    def record_call(self):
+        """Count a hedge-eligible primary call"""
+        with self._lock:
+            self.calls += 1
+    
+    def try_acquire(self) -> bool:
+        """Reserve one hedge if the budget allows it"""
+        if self.max_fraction <= 0:
+            return False
+        with self._lock:
+            if self._running_abandoned >= self.max_abandoned:
+                return False
+            if self.hedges + 1 > max(1.0, self.max_fraction * self.calls):
+                return False
+            self.hedges += 1
+            return True
+    
+    def abandon(self, futures: Iterable[Future]):
+        """Count requests whose answer is no longer wanted until they finish"""
+        for future in futures:
+            with self._lock:
+                self.abandoned += 1
+                self._running_abandoned += 1
+            future.add_done_callback(self._abandoned_done)
+    
+    def _abandoned_done(self, future: Future):
+        with self._lock:
+            self._running_abandoned -= 1
+
+
+def _start(func: Callable) -> Future:
+    """
+    Run func in a daemon thread and return its future
+    
+    Daemon threads (rather than a pool) mean an abandoned call can never
+    starve later ones or keep the process alive at exit. Provider SDK calls
+    can't be interrupted, so an abandoned call is not cancelled: it runs to
+    completion (and is billed) with its result ignored.
+    """
+    future = Future()
+    future.set_running_or_notify_cancel()
+    future.started_at = time.monotonic()
+    future.hedge = False
+    
+    def _run():
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+    
+    threading.Thread(target=_run, daemon=True).start()
+    return future
+
+
+class HedgedCaller:
+    """Runs provider calls under the model's deadline and hedging policy"""
+    
+    def __init__(self, tracker: Optional[LatencyTracker] = None, budget: Optional[HedgeBudget] = None):
+        self.tracker = tracker or LatencyTracker()
+        self.budget = budget or HedgeBudget()
+        self.hedges_won = 0
+    
+    def call(self, model, func: Callable):
+        """
+        Call func (one provider request for model) and return its result
+        
+        Models without a deadline or hedging are called directly. Otherwise,
+        once the call runs past the model's p95 a second identical request
+        is sent (budget permitting); the first successful result wins and
+        the other request is abandoned, not cancelled: it keeps running in
+        the background and counts against the budget's max_abandoned until
+        it finishes. Requests still running at the deadline are abandoned
+        the same way.
+        
+        Raises:
+            DeadlineExceeded: If nothing succeeded within model.deadline_seconds
+        """
+        deadline = getattr(model, 'deadline_seconds', None)
+        hedge = getattr(model, 'hedge', False)
+        if deadline is None and not hedge:
+            started = time.monotonic()
+            result = func()
+            self.tracker.observe(model.model_id, time.monotonic() - started)
+            return result
+        
+        if hedge:
+            self.budget.record_call()
+        
+        started = time.monotonic()
+        expires = started + deadline if deadline else None
+        trigger = self.tracker.p95(model.model_id) if hedge else None
+        futures = [_start(func)]
+        
+        while True:
+            timeout = None
+            if trigger is not None and len(futures) == 1:
+                timeout = max(0.0, started + trigger - time.monotonic())
+            if expires is not None:
+                remaining = max(0.0, expires - time.monotonic())
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                futures.remove(future)
+                if future.exception() is None:
+                    self.tracker.observe(model.model_id, time.monotonic() - future.started_at)
+                    if future.hedge:
+                        self.hedges_won += 1
+                    self.budget.abandon(futures)
+                    return future.result()
+                # A failed request only counts once no other copy is running
+                if not futures:
+                    raise future.exception()
+            
+            if expires is not None and time.monotonic() >= expires:
+                self.budget.abandon(futures)
+                raise DeadlineExceeded(
+                    f"{model.model_id} did not answer within {deadline:g}s"
+                )
+            
+            if trigger is not None and len(futures) == 1 and not done:
+                if self.budget.try_acquire():
+                    hedged = _start(func)
+                    hedged.hedge = True
+                    futures.append(hedged)
+                    print(f"  ↻ Hedging {model.model_id} after {trigger:.1f}s (p95)")
+                trigger = None
@@ -0,0 +1,195 @@
+"""
+Staged producer/consumer pipeline for AI Citation Monitor
+Each stage runs in its own worker threads, and stages are connected by
+bounded queues. When a stage falls behind, its input queue fills and
+blocks the stage feeding it (backpressure) instead of buffering without
+limit. Per-stage throughput, busy time and queue depth are collected for
+the end-of-run report.
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Items a stage's input queue holds before the stage feeding it blocks
+DEFAULT_CAPACITY = 32
+
+# Marks the end of input on a stage queue (one per worker)
+_DONE = object()
+
+
+class StageStats:
+    """Counters for one stage (thread-safe)"""
+    
+    def __init__(self, name: str, workers: int, capacity: int = 0):
+        self.name = name
+        self.workers = workers
+        self.capacity = capacity
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.depth_max = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float, failed: bool = False):
+        """Count one item and the time a worker spent on it"""
+        with self._lock:
+            self.processed += 1
+            self.failed += int(failed)
+            self.busy_seconds += seconds
+    
+    def sample_depth(self, depth: int):
+        """Record the input queue depth seen when an item arrives"""
+        with self._lock:
+            self.depth_max = max(self.depth_max, depth)
+            self._depth_total += depth
+            self._depth_samples += 1
+    
+    def as_dict(self, elapsed: float) -> Dict:
+        """Summary over a pipeline that ran for elapsed seconds"""
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'processed': self.processed,
+            'failed': self.failed,
+            'per_second': self.processed / elapsed if elapsed > 0 else 0.0,
+            # Share of the workers' time spent working rather than waiting
+            'utilization': self.busy_seconds / (elapsed * self.workers) if elapsed > 0 else 0.0,
+            'queue_capacity': self.capacity,
+            'queue_max': self.depth_max,
+            'queue_avg': self._depth_total / self._depth_samples if self._depth_samples else 0.0
+        }
+
+
+class Stage:
+    """One pipeline stage: a function applied to each item by its own workers"""
+    
+    def __init__(self, name: str, fn: Callable, workers: int = 1, capacity: int = DEFAULT_CAPACITY):
+        """
+        Args:
+            name: Stage name in reports
+            fn: Called with each item; its return value goes to the next
+                stage (None drops the item)
+            workers: Threads running fn (1 for anything that is not thread-safe)
+            capacity: Size of the stage's input queue
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.capacity = capacity
+
+
+class Pipeline:
+    """Stages connected by bounded queues, started on construction"""
+    
+    def __init__(self, stages: List[Stage],
+                 on_error: Optional[Callable[[str, Any, Exception], Any]] = None):
+        """
+        Args:
+            stages: Stages in order; put() feeds the first one
+            on_error: Called (in the worker thread) with the stage name, item
+                and exception when a stage function raises; a value it
+                returns goes to the next stage in place of the result
+        """
+        self.stages = stages
+        self.on_error = on_error
+        self._queues = [queue.Queue(maxsize=stage.capacity) for stage in stages]
+        self._stats = [StageStats(stage.name, stage.workers, stage.capacity) for stage in stages]
+        self._sources: List[StageStats] = []
+        self._threads = []
+        self._started = time.perf_counter()
+        self.elapsed = None
+        
+        for index, stage in enumerate(stages):
+            workers = [
+                threading.Thread(target=self._work, args=(index,), name=f"{stage.name}-{number}", daemon=True)
+                for number in range(stage.workers)
+            ]
+            for worker in workers:
+                worker.start()
+            self._threads.append(workers)
+    
+    def source(self, name: str, workers: int) -> StageStats:
+        """
+        Counters for a stage that runs outside the pipeline and feeds put()
+        
+        Its rows come first in the report; the caller records each item.
+        """
+        stats = StageStats(name, workers)
+        self._sources.append(stats)
+        return stats
+    
+    def put(self, item):
+        """Hand an item to the first stage, blocking while its queue is full"""
+        self._enqueue(0, item)
+    
+    def _enqueue(self, index: int, item):
+        """Put an item on a stage's queue, noting the depth it found"""
+        self._stats[index].sample_depth(self._queues[index].qsize())
+        self._queues[index].put(item)
+    
+    def _work(self, index: int):
+        """Worker loop of stage index"""
+        stage = self.stages[index]
+        stats = self._stats[index]
+        while True:
+            item = self._queues[index].get()
+            if item is _DONE:
+                return
+            
+            start = time.perf_counter()
+            try:
+                result = stage.fn(item)
+                stats.record(time.perf_counter() - start)
+            except Exception as e:
+                stats.record(time.perf_counter() - start, failed=True)
+                result = self._handle_error(stage.name, item, e)
+            
+            # Blocks while the next stage is full: backpressure
+            if result is not None and index + 1 < len(self.stages):
+                self._enqueue(index + 1, result)
+    
+    def _handle_error(self, name: str, item, error: Exception):
+        """Pass a stage failure to on_error without ever killing the worker"""
+        if self.on_error is None:
+            print(f"  ✗ Pipeline stage {name} failed: {str(error)[:100]}")
+            return None
+        try:
+            return self.on_error(name, item, error)
+        except Exception as e:
+            print(f"  ✗ Pipeline stage {name} error handler failed: {str(e)[:100]}")
+            return None
+    
+    def close(self) -> List[Dict]:
+        """
+        Let every stage finish the items it was given and stop the workers
+        
+        Returns:
+            Per-stage summaries (see stats())
+        """
+        for index, workers in enumerate(self._threads):
+            for _ in workers:
+                self._queues[index].put(_DONE)
+            for worker in workers:
+                worker.join()
+        self.elapsed = time.perf_counter() - self._started
+        return self.stats()
+    
+    def stats(self) -> List[Dict]:
+        """Per-stage processed and failed counts, items/s, utilization and queue depth"""
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self._started
+        return [stats.as_dict(elapsed) for stats in self._sources + self._stats]
+
+
+def print_stage_report(stages: List[Dict]):
+    """Print Pipeline.stats() as a table"""
+    print(f"\n{'Stage':<10} {'Workers':>7} {'Items':>7} {'Failed':>6} {'Items/s':>8} "
+          f"{'Busy':>6} {'Queue max/avg':>15}")
+    print('-' * 64)
+    for stage in stages:
+        depth = (f"{stage['queue_max']}/{stage['queue_avg']:.1f} of {stage['queue_capacity']}"
+                 if stage['queue_capacity'] else '-')
+        print(f"{stage['stage']:<10} {stage['workers']:>7} {stage['processed']:>7} {stage['failed']:>6} "
+              f"{stage['per_second']:>8.1f} {stage['utilization']:>6.0%} {depth:>15}")
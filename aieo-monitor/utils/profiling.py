@@ -0,0 +1,178 @@
+"""
+Run profiling for AI Citation Monitor (run_monitor.py --profile DIR)
+Writes per-phase sampled stack profiles, tracemalloc top allocators and a
+per-pair timing trace in folded-stack format (flamegraph.pl, speedscope)
+as run artifacts. Stacks are sampled from every thread, so phases running
+concurrently in pipeline workers are profiled too (cProfile allows one
+active profiler per process on Python 3.12+ and sees only its own thread).
+"""
+import os
+import sys
+import json
+import time
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Frames kept per tracemalloc allocation (more frames = more overhead)
+TRACEMALLOC_FRAMES = 10
+# Rows in the text reports
+TOP_N = 30
+# Seconds between stack samples of the threads inside a phase
+SAMPLE_INTERVAL = 0.005
+# Frames kept per sampled stack (innermost)
+MAX_STACK_DEPTH = 64
+
+
+def _frame_label(frame) -> str:
+    """Function name and definition site of a frame"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame) -> Tuple[str, ...]:
+    """Labels of a frame's stack, outermost first"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+class RunProfiler:
+    """Collects sampled stacks, memory and per-pair timing data for one monitor run"""
+    
+    def __init__(self, directory: str, started_at: Optional[float] = None):
+        """
+        Args:
+            directory: Where artifacts are written (created if missing)
+            started_at: perf_counter() value from before the imports, to report import time
+        """
+        self.directory = directory
+        self.started_at = started_at
+        self.created_at = time.perf_counter()
+        self._active: Dict[int, List[str]] = {}
+        self._samples: Dict[str, Counter] = {}
+        self._wall: Dict[str, float] = {}
+        self._pairs: Dict[str, float] = {}
+        self._snapshots: List[Tuple[str, tracemalloc.Snapshot]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._sampler = threading.Thread(target=self._sample_loop, name='profile-sampler', daemon=True)
+        self._sampler.start()
+    
+    @contextmanager
+    def phase(self, name: str, model_id: Optional[str] = None, query_id: Optional[str] = None):
+        """
+        Profile a block as part of a phase (init, provider, extraction, db)
+        
+        While the block runs, this thread's stack samples count toward the
+        phase; a nested phase takes over until it ends, so time is counted
+        once. With a pair, the wall time is also added to the per-pair trace.
+        """
+        ident = threading.get_ident()
+        with self._lock:
+            self._active.setdefault(ident, []).append(name)
+        
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stack = self._active[ident]
+                stack.pop()
+                if not stack:
+                    del self._active[ident]
+                self._wall[name] = self._wall.get(name, 0.0) + elapsed
+                if model_id is not None:
+                    key = f"run;{model_id};{query_id};{name}"
+                    self._pairs[key] = self._pairs.get(key, 0.0) + elapsed
+    
+    def _sample_loop(self):
+        """Sample the stack of every thread inside a phase until write()"""
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            frames = sys._current_frames()
+            with self._lock:
+                active = {ident: names[-1] for ident, names in self._active.items()}
+            for ident, name in active.items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    self._samples.setdefault(name, Counter())[_stack(frame)] += 1
+    
+    def snapshot(self, label: str):
+        """Take a tracemalloc snapshot (compared against the first one in the report)"""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            # The tracing itself is not part of the run
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ))
+        self._snapshots.append((label, snapshot))
+    
+    def write(self):
+        """Write all artifacts and stop tracing memory"""
+        self.snapshot('end')
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        self._stop.set()
+        self._sampler.join()
+        for name, samples in sorted(self._samples.items()):
+            self._write_samples(name, samples)
+        
+        self._write_memory(peak)
+        with open(os.path.join(self.directory, 'pairs.folded'), 'w') as f:
+            for key, seconds in sorted(self._pairs.items()):
+                # Folded stacks take integer sample counts: microseconds here
+                f.write(f"{key} {max(1, int(seconds * 1_000_000))}\n")
+        
+        summary = {
+            'import_seconds': round(self.created_at - self.started_at, 3) if self.started_at else None,
+            'total_seconds': round(time.perf_counter() - self.created_at, 3),
+            'phase_wall_seconds': {name: round(seconds, 3) for name, seconds in sorted(self._wall.items())},
+            'pairs': len({key.rsplit(';', 1)[0] for key in self._pairs}),
+            'traced_memory_peak_bytes': peak,
+            'traced_memory_end_bytes': current,
+            'sample_interval_ms': SAMPLE_INTERVAL * 1000,
+            'phase_samples': {name: sum(samples.values()) for name, samples in sorted(self._samples.items())}
+        }
+        with open(os.path.join(self.directory, 'summary.json'), 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"✓ Profile written to {self.directory}")
+    
+    def _write_samples(self, name: str, samples: Counter):
+        """A phase's stacks in folded format, and its top functions by samples"""
+        with open(os.path.join(self.directory, f"samples_{name}.folded"), 'w') as f:
+            for stack, count in sorted(samples.items()):
+                f.write(f"{';'.join(stack)} {count}\n")
+        
+        total = sum(samples.values())
+        own = Counter()
+        inclusive = Counter()
+        for stack, count in samples.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                inclusive[label] += count
+        
+        with open(os.path.join(self.directory, f"samples_{name}.txt"), 'w') as f:
+            f.write(f"{total} samples every {SAMPLE_INTERVAL * 1000:g}ms in phase {name}\n\n")
+            f.write(f"{'Total':>7} {'%':>6} {'Own':>7}  Function\n")
+            for label, count in inclusive.most_common(TOP_N):
+                f.write(f"{count:>7} {count / total:>6.1%} {own[label]:>7}  {label}\n")
+    
+    def _write_memory(self, peak: int):
+        """Top allocators at the end of the run, and growth since the first snapshot"""
+        first_label, first = self._snapshots[0]
+        last_label, last = self._snapshots[-1]
+        with open(os.path.join(self.directory, 'memory_top.txt'), 'w') as f:
+            f.write(f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB\n\n")
+            f.write(f"Top {TOP_N} allocation sites at {last_label}:\n")
+            for stat in last.statistics('lineno')[:TOP_N]:
+                f.write(f"  {stat}\n")
+            if len(self._snapshots) > 1:
+                f.write(f"\nTop {TOP_N} growth from {first_label} to {last_label}:\n")
+                for stat in last.compare_to(first, 'lineno')[:TOP_N]:
+                    f.write(f"  {stat}\n")
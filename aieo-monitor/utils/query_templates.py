@@ -0,0 +1,280 @@
+"""
+Query templates for AI Citation Monitor
+Expands templates in config/queries.json ("Find paintball {event} in
+{state} for {year}") into every combination of slot values, with ids
+derived from the prompt text, and drops duplicate prompts. Generated
+queries are spread over a rotation of weekly buckets, stratified by the
+template's chosen slots, so each run asks a representative slice and every
+query is asked once per rotation.
+"""
+import hashlib
+import itertools
+import string
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.tenants import prompt_key
+
+# Generated ids ("<template>-<hash>") must fit responses.query_id (VARCHAR(50))
+MAX_TEMPLATE_ID_LENGTH = 30
+ID_HASH_LENGTH = 10
+
+# Monday that rotation weeks are counted from
+ROTATION_EPOCH = date(2024, 1, 1)
+
+
+def stable_hash(text: str) -> int:
+    """Hash independent of PYTHONHASHSEED"""
+    return int.from_bytes(hashlib.sha1(text.encode('utf-8')).digest()[:8], 'big')
+
+
+def template_query_id(template_id: str, text: str) -> str:
+    """
+    Stable id of a generated query: the template id and a hash of the prompt
+    
+    Only the wording counts (case and whitespace are ignored), so reordering
+    or extending slot values keeps existing ids and their history.
+    """
+    digest = hashlib.sha1(prompt_key(text).encode('utf-8')).hexdigest()
+    return f"{template_id}-{digest[:ID_HASH_LENGTH]}"
+
+
+def _fields(pattern: str) -> List[str]:
+    """Placeholder names of a pattern, in order of first use"""
+    names = []
+    for _, name, _, _ in string.Formatter().parse(pattern):
+        if name is not None and name not in names:
+            names.append(name)
+    return names
+
+
+def expand_template(template: Dict) -> List[Dict]:
+    """
+    Every query of a template
+    
+    Each pattern is filled with every combination of the slots it uses
+    (slots it does not use don't multiply it). Generated queries carry
+    the slot values and the pattern index ("phrasing") for stratification.
+    
+    Raises:
+        ValueError: On a missing or long id, no patterns, or placeholders without slot values
+    """
+    template_id = template.get('id', '')
+    if not template_id or len(template_id) > MAX_TEMPLATE_ID_LENGTH:
+        raise ValueError(f"Template id must be 1-{MAX_TEMPLATE_ID_LENGTH} characters: '{template_id}'")
+    patterns = template.get('patterns', [])
+    if not patterns:
+        raise ValueError(f"Template {template_id} has no patterns")
+    slots = template.get('slots', {})
+    category = template.get('category', template_id)
+    
+    queries = []
+    for phrasing, pattern in enumerate(patterns):
+        names = _fields(pattern)
+        missing = [name for name in names + _fields(category) if not slots.get(name)]
+        if missing:
+            raise ValueError(f"Template {template_id} has no values for: {', '.join(sorted(set(missing)))}")
+        
+        for combination in itertools.product(*(slots[name] for name in names)):
+            values = dict(zip(names, combination))
+            text = pattern.format(**values)
+            queries.append({
+                'id': template_query_id(template_id, text),
+                'text': text,
+                'category': category.format(**values),
+                'priority': template.get('priority', 3),
+                'active': template.get('active', True),
+                'template': template_id,
+                'slots': dict(values, phrasing=str(phrasing))
+            })
+    return queries
+
+
+def _tally_keys(query: Dict, strata: List[str]) -> List[Tuple]:
+    """Counters a query adds to: its group, then each of its strata values"""
+    values = tuple(query['slots'].get(name, '') for name in strata)
+    return [('group', values)] + [(name, value) for name, value in zip(strata, values)]
+
+
+def assign_rotation(queries: List[Dict], weeks: int, strata: List[str]):
+    """
+    Spread a template's queries over weekly buckets (in place)
+    
+    Queries are grouped by their values of the strata slots and dealt
+    rank-major: the first member of every group, then the second, and so
+    on. Each query goes to the open bucket holding the fewest of its group,
+    then of its strata values. Pairwise swaps then even out what the deal
+    left uneven, so each strata value is spread as evenly as the counts
+    allow. Bucket sizes differ by at most one, every group at least as
+    large as the rotation is asked every week, and smaller groups are
+    spread over different weeks. Groups and their members are taken in
+    hash order, so the schedule does not depend on the order of slot
+    values in the config.
+    """
+    groups: Dict[Tuple, List[Dict]] = {}
+    for query in queries:
+        key = tuple(query['slots'].get(name, '') for name in strata)
+        groups.setdefault(key, []).append(query)
+    ordered = [
+        sorted(groups[key], key=lambda query: (stable_hash(query['id']), query['id']))
+        for key in sorted(groups, key=lambda key: (stable_hash(repr(key)), key))
+    ]
+    
+    counts: Dict[Tuple, List[int]] = {}
+    sizes = [0] * weeks
+    base, extra = divmod(len(queries), weeks)
+    dealt = []
+    for rank in range(max((len(members) for members in ordered), default=0)):
+        for members in ordered:
+            if rank >= len(members):
+                continue
+            query = members[rank]
+            tallies = [counts.setdefault(key, [0] * weeks) for key in _tally_keys(query, strata)]
+            # Only `extra` buckets may take one query more than the rest
+            large = sum(1 for size in sizes if size > base)
+            open_buckets = [
+                bucket for bucket in range(weeks)
+                if sizes[bucket] < base or (sizes[bucket] == base and large < extra)
+            ]
+            bucket = min(open_buckets, key=lambda bucket: (
+                tallies[0][bucket], sum(tally[bucket] for tally in tallies[1:]), sizes[bucket], bucket
+            ))
+            sizes[bucket] += 1
+            for tally in tallies:
+                tally[bucket] += 1
+            query['rotation'] = {'bucket': bucket, 'weeks': weeks}
+            dealt.append(query)
+    
+    _rebalance(dealt, strata, counts, sizes)
+
+
+def _rebalance(queries: List[Dict], strata: List[str], counts: Dict[Tuple, List[int]], sizes: List[int]):
+    """
+    Move queries, or swap pairs of them, while that evens out the counters
+    
+    A change is kept when it lowers the sum of squared per-bucket counts.
+    A query only moves to a bucket holding fewer queries than its own, and
+    swaps keep bucket sizes, so sizes stay within one of each other; the
+    sum only ever decreases, so the loop ends.
+    """
+    tallies = [[counts[key] for key in _tally_keys(query, strata)] for query in queries]
+    
+    def _shift(tally_list, source, target) -> int:
+        """Change of the sum when one query with these counters goes source -> target"""
+        return sum(2 * (tally[target] - tally[source] + 1) for tally in tally_list)
+    
+    improved = True
+    while improved:
+        improved = False
+        for i, first in enumerate(queries):
+            a = first['rotation']['bucket']
+            for b in range(len(sizes)):
+                if sizes[b] < sizes[a] and _shift(tallies[i], a, b) < 0:
+                    for tally in tallies[i]:
+                        tally[a] -= 1
+                        tally[b] += 1
+                    sizes[a] -= 1
+                    sizes[b] += 1
+                    first['rotation']['bucket'] = a = b
+                    improved = True
+            
+            for j in range(i + 1, len(queries)):
+                second = queries[j]
+                b = second['rotation']['bucket']
+                if a == b:
+                    continue
+                # Counters the two queries share are unchanged by a swap
+                own = [x for x, y in zip(tallies[i], tallies[j]) if x is not y]
+                other = [y for x, y in zip(tallies[i], tallies[j]) if x is not y]
+                if own and _shift(own, a, b) + _shift(other, b, a) < 0:
+                    for tally in own:
+                        tally[a] -= 1
+                        tally[b] += 1
+                    for tally in other:
+                        tally[b] -= 1
+                        tally[a] += 1
+                    first['rotation']['bucket'], second['rotation']['bucket'] = b, a
+                    a = b
+                    improved = True
+
+
+def rotation_imbalance(queries: List[Dict], strata: List[str]) -> List[str]:
+    """
+    Strata values spread unevenly over a template's rotation
+    
+    A value is even when its per-week counts differ by at most one.
+    
+    Returns:
+        One description per uneven value (empty when the rotation is balanced)
+    """
+    counts: Dict[Tuple[str, str], List[int]] = {}
+    for query in queries:
+        rotation = query.get('rotation')
+        if rotation is None:
+            continue
+        for name in strata:
+            key = (name, query['slots'].get(name, ''))
+            counts.setdefault(key, [0] * rotation['weeks'])[rotation['bucket']] += 1
+    
+    return [
+        f"{name}={value}: {min(weekly)}-{max(weekly)} queries per week"
+        for (name, value), weekly in counts.items()
+        if max(weekly) - min(weekly) > 1
+    ]
+
+
+def expand_queries(config: Dict) -> List[Dict]:
+    """
+    Hand-written queries followed by the queries generated from templates
+    
+    Generated prompts that repeat an earlier query (hand-written or
+    generated; ignoring case and whitespace) are dropped.
+    
+    Args:
+        config: Parsed config/queries.json ("queries" and optional "templates")
+    
+    Raises:
+        ValueError: On an invalid template or two different prompts with the same id
+    """
+    queries = list(config.get('queries', []))
+    seen_prompts: Set[str] = {prompt_key(query['text']) for query in queries}
+    ids = {query['id']: query['text'] for query in queries}
+    
+    for template in config.get('templates', []):
+        generated = []
+        for query in expand_template(template):
+            key = prompt_key(query['text'])
+            if key in seen_prompts:
+                continue
+            if query['id'] in ids:
+                raise ValueError(f"Query id {query['id']} generated for '{query['text']}' "
+                                 f"is already used by '{ids[query['id']]}'")
+            seen_prompts.add(key)
+            ids[query['id']] = query['text']
+            generated.append(query)
+        
+        weeks = int(template.get('rotation_weeks', 1))
+        if weeks < 1:
+            raise ValueError(f"Template {template['id']} rotation_weeks must be at least 1")
+        strata = template.get('strata', [])
+        assign_rotation(generated, weeks, strata)
+        for problem in rotation_imbalance(generated, strata):
+            print(f"⚠️  Template {template['id']} rotation is uneven for {problem}")
+        queries.extend(generated)
+    return queries
+
+
+def rotation_week(day: Optional[date] = None) -> int:
+    """Week number a run on this day belongs to (counted from ROTATION_EPOCH)"""
+    return ((day or date.today()) - ROTATION_EPOCH).days // 7
+
+
+def rotating_ids(queries: List[Dict]) -> Set[str]:
+    """Ids of queries asked in their rotation week only (not in every run)"""
+    return {query['id'] for query in queries if 'rotation' in query}
+
+
+def in_rotation(query: Dict, week: int) -> bool:
+    """Whether a query is asked in this week (hand-written queries always are)"""
+    rotation = query.get('rotation')
+    return rotation is None or week % rotation['weeks'] == rotation['bucket']
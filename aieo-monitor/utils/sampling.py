@@ -0,0 +1,98 @@
+"""
+Replicate sampling for AI Citation Monitor
+Adaptive stopping rules for estimating per-pair citation probability
+"""
+import math
+from typing import Optional, Tuple
+
+
+def wilson_interval(successes: int, trials: int, z: float = 1.96) -> Tuple[float, float]:
+    """
+    Wilson score interval for a binomial proportion
+    
+    Args:
+        successes: Number of samples that cited the target site
+        trials: Number of valid samples
+        z: Normal quantile for the confidence level (1.96 = 95%)
+    
+    Returns:
+        Tuple of (lower, upper) bounds, (0.0, 1.0) when there are no trials
+    """
+    if trials <= 0:
+        return 0.0, 1.0
+    
+    p = successes / trials
+    z2 = z * z
+    denominator = 1 + z2 / trials
+    center = (p + z2 / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z2 / (4 * trials * trials)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+class AdaptiveSampler:
+    """Decides how many replicates to request for a (model, query) pair"""
+    
+    def __init__(
+        self,
+        max_replicates: int,
+        min_replicates: int = 3,
+        batch_size: int = 2,
+        max_ci_width: float = 0.3,
+        decision_threshold: Optional[float] = 0.5,
+        z: float = 1.96
+    ):
+        """
+        Args:
+            max_replicates: Hard cap on samples (paid calls) per pair
+            min_replicates: Samples always taken, sent concurrently as the first wave
+            batch_size: Samples sent concurrently in each follow-up wave
+            max_ci_width: Stop once the Wilson interval is at most this wide
+            decision_threshold: Stop once the interval lies entirely above or
+                below this rate (None disables the check)
+            z: Normal quantile for the confidence level
+        """
+        if max_replicates < 1:
+            raise ValueError("max_replicates must be at least 1")
+        
+        self.max_replicates = max_replicates
+        self.min_replicates = max(1, min(min_replicates, max_replicates))
+        self.batch_size = max(1, batch_size)
+        self.max_ci_width = max_ci_width
+        self.decision_threshold = decision_threshold
+        self.z = z
+    
+    def is_settled(self, successes: int, trials: int) -> bool:
+        """Check whether the pair's citation rate is known precisely enough"""
+        if trials < self.min_replicates:
+            return False
+        
+        lower, upper = wilson_interval(successes, trials, self.z)
+        if upper - lower <= self.max_ci_width:
+            return True
+        
+        if self.decision_threshold is not None:
+            if lower > self.decision_threshold or upper < self.decision_threshold:
+                return True
+        
+        return False
+    
+    def next_wave(self, successes: int, trials: int, attempted: int) -> int:
+        """
+        Number of replicates to request next
+        
+        Args:
+            successes: Valid samples that cited the target site so far
+            trials: Valid samples so far (errors and empty responses excluded)
+            attempted: Calls made so far, including failed ones
+        
+        Returns:
+            Number of concurrent samples to send, 0 when sampling should stop
+        """
+        remaining = self.max_replicates - attempted
+        if remaining <= 0 or self.is_settled(successes, trials):
+            return 0
+        
+        if attempted == 0:
+            return min(self.min_replicates, remaining)
+        
+        return min(self.batch_size, remaining)
@@ -0,0 +1,89 @@
+"""
+Longest-job-first scheduling for AI Citation Monitor
+Starts the slowest (model, query) pairs first, within per-provider
+concurrency limits, so a run finishes as early as possible
+"""
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.sharding import Pair, estimate_weights, pair_hash
+
+# Weight of the newest observation in a pair's latency estimate
+EWMA_ALPHA = 0.3
+
+
+def ewma_latencies(rows: Iterable[Dict], alpha: float = EWMA_ALPHA) -> Dict[Pair, float]:
+    """
+    Exponentially weighted moving average response time per pair
+    
+    Args:
+        rows: Dicts with model_id, query_id and response_time_ms, oldest first
+        alpha: Weight of each newer observation
+    """
+    estimates = {}
+    for row in rows:
+        pair = (row['model_id'], row['query_id'])
+        latency = float(row['response_time_ms'])
+        previous = estimates.get(pair)
+        estimates[pair] = latency if previous is None else alpha * latency + (1 - alpha) * previous
+    return estimates
+
+
+def longest_first(pairs: List[Pair], latencies: Dict[Pair, float]) -> List[Tuple[Pair, float]]:
+    """
+    Pairs with their expected duration, longest first
+    
+    Pairs without history get the same fallbacks as shard weights
+    (model median, then overall median); ties break by a stable hash.
+    """
+    weights = estimate_weights(pairs, latencies)
+    ordered = sorted(pairs, key=lambda pair: (-weights[pair], pair_hash(*pair), pair))
+    return [(pair, weights[pair]) for pair in ordered]
+
+
+class ProviderDispatcher:
+    """Hands out the longest pending job whose provider is below its concurrency limit"""
+    
+    def __init__(self, limit: int = 1):
+        """
+        Args:
+            limit: Jobs allowed in flight per provider
+        
+        Raises:
+            ValueError: If limit is below 1 (no job could ever start)
+        """
+        if limit < 1:
+            raise ValueError(f"Provider concurrency limit must be at least 1, got {limit}")
+        self.limit = limit
+        self._pending: Dict[str, deque] = {}
+        self._in_flight: Dict[str, int] = {}
+    
+    def add(self, provider: str, job: Any, estimate: float):
+        """Queue a job (add jobs longest first)"""
+        self._pending.setdefault(provider, deque()).append((estimate, job))
+        self._in_flight.setdefault(provider, 0)
+    
+    def next_job(self) -> Optional[Tuple[str, Any]]:
+        """Reserve the next job to start, or None if every provider is busy or drained"""
+        best = None
+        for provider, queue in self._pending.items():
+            if queue and self._in_flight[provider] < self.limit:
+                if best is None or queue[0][0] > self._pending[best][0][0]:
+                    best = provider
+        if best is None:
+            return None
+        
+        self._in_flight[best] += 1
+        return best, self._pending[best].popleft()[1]
+    
+    def release(self, provider: str):
+        """Mark one of the provider's jobs as finished"""
+        self._in_flight[provider] -= 1
+    
+    @property
+    def capacity(self) -> int:
+        """Most jobs that can ever be in flight at once"""
+        return max(1, self.limit * len(self._pending))
+    
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._pending.values())
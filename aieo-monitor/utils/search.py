@@ -0,0 +1,61 @@
+"""
+Full-text search helpers for AI Citation Monitor
+Turns free text into backend query syntax and cuts result snippets
+"""
+import re
+from typing import List
+
+# Markers around matched terms in snippets (both backends)
+HIGHLIGHT_START = '['
+HIGHLIGHT_END = ']'
+
+_TERM = re.compile(r'"([^"]+)"|(\S+)')
+_WORD = re.compile(r"\w+")
+
+
+def search_terms(text: str) -> List[str]:
+    """
+    Split a search string into terms; "quoted text" stays one phrase
+    
+    >>> search_terms('Lone Star "big game" paintballevents.net')
+    ['Lone', 'Star', 'big game', 'paintballevents.net']
+    """
+    terms = []
+    for phrase, word in _TERM.findall(text):
+        term = (phrase or word).strip()
+        if _WORD.search(term):
+            terms.append(term)
+    return terms
+
+
+def fts5_query(terms: List[str]) -> str:
+    """SQLite FTS5 MATCH expression requiring every term (each quoted, so punctuation is literal)"""
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def boolean_query(terms: List[str]) -> str:
+    """MySQL BOOLEAN MODE expression requiring every term (multi-word terms as phrases)"""
+    return ' '.join('+"{}"'.format(term.replace('"', '')) for term in terms)
+
+
+def make_snippet(text: str, terms: List[str], width: int = 160) -> str:
+    """
+    Window of text around the first matched term, with matches highlighted
+    
+    Used where the backend has no snippet function (MySQL); SQLite uses
+    FTS5's snippet() with the same markers.
+    """
+    words = [word for term in terms for word in _WORD.findall(term)]
+    if not words:
+        return text[:width]
+    
+    pattern = re.compile(r'\b(' + '|'.join(re.escape(word) for word in words) + r')\b', re.IGNORECASE)
+    match = pattern.search(text)
+    start = max(0, match.start() - width // 3) if match else 0
+    window = ' '.join(text[start:start + width].split())
+    
+    return (
+        ('…' if start > 0 else '')
+        + pattern.sub(lambda m: f"{HIGHLIGHT_START}{m.group(0)}{HIGHLIGHT_END}", window)
+        + ('…' if start + width < len(text) else '')
+    )
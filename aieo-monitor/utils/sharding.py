@@ -0,0 +1,82 @@
+"""
+Deterministic sharding for AI Citation Monitor
+Splits the model x query matrix across CI matrix jobs (run_monitor.py --shard i/N)
+"""
+import hashlib
+import heapq
+from statistics import median
+from typing import Dict, List, Tuple
+
+Pair = Tuple[str, str]
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parse a shard spec of the form "i/N" (0-based index, N shards)
+    
+    Raises:
+        ValueError: If the spec is malformed or out of range
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard spec '{spec}', expected i/N (e.g. 0/4)")
+    
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard spec '{spec}', index must be in 0..{count - 1}")
+    
+    return index, count
+
+
+def pair_hash(model_id: str, query_id: str) -> int:
+    """Stable hash of a (model_id, query_id) pair (independent of PYTHONHASHSEED)"""
+    digest = hashlib.sha1(f"{model_id}:{query_id}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def estimate_weights(pairs: List[Pair], latencies: Dict[Pair, float]) -> Dict[Pair, float]:
+    """
+    Expected duration of each pair from historical latency
+    
+    Pairs without history fall back to the median latency of the same
+    model, then to the median over all pairs, then to 1.
+    """
+    by_model = {}
+    for (model_id, _), latency in latencies.items():
+        by_model.setdefault(model_id, []).append(latency)
+    
+    overall = median(latencies.values()) if latencies else 1.0
+    model_medians = {model_id: median(values) for model_id, values in by_model.items()}
+    
+    return {
+        pair: latencies.get(pair) or model_medians.get(pair[0]) or overall
+        for pair in pairs
+    }
+
+
+def assign_shards(pairs: List[Pair], shard_count: int,
+                  latencies: Dict[Pair, float]) -> Dict[Pair, int]:
+    """
+    Partition pairs into shards with roughly equal expected duration
+    
+    Longest-processing-time-first: pairs are taken in order of decreasing
+    expected latency (ties broken by a stable hash) and each goes to the
+    currently lightest shard (ties broken by shard index). Every shard
+    computes the same assignment as long as it sees the same inputs.
+    
+    Returns:
+        Mapping of pair -> shard index
+    """
+    weights = estimate_weights(pairs, latencies)
+    ordered = sorted(pairs, key=lambda pair: (-weights[pair], pair_hash(*pair), pair))
+    
+    loads = [(0.0, shard) for shard in range(shard_count)]
+    heapq.heapify(loads)
+    
+    assignment = {}
+    for pair in ordered:
+        load, shard = heapq.heappop(loads)
+        assignment[pair] = shard
+        heapq.heappush(loads, (load + weights[pair], shard))
+    
+    return assignment
@@ -0,0 +1,163 @@
+"""
+Response fingerprints for AI Citation Monitor
+64-bit SimHash of response text plus LSH banding, so near-identical answers
+can be found without diffing full texts
+"""
+import re
+import hashlib
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+BITS = 64
+# 4 bands of 16 bits: any two fingerprints within Hamming distance 3 share
+# at least one band (pigeonhole), so bucketing by band finds them all
+BANDS = 4
+BAND_BITS = BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+# Words per shingle; shingles keep some word order, so reordered lists drift
+SHINGLE_SIZE = 3
+
+_WORD = re.compile(r"\w+")
+
+# Byte value -> integer with bit i of the byte at bit i * _LANE_BITS
+_LANE_BITS = 32
+_LANE_MASK = (1 << _LANE_BITS) - 1
+_SPREAD = [
+    sum(1 << (bit * _LANE_BITS) for bit in range(8) if value >> bit & 1)
+    for value in range(256)
+]
+
+
+def _shingles(text: str) -> Counter:
+    """Counts of overlapping word shingles in lowercased text"""
+    words = _WORD.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return Counter([' '.join(words)]) if words else Counter()
+    return Counter(
+        ' '.join(words[index:index + SHINGLE_SIZE])
+        for index in range(len(words) - SHINGLE_SIZE + 1)
+    )
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash of a text (unsigned)
+    
+    Each shingle is hashed to 64 bits (big-endian); every bit of the
+    fingerprint is set when the shingles with that bit set outweigh those
+    without it. Similar texts share most shingles and so differ in few bits.
+    """
+    shingles = _shingles(text or '')
+    if not shingles:
+        return 0
+    
+    digests = [
+        (hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), weight)
+        for shingle, weight in shingles.items()
+    ]
+    total = sum(shingles.values())
+    
+    # Per-bit weights are summed one digest byte at a time: _SPREAD puts each
+    # bit of a byte in its own 32-bit lane of one big integer, so a single
+    # sum() per byte replaces eight per-bit passes over all shingles
+    fingerprint = 0
+    for position in range(8):
+        lanes = sum(_SPREAD[digest[position]] * weight for digest, weight in digests)
+        shift = 8 * (7 - position)
+        for bit in range(8):
+            if 2 * ((lanes >> (bit * _LANE_BITS)) & _LANE_MASK) > total:
+                fingerprint |= 1 << (shift + bit)
+    return fingerprint
+
+
+def bands(fingerprint: int) -> Tuple[int, ...]:
+    """Split a fingerprint into BANDS LSH bucket keys (most significant first)"""
+    return tuple(
+        (fingerprint >> (BITS - BAND_BITS * (band + 1))) & BAND_MASK
+        for band in range(BANDS)
+    )
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints"""
+    return bin(a ^ b).count('1')
+
+
+def to_signed(fingerprint: int) -> int:
+    """Unsigned 64-bit fingerprint -> signed value for BIGINT/INTEGER columns"""
+    return fingerprint - (1 << BITS) if fingerprint >= 1 << (BITS - 1) else fingerprint
+
+
+def to_unsigned(value: int) -> int:
+    """Signed BIGINT/INTEGER column value -> unsigned 64-bit fingerprint"""
+    return value + (1 << BITS) if value < 0 else value
+
+
+def fingerprint_columns(text: str) -> Tuple[int, ...]:
+    """(simhash, band0, ..., band3) column values for a response text"""
+    fingerprint = simhash(text)
+    return (to_signed(fingerprint),) + bands(fingerprint)
+
+
+def near_duplicate_pairs(
+    fingerprints: Dict[int, int],
+    max_distance: int = 3
+) -> List[Tuple[int, int, int]]:
+    """
+    Pairs of items whose fingerprints are within max_distance bits
+    
+    Items are bucketed by each band and only items sharing a bucket are
+    compared, so the cost grows with bucket sizes rather than n^2. Recall
+    is exact for max_distance < BANDS; beyond that, pairs whose differing
+    bits hit every band are missed.
+    
+    Args:
+        fingerprints: Mapping of item id -> unsigned fingerprint
+        max_distance: Largest Hamming distance counted as near-identical
+    
+    Returns:
+        List of (id_a, id_b, distance) with id_a < id_b
+    """
+    buckets = {}
+    for item, fingerprint in fingerprints.items():
+        for band, key in enumerate(bands(fingerprint)):
+            buckets.setdefault((band, key), []).append(item)
+    
+    seen = set()
+    pairs = []
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        members.sort()
+        for index, a in enumerate(members):
+            for b in members[index + 1:]:
+                if (a, b) in seen:
+                    continue
+                seen.add((a, b))
+                distance = hamming(fingerprints[a], fingerprints[b])
+                if distance <= max_distance:
+                    pairs.append((a, b, distance))
+    return pairs
+
+
+def cluster(items: Iterable[int], pairs: Iterable[Tuple[int, int, int]]) -> List[List[int]]:
+    """Group items connected by near-duplicate pairs (union-find); singletons omitted"""
+    parent = {item: item for item in items}
+    
+    def find(item: int) -> int:
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+    
+    for a, b, _ in pairs:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+    
+    groups = {}
+    for item in parent:
+        groups.setdefault(find(item), []).append(item)
+    return sorted((sorted(group) for group in groups.values() if len(group) > 1), key=lambda g: (-len(g), g))
+
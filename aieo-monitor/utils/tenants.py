@@ -0,0 +1,114 @@
+"""
+Tenant support for AI Citation Monitor
+Several sites (tenants) share one monitor: each tracks its own domains over
+a subset of the queries, and a prompt asked for several tenants is sent to
+each model only once
+"""
+from typing import Dict, List, Tuple
+
+from utils.urls import cites_domain
+
+# Used when config/tenants.json does not exist: the original single site
+DEFAULT_TENANTS = [
+    {'id': 'paintballevents', 'name': 'PaintballEvents.net', 'domains': ['paintballevents.net']}
+]
+
+
+def resolve_tenants(config: List[Dict], queries: List[Dict]) -> List[Dict]:
+    """
+    Normalize tenant config against the configured queries
+    
+    A tenant selects queries by id ("queries") and/or by category
+    ("categories"); with neither it tracks every query.
+    
+    Returns:
+        Dicts with id, name, domains (lowercased) and query_ids (in query order)
+    
+    Raises:
+        ValueError: On duplicate tenant ids, tenants without domains or unknown query ids
+    """
+    known = {query['id'] for query in queries}
+    tenants = []
+    seen = set()
+    for entry in config:
+        tenant_id = entry['id']
+        if tenant_id in seen:
+            raise ValueError(f"Duplicate tenant id: {tenant_id}")
+        seen.add(tenant_id)
+        
+        domains = [domain.strip().lower() for domain in entry.get('domains', []) if domain.strip()]
+        if not domains:
+            raise ValueError(f"Tenant {tenant_id} has no domains")
+        
+        ids = set(entry.get('queries', []))
+        unknown = ids - known
+        if unknown:
+            raise ValueError(f"Tenant {tenant_id} references unknown queries: {', '.join(sorted(unknown))}")
+        categories = set(entry.get('categories', []))
+        
+        tenants.append({
+            'id': tenant_id,
+            'name': entry.get('name', tenant_id),
+            'domains': domains,
+            'query_ids': [
+                query['id'] for query in queries
+                if (not ids and not categories) or query['id'] in ids or query.get('category') in categories
+            ]
+        })
+    return tenants
+
+
+def prompt_key(text: str) -> str:
+    """Prompt text with case and whitespace differences removed"""
+    return ' '.join(text.split()).casefold()
+
+
+def share_prompts(queries: List[Dict], tenants: List[Dict]) -> Tuple[List[Dict], Dict[str, List[Dict]]]:
+    """
+    Unique prompts to ask, and the tenants each is evaluated for
+    
+    Queries no tenant tracks are dropped. Queries with the same prompt text
+    collapse into the first of them, which keeps the most important
+    (lowest) priority of the group and is evaluated for every tenant of any
+    of them. API volume scales with unique prompts, not tenants x prompts.
+    
+    Returns:
+        (queries to run, {query_id: tenants} for those queries)
+    """
+    tracked_by = {}
+    for tenant in tenants:
+        for query_id in tenant['query_ids']:
+            tracked_by.setdefault(query_id, []).append(tenant)
+    
+    shared = {}
+    query_tenants = {}
+    for query in queries:
+        if query['id'] not in tracked_by:
+            continue
+        
+        key = prompt_key(query['text'])
+        if key not in shared:
+            shared[key] = dict(query)
+            query_tenants[query['id']] = []
+        canonical = shared[key]
+        canonical['priority'] = min(canonical.get('priority') or 1, query.get('priority') or 1)
+        
+        members = query_tenants[canonical['id']]
+        for tenant in tracked_by[query['id']]:
+            if tenant not in members:
+                members.append(tenant)
+    
+    return list(shared.values()), query_tenants
+
+
+def references_domains(domains: List[str], cited_urls: List[str], response_text: str) -> bool:
+    """Whether any of the domains is cited by URL host or named in the response text"""
+    return any(cites_domain(domain, cited_urls, response_text) for domain in domains)
+
+
+def tenant_references(tenants: List[Dict], cited_urls: List[str], response_text: str) -> Dict[str, bool]:
+    """Citation result per tenant id for one response"""
+    return {
+        tenant['id']: references_domains(tenant['domains'], cited_urls, response_text)
+        for tenant in tenants
+    }
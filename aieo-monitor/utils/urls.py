@@ -0,0 +1,194 @@
+"""
+URL canonicalization for AI Citation Monitor
+Normalizes cited URLs so the same page groups together, and resolves the
+registrable domain (example.co.uk, not www.example.co.uk or co.uk) from a
+bundled public suffix list. Results are memoized: the same URLs recur
+across thousands of responses.
+"""
+import os
+import re
+from functools import lru_cache
+from typing import FrozenSet, List, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+PUBLIC_SUFFIX_PATH = os.path.join(os.path.dirname(__file__), 'public_suffix_list.dat')
+
+# Query parameters that only track the click, never select content
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'gclsrc', 'dclid', 'msclkid', 'yclid', 'twclid', 'igshid',
+    'mc_cid', 'mc_eid', '_hsenc', '_hsmi', 'mkt_tok', 'ref_src', 'ref_url', 'srsltid',
+})
+TRACKING_PREFIXES = ('utm_',)
+
+# Trailing characters picked up when URLs are cut out of prose
+TRAILING_PUNCTUATION = '.,;:!?\'"'
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Bump when canonicalize_url() or domain matching starts returning different
+# results, so backfill_citations.py re-derives every stored response
+RULES_VERSION = 1
+CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=None)
+def _suffix_rules() -> Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str]]:
+    """(rules, wildcard parents, exceptions) parsed from the public suffix list"""
+    rules, wildcards, exceptions = set(), set(), set()
+    with open(PUBLIC_SUFFIX_PATH, 'r', encoding='utf-8') as f:
+        for line in f:
+            rule = line.split()[0].lower() if line.strip() else ''
+            if not rule or rule.startswith('//'):
+                continue
+            if rule.startswith('!'):
+                exceptions.add(rule[1:])
+            elif rule.startswith('*.'):
+                wildcards.add(rule[2:])
+            else:
+                rules.add(rule)
+    return frozenset(rules), frozenset(wildcards), frozenset(exceptions)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def public_suffix(host: str) -> str:
+    """
+    Public suffix of a lowercase host name (longest matching rule)
+    
+    >>> public_suffix('www.example.co.uk')
+    'co.uk'
+    """
+    rules, wildcards, exceptions = _suffix_rules()
+    labels = host.split('.')
+    for index in range(len(labels)):
+        candidate = '.'.join(labels[index:])
+        if candidate in exceptions:
+            return '.'.join(labels[index + 1:])
+        if candidate in rules or '.'.join(labels[index + 1:]) in wildcards:
+            return candidate
+    return labels[-1]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def registrable_domain(host: str) -> str:
+    """
+    The domain someone registered: public suffix plus one label
+    
+    IP addresses and bare public suffixes are returned unchanged.
+    
+    >>> registrable_domain('blog.paintballevents.net')
+    'paintballevents.net'
+    >>> registrable_domain('shop.example.co.uk')
+    'example.co.uk'
+    """
+    host = host.lower().rstrip('.')
+    if not host or host.replace('.', '').isdigit() or ':' in host:
+        return host
+    
+    suffix = public_suffix(host)
+    if host == suffix:
+        return host
+    return '.'.join(host[:-len(suffix) - 1].split('.')[-1:] + [suffix])
+
+
+def _is_tracking(name: str) -> bool:
+    """Whether a query parameter only tracks the click"""
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form of a cited URL
+    
+    Trailing prose punctuation, tracking parameters and fragments are
+    dropped; the scheme becomes https, the host is lowercased without
+    "www." or default ports, the path loses trailing slashes and the
+    remaining parameters are sorted. Bare domains ("example.com/page")
+    get a scheme. Unparseable input is returned stripped.
+    
+    >>> canonicalize_url('HTTP://WWW.Example.com/Events/?utm_source=openai&id=2&a=1#top')
+    'https://example.com/Events?a=1&id=2'
+    """
+    url = url.strip().rstrip(TRAILING_PUNCTUATION)
+    if not url:
+        return url
+    if '://' not in url:
+        url = 'https://' + url
+    
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    if ':' in host:
+        host = f"[{host}]"
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    if scheme in DEFAULT_PORTS:
+        scheme = 'https'
+    
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/')
+    query = urlencode(sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking(name)
+    ))
+    
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def url_host(url: str) -> str:
+    """Lowercase host of a URL (or bare host) without "www.", '' if there is none"""
+    try:
+        return urlsplit(canonicalize_url(url)).hostname or ''
+    except ValueError:
+        return ''
+
+
+def url_domain(url: str) -> str:
+    """Registrable domain of a URL (or bare host)"""
+    host = url_host(url)
+    return registrable_domain(host) if host else ''
+
+
+def host_matches(url: str, domain: str) -> bool:
+    """Whether the URL's host is the domain or one of its subdomains"""
+    host = url_host(url)
+    return host == domain or host.endswith('.' + domain)
+
+
+@lru_cache(maxsize=256)
+def _mention_pattern(domain: str):
+    """Domain as a whole token in prose (not part of a longer host name)"""
+    return re.compile(r'(?<![\w-])' + re.escape(domain) + r'(?![\w-]|\.\w)', re.IGNORECASE)
+
+
+def mentions_domain(text: str, domain: str) -> bool:
+    """
+    Whether prose mentions the domain or one of its subdomains
+    
+    >>> mentions_domain('See www.PaintballEvents.net.', 'paintballevents.net')
+    True
+    >>> mentions_domain('See notpaintballevents.net', 'paintballevents.net')
+    False
+    """
+    # Cheap substring scan first; the regex only confirms token boundaries
+    if domain not in text.lower():
+        return False
+    return _mention_pattern(domain).search(text) is not None
+
+
+def cites_domain(domain: str, cited_urls: List[str], response_text: str) -> bool:
+    """Whether a response cites (by URL) or mentions (in text) the domain"""
+    domain = domain.lower()
+    return (
+        # The substring test rules out most URLs before any parsing
+        any(domain in url.lower() and host_matches(url, domain) for url in cited_urls)
+        or mentions_domain(response_text, domain)
+    )